@@ -0,0 +1,15 @@
+"""
+ASGI config for Gnosis PM Compliance Service project.
+
+Screening endpoints are served by the async views of `pm_compliance_service.compliance.async_views` on the event
+loop. Every other request is served by the WSGI application of `config.wsgi`, run on a thread by `asgiref`, so
+both entry points answer the same. Run it with:
+
+    gunicorn config.asgi:application --worker-class uvicorn.workers.UvicornWorker
+"""
+from asgiref.wsgi import WsgiToAsgi
+from config.wsgi import application as wsgi_application  # Sets up Django
+
+from pm_compliance_service.compliance.async_views import AsyncViewsApplication
+
+application = AsyncViewsApplication(WsgiToAsgi(wsgi_application))
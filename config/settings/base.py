@@ -43,6 +43,17 @@ DATABASES = {
     'default': env.db('DATABASE_URL'),
 }
 DATABASES['default']['ATOMIC_REQUESTS'] = True
+# Seconds connections are kept open to be reused by next requests, `0` to close them at the end of every request
+DATABASES['default']['CONN_MAX_AGE'] = env.int('DATABASE_CONN_MAX_AGE', default=60)
+# Connections of every process are shared from a pool of this size, `0` disables it. Only for PostgreSQL. Greenlets
+# of gevent workers have their own Django connections, so they can only reuse persistent connections from the pool.
+# With the pool queries yield to other greenlets instead of blocking the worker
+DATABASE_POOL_SIZE = env.int('DATABASE_POOL_SIZE', default=0)
+# Seconds to wait for a connection of the pool to be released
+DATABASE_POOL_TIMEOUT = env.int('DATABASE_POOL_TIMEOUT', default=10)
+if DATABASE_POOL_SIZE:
+    DATABASES['default'].update(ENGINE='pm_compliance_service.compliance.postgresql_pool',
+                                POOL_SIZE=DATABASE_POOL_SIZE, POOL_TIMEOUT=DATABASE_POOL_TIMEOUT)
 
 # URLS
 # ------------------------------------------------------------------------------
@@ -86,6 +97,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'pm_compliance_service.compliance.middleware.RedisTimingMiddleware',
+    'pm_compliance_service.compliance.middleware.MetricsMiddleware',
+    'pm_compliance_service.compliance.middleware.GeoBlockMiddleware',
+    'pm_compliance_service.compliance.middleware.ConcurrencyLimitMiddleware',
 ]
 
 # STATIC
@@ -172,8 +187,8 @@ MANAGERS = ADMINS
 # Celery
 # ------------------------------------------------------------------------------
 INSTALLED_APPS += [
-    #'pm_compliance_service.taskapp.celery.CeleryConfig',
-    #'django_celery_beat',
+    'pm_compliance_service.taskapp.celery.CeleryConfig',
+    'django_celery_beat',
 ]
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-broker_url
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='django://')
@@ -188,23 +203,62 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-result_serializer
 CELERY_RESULT_SERIALIZER = 'json'
+# http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-task_routes
+CELERY_ROUTES = {
+    'pm_compliance_service.compliance.tasks.rescreen_chunk_task': {'queue': 'rescreening'},
+}
+# http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-broker_transport_options
+# Priorities on Redis are emulated with one list for every step
+BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+}
+# http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-worker_prefetch_multiplier
+# Don't reserve messages in advance, so high priority messages are not waiting behind prefetched ones
+CELERYD_PREFETCH_MULTIPLIER = 1
+# http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-beat_schedule
+CELERYBEAT_SCHEDULE = {
+    'send-notifications': {
+        'task': 'pm_compliance_service.compliance.tasks.send_notifications_task',
+        'schedule': env.int('NOTIFICATIONS_SEND_INTERVAL', default=5),
+    },
+    'retry-notifications': {
+        'task': 'pm_compliance_service.compliance.tasks.retry_notifications_task',
+        'schedule': env.int('NOTIFICATIONS_RETRY_INTERVAL', default=30),
+    },
+}
 
 # Django REST Framework
 # ------------------------------------------------------------------------------
 REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'pm_compliance_service.compliance.pagination.KeysetPagination',
     'DEFAULT_PERMISSION_CLASSES': ('rest_framework.permissions.AllowAny',),
+    # Partners send their token to every endpoint, so it's used for quotas
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework.authentication.TokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': ('pm_compliance_service.compliance.throttling.TokenQuotaThrottle',),
     'DEFAULT_RENDERER_CLASSES': (
-        'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
+        'pm_compliance_service.compliance.camel_case.CamelCaseJSONRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'djangorestframework_camel_case.parser.CamelCaseJSONParser',
+        'pm_compliance_service.compliance.camel_case.CamelCaseJSONParser',
     ),
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
     'EXCEPTION_HANDLER': 'pm_compliance_service.compliance.views.custom_exception_handler',
 }
 
+# Schema is built by `build_openapi_schema` command and served from `OPENAPI_SCHEMA_DIR`. UIs use that file
+OPENAPI_SCHEMA_DIR = env('OPENAPI_SCHEMA_DIR', default=str(ROOT_DIR('openapi')))
+SWAGGER_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
 # LOGGING
 # ------------------------------------------------------------------------------
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#logging
@@ -213,6 +267,14 @@ REST_FRAMEWORK = {
 # the site admins bon every HTTP 500 error when DEBUG=False.
 # See https://docs.djangoproject.com/en/dev/topics/logging for
 # more details on how to customize your logging configuration.
+
+# Console records are written as JSON objects instead of text lines
+LOG_JSON = env.bool('DJANGO_LOG_JSON', default=not DEBUG)
+# Share of the successful (2xx) access log records kept for every url name, other status codes are always logged.
+# `ACCESS_LOG_SAMPLE_RATES=v1:addresses-check=0.1;v1:about=0` is merged with the defaults
+ACCESS_LOG_SAMPLE_RATE = env.float('ACCESS_LOG_SAMPLE_RATE', default=1.)
+ACCESS_LOG_SAMPLE_RATES = dict({'check': 0., 'ready': 0., 'metrics': 0.},
+                               **env.dict('ACCESS_LOG_SAMPLE_RATES', cast={'value': float}, default={}))
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -220,14 +282,17 @@ LOGGING = {
         'require_debug_false': {
             '()': 'django.utils.log.RequireDebugFalse'
         },
-        'ignore_check_url': {
-            '()': 'pm_compliance_service.compliance.utils.IgnoreCheckUrl'
+        'sample_access': {
+            '()': 'pm_compliance_service.compliance.log.AccessLogSampler'
         }
     },
     'formatters': {
         'verbose': {
             'format': '%(asctime)s [%(levelname)s] [%(processName)s] %(message)s',
         },
+        'json': {
+            '()': 'pm_compliance_service.compliance.log.JsonFormatter',
+        },
     },
     'handlers': {
         'mail_admins': {
@@ -238,16 +303,20 @@ LOGGING = {
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_JSON else 'verbose',
+        },
+        'queue': {  # Must sort after its target handlers
+            'class': 'pm_compliance_service.compliance.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
         },
     },
     'loggers': {
         '': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': 'DEBUG' if DEBUG else 'INFO',
         },
         'celery.worker.strategy': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': 'DEBUG' if DEBUG else 'INFO',
         },
         'django.request': {
@@ -257,16 +326,144 @@ LOGGING = {
         },
         'django.security.DisallowedHost': {
             'level': 'ERROR',
-            'handlers': ['console', 'mail_admins'],
+            'handlers': ['queue', 'mail_admins'],
             'propagate': True
         },
-        'django.server': {  # Gunicorn uses `gunicorn.access`
+        'django.server': {
+            'level': 'INFO',
+            'handlers': ['queue'],
+            'propagate': False,
+            'filters': ['sample_access'],
+        },
+        # Gunicorn workers replace the handlers set by Gunicorn when Django is set up. Master keeps them
+        'gunicorn.access': {
+            'level': 'INFO',
+            'handlers': ['queue'],
+            'propagate': False,
+            'filters': ['sample_access'],
+        },
+        'gunicorn.error': {
             'level': 'INFO',
-            'handlers': ['console'],
-            'propagate': True,
-            'filters': ['ignore_check_url'],
+            'handlers': ['queue'],
+            'propagate': False,
+        },
+        # Used instead of the Gunicorn loggers by `uvicorn.workers.UvicornWorker`
+        'uvicorn.access': {
+            'level': 'INFO',
+            'handlers': ['queue'],
+            'propagate': False,
+            'filters': ['sample_access'],
+        },
+        'uvicorn.error': {
+            'level': 'INFO',
+            'handlers': ['queue'],
+            'propagate': False,
         },
     }
 }
 
+ETHEREUM_NODE_URL = env('ETHEREUM_NODE_URL', default=None)
+# JSON-RPC calls are sent to the node in batches of `ETHEREUM_RPC_BATCH_SIZE`, only failed calls are retried
+ETHEREUM_RPC_BATCH_SIZE = env.int('ETHEREUM_RPC_BATCH_SIZE', default=100)
+ETHEREUM_RPC_MAX_RETRIES = env.int('ETHEREUM_RPC_MAX_RETRIES', default=3)
+ETHEREUM_RPC_TIMEOUT = env.int('ETHEREUM_RPC_TIMEOUT', default=10)
+ETHEREUM_RPC_POOL_SIZE = env.int('ETHEREUM_RPC_POOL_SIZE', default=10)
+# Nodes with `trace_*` methods enabled
+ETHEREUM_TRACING_NODE_URLS = env.list('ETHEREUM_TRACING_NODE_URLS',
+                                      default=[ETHEREUM_NODE_URL] if ETHEREUM_NODE_URL else [])
+
 REDIS_URL = env('REDIS_URL', default='redis://localhost:6379/0')
+# Connections per process. When all of them are in use, callers wait up to `REDIS_POOL_TIMEOUT` seconds
+REDIS_MAX_CONNECTIONS = env.int('REDIS_MAX_CONNECTIONS', default=50)
+REDIS_POOL_TIMEOUT = env.int('REDIS_POOL_TIMEOUT', default=5)
+# Max keys sent on one command by batch operations
+REDIS_BATCH_SIZE = env.int('REDIS_BATCH_SIZE', default=500)
+
+# Compliance
+# ------------------------------------------------------------------------------
+# Seconds between checks for blocklist changes, every process keeps its own index of blocked addresses
+BLOCKLIST_INDEX_TTL = env.int('BLOCKLIST_INDEX_TTL', default=30)
+ADDRESSES_CHECK_MAX_ADDRESSES = env.int('ADDRESSES_CHECK_MAX_ADDRESSES', default=10000)
+# Compliance statuses are cached on every process for `COMPLIANCE_STATUS_LOCAL_CACHE_TTL` seconds and on the
+# default cache for `COMPLIANCE_STATUS_SHARED_CACHE_TTL` seconds. Changes are propagated using Redis pub/sub
+COMPLIANCE_STATUS_LOCAL_CACHE_SIZE = env.int('COMPLIANCE_STATUS_LOCAL_CACHE_SIZE', default=100000)
+COMPLIANCE_STATUS_LOCAL_CACHE_TTL = env.int('COMPLIANCE_STATUS_LOCAL_CACHE_TTL', default=60)
+COMPLIANCE_STATUS_SHARED_CACHE_TTL = env.int('COMPLIANCE_STATUS_SHARED_CACHE_TTL', default=60 * 60)
+# If more addresses are invalidated at once, local caches are cleared
+COMPLIANCE_STATUS_MAX_INVALIDATIONS = env.int('COMPLIANCE_STATUS_MAX_INVALIDATIONS', default=1000)
+# Signatures are recovered on a process pool, so the gevent hub is not blocked by CPU bound work
+SIGNATURE_VERIFICATION_WORKERS = env.int('SIGNATURE_VERIFICATION_WORKERS', default=2)
+SIGNATURE_VERIFICATION_PARALLEL_THRESHOLD = env.int('SIGNATURE_VERIFICATION_PARALLEL_THRESHOLD', default=32)
+SIGNATURE_VERIFICATION_CACHE_SIZE = env.int('SIGNATURE_VERIFICATION_CACHE_SIZE', default=10000)
+SIGNATURE_VERIFICATION_MAX_SIGNATURES = env.int('SIGNATURE_VERIFICATION_MAX_SIGNATURES', default=1000)
+
+# ERC20 events indexer. Block range for `eth_getLogs` doubles while node answers in less than
+# `ERC20_EVENTS_TARGET_QUERY_SECONDS` and halves when node refuses it
+ERC20_EVENTS_CONFIRMATIONS = env.int('ERC20_EVENTS_CONFIRMATIONS', default=6)
+ERC20_EVENTS_INITIAL_BLOCK_RANGE = env.int('ERC20_EVENTS_INITIAL_BLOCK_RANGE', default=1000)
+ERC20_EVENTS_MAX_BLOCK_RANGE = env.int('ERC20_EVENTS_MAX_BLOCK_RANGE', default=100000)
+ERC20_EVENTS_TOKENS_PER_QUERY = env.int('ERC20_EVENTS_TOKENS_PER_QUERY', default=50)
+ERC20_EVENTS_TARGET_QUERY_SECONDS = env.float('ERC20_EVENTS_TARGET_QUERY_SECONDS', default=2.)
+
+# Internal txs are traced using `INTERNAL_TX_MAX_WORKERS` threads, with at most
+# `INTERNAL_TX_MAX_CONCURRENCY_PER_NODE` concurrent requests for every tracing node
+INTERNAL_TX_MAX_WORKERS = env.int('INTERNAL_TX_MAX_WORKERS', default=16)
+INTERNAL_TX_MAX_CONCURRENCY_PER_NODE = env.int('INTERNAL_TX_MAX_CONCURRENCY_PER_NODE', default=4)
+INTERNAL_TX_TRACE_TIMEOUT = env.int('INTERNAL_TX_TRACE_TIMEOUT', default=60)
+# Traces of blocks with more confirmations are cached forever
+INTERNAL_TX_CONFIRMATIONS = env.int('INTERNAL_TX_CONFIRMATIONS', default=12)
+INTERNAL_TX_BLOCKS_PER_FILTER = env.int('INTERNAL_TX_BLOCKS_PER_FILTER', default=100)
+
+# Funding of verified users. Gas price is reused for `FUNDING_GAS_PRICE_CACHE_TTL` seconds
+FUNDING_ACCOUNT_PRIVATE_KEY = env('FUNDING_ACCOUNT_PRIVATE_KEY', default=None)
+FUNDING_MAX_ETH = env.float('FUNDING_MAX_ETH', default=0.1)
+FUNDING_GAS_PRICE_CACHE_TTL = env.int('FUNDING_GAS_PRICE_CACHE_TTL', default=15)
+FUNDING_CHAIN_ID = env.int('FUNDING_CHAIN_ID', default=None)
+
+# Notifications of status changes. Changes of the same address within `NOTIFICATIONS_COALESCE_SECONDS` are sent
+# as one notification. Failed deliveries are retried with exponential backoff from `NOTIFICATIONS_RETRY_BACKOFF`
+NOTIFICATIONS_WEBHOOK_URLS = env.list('NOTIFICATIONS_WEBHOOK_URLS', default=[])
+NOTIFICATIONS_COALESCE_SECONDS = env.int('NOTIFICATIONS_COALESCE_SECONDS', default=10)
+NOTIFICATIONS_BATCH_SIZE = env.int('NOTIFICATIONS_BATCH_SIZE', default=100)
+NOTIFICATIONS_MAX_ATTEMPTS = env.int('NOTIFICATIONS_MAX_ATTEMPTS', default=8)
+NOTIFICATIONS_RETRY_BACKOFF = env.int('NOTIFICATIONS_RETRY_BACKOFF', default=30)
+NOTIFICATIONS_TIMEOUT = env.int('NOTIFICATIONS_TIMEOUT', default=5)
+
+# Safe addresses derived with CREATE2 for `ProxyFactory.createProxyWithNonce`. Defaults are Safe v1.1.1 contracts.
+# If `SAFE_PROXY_CREATION_CODE` is not provided it's requested to the `ProxyFactory`
+SAFE_PROXY_FACTORY_ADDRESS = env('SAFE_PROXY_FACTORY_ADDRESS', default='0x76E2cFc1F5Fa8F6a5b3fC4c8F4788F0116861F9B')
+SAFE_MASTER_COPY_ADDRESS = env('SAFE_MASTER_COPY_ADDRESS', default='0x34CfAC646f301356fAa8B21e94227e3583Fe3F5F')
+SAFE_FALLBACK_HANDLER_ADDRESS = env('SAFE_FALLBACK_HANDLER_ADDRESS',
+                                    default='0xd5D82B6aDDc9027B22dCA772Aa68D5d74cdBdF44')
+SAFE_PROXY_CREATION_CODE = env('SAFE_PROXY_CREATION_CODE', default=None)
+SAFE_CREATION_BATCH_SIZE = env.int('SAFE_CREATION_BATCH_SIZE', default=10000)
+
+# Full population rescreening, chunks are screened on the `rescreening` queue
+RESCREENING_CHUNK_SIZE = env.int('RESCREENING_CHUNK_SIZE', default=5000)
+RESCREENING_PRIORITY = env.int('RESCREENING_PRIORITY', default=5)
+# Seconds to keep the progress of a job on Redis, jobs can be restarted during that time
+RESCREENING_JOB_TTL = env.int('RESCREENING_JOB_TTL', default=7 * 24 * 60 * 60)
+
+# API tokens can send `TOKEN_QUOTA_REQUESTS` on any `TOKEN_QUOTA_WINDOW` seconds, more are rejected with 429.
+# `TOKEN_QUOTAS=partner=6000;other=100` sets the quota of some users
+TOKEN_QUOTA_REQUESTS = env.int('TOKEN_QUOTA_REQUESTS', default=600)
+TOKEN_QUOTA_WINDOW = env.int('TOKEN_QUOTA_WINDOW', default=60)
+TOKEN_QUOTAS = env.dict('TOKEN_QUOTAS', cast={'value': int}, default={})
+# Requests served at the same time by every process, more are rejected with 503. 0 disables the limit
+MAX_CONCURRENT_REQUESTS = env.int('MAX_CONCURRENT_REQUESTS', default=100)
+# `/ready/` probes database, Redis, celery broker and Ethereum node waiting up to `READINESS_TIMEOUT` seconds. Result
+# is reused by the process for `READINESS_CACHE_TTL` seconds
+READINESS_TIMEOUT = env.float('READINESS_TIMEOUT', default=1.)
+READINESS_CACHE_TTL = env.float('READINESS_CACHE_TTL', default=5.)
+# Requests from `GEOIP_BLOCKED_COUNTRIES` (ISO 3166-1 alpha-2 codes) are rejected with 451. Countries are looked
+# up on the file built by `build_geoip_database`, checked for changes every `GEOIP_RELOAD_INTERVAL` seconds.
+# `GEOIP_TRUSTED_PROXIES` is the number of proxies adding `X-Forwarded-For` in front of nginx
+GEOIP_BLOCKED_COUNTRIES = env.list('GEOIP_BLOCKED_COUNTRIES', default=[])
+GEOIP_DATABASE_PATH = env('GEOIP_DATABASE_PATH', default=str(ROOT_DIR('geoip', 'countries.bin')))
+GEOIP_RELOAD_INTERVAL = env.int('GEOIP_RELOAD_INTERVAL', default=10)
+GEOIP_TRUSTED_PROXIES = env.int('GEOIP_TRUSTED_PROXIES', default=0)
+# Every process adds its request metrics to Redis at most once every `METRICS_FLUSH_INTERVAL` seconds
+METRICS_FLUSH_INTERVAL = env.int('METRICS_FLUSH_INTERVAL', default=10)
+
+# Rows fetched from the database on every round trip of an export
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
@@ -0,0 +1,35 @@
+"""
+Settings for `run_benchmarks`. No external service is needed: database is SQLite unless `DATABASE_URL` is
+provided and Redis is replaced by a fake server while benchmarks run.
+"""
+import os
+import tempfile
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(),
+                                                                  'pm-compliance-benchmark.sqlite3'))
+
+from .test import *  # noqa isort:skip
+from .test import DATABASES  # noqa isort:skip
+
+# DATABASES
+# ------------------------------------------------------------------------------
+# Same as production. Benchmark database is created from scratch on every run, SQLite must use a file so every
+# thread of the load generator can open its own connection
+DATABASES['default']['ATOMIC_REQUESTS'] = False
+DATABASES['default']['TEST'] = {
+    'NAME': os.path.join(tempfile.gettempdir(), 'test-pm-compliance-benchmark.sqlite3'),
+}
+
+# GENERAL
+# ------------------------------------------------------------------------------
+# Host used by the load generator
+ALLOWED_HOSTS = ['testserver']
+
+# LOGGING
+# ------------------------------------------------------------------------------
+LOGGING['loggers']['']['level'] = 'WARNING'  # noqa F405
+
+# Compliance
+# ------------------------------------------------------------------------------
+# Proxy bytecode is not requested to a node, so no Ethereum node is needed
+SAFE_PROXY_CREATION_CODE = '0x' + '00' * 32
@@ -5,29 +5,19 @@ from django.contrib import admin
 from django.http import HttpResponse
 from django.views import defaults as default_views
 
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title='Gnosis PM Compliance API',
-        default_version='v1',
-        description='API to manage complianceing of Prediction markets users',
-        license=openapi.License(name='MIT License'),
-    ),
-    validators=['flex', 'ssv'],
-    public=True,
-    # permission_classes=(permissions.AllowAny,),
-)
-
+from pm_compliance_service.compliance.schema import (SchemaFileView,
+                                                     SchemaUIView)
+from pm_compliance_service.compliance.views import metrics_view, readiness_view
 
 urlpatterns = [
-    url(r'^$', schema_view.with_ui('swagger', cache_timeout=None), name='schema-swagger-ui'),
-    url(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=None), name='schema-json'),
-    url(r'^redoc/$', schema_view.with_ui('redoc', cache_timeout=None), name='schema-redoc'),
+    url(r'^$', SchemaUIView.with_ui('swagger', cache_timeout=None), name='schema-swagger-ui'),
+    url(r'^swagger(?P<format>\.json|\.yaml)$', SchemaFileView.as_view(), name='schema-json'),
+    url(r'^redoc/$', SchemaUIView.with_ui('redoc', cache_timeout=None), name='schema-redoc'),
     url(settings.ADMIN_URL, admin.site.urls),
     url(r'^api/v1/', include('pm_compliance_service.compliance.urls', namespace='v1')),
     url(r'^check/', lambda request: HttpResponse("Ok"), name='check'),
+    url(r'^ready/', readiness_view, name='ready'),
+    url(r'^metrics$', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -2,4 +2,4 @@
 
 set -euo pipefail
 
-celery -A pm_compliance_service.taskapp worker -l INFO
+celery -A pm_compliance_service.taskapp worker -l INFO -Q celery,rescreening
@@ -10,5 +10,23 @@ DOCKER_SHARED_DIR=/nginx
 rm -rf $DOCKER_SHARED_DIR/*
 STATIC_ROOT=$DOCKER_SHARED_DIR/staticfiles python manage.py collectstatic --noinput
 
+echo "==> Building OpenAPI schema ... "
+python manage.py build_openapi_schema
+
+if [ -n "${GEOIP_CSV:-}" ]; then
+  echo "==> Building GeoIP database ... "
+  python manage.py build_geoip_database "$GEOIP_CSV"
+fi
+
 echo "==> Running Gunicorn ... "
-gunicorn --pythonpath "$PWD" config.wsgi:application --log-file=- --error-logfile=- --access-logfile=- --log-level info --logger-class='pm_compliance_service.compliance.utils.CustomGunicornLogger' -b unix:$DOCKER_SHARED_DIR/gunicorn.socket -b 127.0.0.1:8888 --worker-class gevent
+# WEB_SERVER_MODE=asgi serves the screening endpoints with async views on uvicorn workers
+if [ "${WEB_SERVER_MODE:-wsgi}" = "asgi" ]; then
+  APPLICATION=config.asgi:application
+  WORKER_CLASS=uvicorn.workers.UvicornWorker
+else
+  APPLICATION=config.wsgi:application
+  WORKER_CLASS=gevent
+  # Greenlets share a pool of persistent database connections and yield to each other while waiting for queries
+  export DATABASE_POOL_SIZE=${DATABASE_POOL_SIZE:-10}
+fi
+gunicorn --pythonpath "$PWD" $APPLICATION --log-file=- --error-logfile=- --access-logfile=- --log-level info -b unix:$DOCKER_SHARED_DIR/gunicorn.socket -b 127.0.0.1:8888 --worker-class $WORKER_CLASS
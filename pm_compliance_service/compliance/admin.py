@@ -1 +1,40 @@
 from django.contrib import admin
+
+from .models import (BlockedAddress, ComplianceStatus, Erc20EventsCheckpoint,
+                     Erc20Transfer, SafeAddress)
+
+
+@admin.register(BlockedAddress)
+class BlockedAddressAdmin(admin.ModelAdmin):
+    date_hierarchy = 'created'
+    list_display = ('address', 'source', 'created')
+    list_filter = ('source',)
+    search_fields = ['=address']
+
+
+@admin.register(ComplianceStatus)
+class ComplianceStatusAdmin(admin.ModelAdmin):
+    date_hierarchy = 'created'
+    list_display = ('address', 'status', 'modified')
+    list_filter = ('status',)
+    search_fields = ['=address']
+
+
+@admin.register(Erc20EventsCheckpoint)
+class Erc20EventsCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('token_address', 'block_number', 'modified')
+    search_fields = ['=token_address']
+
+
+@admin.register(Erc20Transfer)
+class Erc20TransferAdmin(admin.ModelAdmin):
+    list_display = ('block_number', 'token_address', '_from', 'to', 'value')
+    search_fields = ['=token_address', '=_from', '=to', '=transaction_hash']
+
+
+@admin.register(SafeAddress)
+class SafeAddressAdmin(admin.ModelAdmin):
+    date_hierarchy = 'created'
+    list_display = ('address', 'owner', 'salt_nonce', 'master_copy')
+    list_filter = ('master_copy', 'proxy_factory')
+    search_fields = ['=address', '=owner']
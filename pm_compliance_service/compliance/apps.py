@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ComplianceConfig(AppConfig):
     name = 'pm_compliance_service.compliance'
+
+    def ready(self):
+        from . import signals  # noqa
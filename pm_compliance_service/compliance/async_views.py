@@ -0,0 +1,341 @@
+"""
+asyncio implementations of the screening endpoints (`v1:addresses-check` and `v1:address-status`) served by
+`config.asgi`. Redis is read with `AsyncRedisRepository` and the database is queried on a thread, so one process
+waits on many requests at the same time. Every other endpoint, and screening requests these views cannot answer
+exactly like the Django ones (authenticated, with cookies, not JSON...), is sent to the WSGI application. Django
+middleware adding headers or redirecting (`RUN_MIDDLEWARE`) is run on the async views too
+"""
+import re
+import time
+from http.client import responses
+from io import BytesIO
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import DisallowedHost
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse, HttpResponseServerError, JsonResponse
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from asgiref.wsgi import WsgiToAsgiInstance
+from rest_framework.exceptions import ParseError
+
+from .blocklist import BlocklistIndex, BlocklistIndexProvider
+from .camel_case import CamelCaseJSONParser, CamelCaseJSONRenderer
+from .geoip import GeoIPDatabaseProvider, get_client_ip
+from .metrics import MetricsProvider
+from .middleware import ConcurrencyLimitMiddleware, RedisTimingMiddleware
+from .models import ComplianceStatusType
+from .repositories.async_redis_repository import AsyncRedisRepository
+from .repositories.redis_repository import redis_stats
+from .serializers import ADDRESS_REGEX, AddressesCheckSerializer
+from .status_cache import ComplianceStatusCacheProvider
+from .utils import run_in_thread
+
+logger = getLogger(__name__)
+request_logger = getLogger('django.request')
+
+ASGIApplication = Callable[[Dict[str, Any], Callable, Callable], Awaitable[None]]
+Headers = List[Tuple[bytes, bytes]]
+
+ACCEPTED_MEDIA_TYPES = (b'application/json', b'application/*', b'*/*')
+# Middleware of `MIDDLEWARE` run for the async views, request and response phases
+RUN_MIDDLEWARE = (
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)
+# Middleware done by the async views themselves (Redis timing, metrics, geo-blocking, concurrency limit) or without
+# effect on the requests they answer (no cookies or credentials). If `MIDDLEWARE` has any other, async views are
+# disabled
+SKIPPED_MIDDLEWARE = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'pm_compliance_service.compliance.middleware.RedisTimingMiddleware',
+    'pm_compliance_service.compliance.middleware.MetricsMiddleware',
+    'pm_compliance_service.compliance.middleware.GeoBlockMiddleware',
+    'pm_compliance_service.compliance.middleware.ConcurrencyLimitMiddleware',
+)
+
+
+async def get_blocklist_index() -> BlocklistIndex:
+    """
+    :return: Blocklist index, refreshed on a thread if it expired so lookups never query the database
+    """
+    index = BlocklistIndexProvider()
+    if index.is_expired():
+        await run_in_thread(index.refresh)
+    return index
+
+
+async def addresses_check(data: Any) -> Tuple[int, Any]:
+    """
+    Same as `AddressesCheckView.post`
+    :return: Status code and data of the response
+    """
+    serializer = AddressesCheckSerializer(data=data)
+    if not serializer.is_valid():
+        return 400, serializer.errors
+
+    addresses = serializer.validated_data['addresses']
+    blocked = (await get_blocklist_index()).contains_many(addresses)
+    return 200, {'results': [{'address': address, 'blocked': is_blocked}
+                             for address, is_blocked in zip(addresses, blocked)]}
+
+
+async def address_status(address: str) -> Tuple[int, Any]:
+    """
+    Same as `AddressStatusView.get`
+    :return: Status code and data of the response
+    """
+    if not re.match(ADDRESS_REGEX, address):
+        return 422, 'Invalid address'
+
+    compliance_status = await ComplianceStatusCacheProvider().get_status_async(address)
+    blocked = (await get_blocklist_index()).contains(address)
+    return 200, {
+        'address': address,
+        'status': compliance_status.name if compliance_status else None,
+        'blocked': blocked,
+        'allowed': compliance_status == ComplianceStatusType.VERIFIED and not blocked,
+    }
+
+
+def log_response(path: str, status_code: int, exc_info: bool = False):
+    """
+    Same records as Django logs for every response with an error status
+    """
+    if status_code >= 500:
+        log = request_logger.error
+    elif status_code >= 400:
+        log = request_logger.warning
+    else:
+        return
+    log('%s: %s', responses.get(status_code, 'Unknown Status Code'), path, extra={'status_code': status_code},
+        exc_info=exc_info)
+
+
+class AsyncViewsApplication:
+    """
+    ASGI application answering the screening endpoints on the event loop and sending every other request to
+    `fallback`. Screening requests are geo-blocked and recorded on the metrics like the Django middleware does, and
+    every request but health checks and metrics counts for `MAX_CONCURRENT_REQUESTS`
+    """
+    exempt_paths = ConcurrencyLimitMiddleware.exempt_paths
+
+    def __init__(self, fallback: ASGIApplication):
+        """
+        :param fallback: Django WSGI application wrapped by `asgiref.wsgi.WsgiToAsgi`
+        """
+        self.fallback = fallback
+        self.parser = CamelCaseJSONParser()
+        self.renderer = CamelCaseJSONRenderer()
+        self.max_concurrent_requests = settings.MAX_CONCURRENT_REQUESTS
+        self.concurrent_requests = 0
+        self.blocked_countries = frozenset(country.upper() for country in settings.GEOIP_BLOCKED_COUNTRIES)
+        self.geoip_database = GeoIPDatabaseProvider() if self.blocked_countries else None
+        unsupported_middleware = [path for path in settings.MIDDLEWARE
+                                  if path not in RUN_MIDDLEWARE + SKIPPED_MIDDLEWARE]
+        if unsupported_middleware:
+            logger.warning('Async views are disabled, middleware %s is not supported',
+                           ', '.join(unsupported_middleware))
+        self.enabled = not unsupported_middleware
+        self.middleware = [import_string(path)() for path in settings.MIDDLEWARE if path in RUN_MIDDLEWARE]
+        self.redis_timing = 'pm_compliance_service.compliance.middleware.RedisTimingMiddleware' in settings.MIDDLEWARE
+
+        self.addresses_check_path = reverse('v1:addresses-check')
+        address_status_path = reverse('v1:address-status', kwargs={'address': '_'})
+        self.address_status_regex = re.compile('^%s(?P<address>[^/]+)/$' % re.escape(address_status_path[:-2]))
+
+    @staticmethod
+    def get_request(scope: Dict[str, Any]) -> WSGIRequest:
+        """
+        :return: Django request without body, built from the same environ the WSGI application gets
+        """
+        instance = WsgiToAsgiInstance(None)
+        instance.scope = scope
+        return WSGIRequest(instance.build_environ(scope, BytesIO()))
+
+    def process_request(self, request: WSGIRequest) -> bool:
+        """
+        Request phase of `RUN_MIDDLEWARE`
+        :return: `False` if middleware answers the request (e.g. SSL redirect) or host is not allowed
+        """
+        try:
+            return not any(middleware.process_request(request) for middleware in self.middleware
+                           if hasattr(middleware, 'process_request'))
+        except DisallowedHost:
+            return False
+
+    def process_response(self, request: WSGIRequest, response: HttpResponse) -> Tuple[int, bytes, Headers]:
+        """
+        Response phase of `RUN_MIDDLEWARE`
+        :return: Status code, body and headers of the response
+        """
+        for middleware in reversed(self.middleware):
+            if hasattr(middleware, 'process_response'):
+                response = middleware.process_response(request, response)
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.items()]
+        if not response.has_header('Content-Length'):
+            headers.append((b'content-length', str(len(response.content)).encode()))
+        return response.status_code, response.content, headers
+
+    @staticmethod
+    def is_json_request(headers: Dict[bytes, bytes]) -> bool:
+        """
+        :return: `True` if body is UTF-8 JSON that fits in memory and client accepts a JSON response without
+        indentation, so the response is the one DRF would negotiate
+        """
+        media_type, _, parameters = headers.get(b'content-type', b'').partition(b';')
+        if media_type.strip() != b'application/json' or parameters.strip() not in (b'', b'charset=utf-8'):
+            return False
+        try:
+            content_length = int(headers.get(b'content-length', b''))
+        except ValueError:  # Chunked body
+            return False
+        max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        return (max_size is None or content_length <= max_size) and AsyncViewsApplication.accepts_json(headers)
+
+    @staticmethod
+    def accepts_json(headers: Dict[bytes, bytes]) -> bool:
+        accept = headers.get(b'accept')
+        if not accept:
+            return True
+        return b'indent' not in accept and any(media_range.split(b';')[0].strip() in ACCEPTED_MEDIA_TYPES
+                                               for media_range in accept.split(b','))
+
+    def resolve(self, scope: Dict[str, Any], headers: Dict[bytes, bytes],
+                request: WSGIRequest) -> Optional[Tuple[str, str, Dict[str, str]]]:
+        """
+        :return: View name, allowed methods and arguments of the async view for the request. `None` if request must
+        be sent to the WSGI application
+        """
+        if (not self.enabled or scope.get('root_path') or scope.get('query_string') or b'authorization' in headers
+                or b'cookie' in headers or not self.process_request(request)):
+            return None
+
+        path = scope['path']
+        if path == self.addresses_check_path:
+            if scope['method'] == 'POST' and self.is_json_request(headers):
+                return 'v1:addresses-check', 'POST, OPTIONS', {}
+        elif scope['method'] == 'GET' and self.accepts_json(headers):
+            match = self.address_status_regex.match(path)
+            if match:
+                return 'v1:address-status', 'GET, HEAD, OPTIONS', match.groupdict()
+        return None
+
+    @staticmethod
+    async def read_body(receive: Callable) -> Optional[bytes]:
+        """
+        :return: Body of the request, `None` if client disconnected
+        """
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(body)
+
+    async def send_response(self, send: Callable, request: WSGIRequest, response: HttpResponse) -> Tuple[int, int]:
+        """
+        :return: Status code and size of the body of the response
+        """
+        if self.redis_timing:
+            RedisTimingMiddleware.add_server_timing(request, response)
+        status_code, body, headers = self.process_response(request, response)
+        await send({'type': 'http.response.start', 'status': status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+        return status_code, len(body)
+
+    async def run_view(self, view_name: str, url: str, body: bytes, kwargs: Dict[str, str]) -> Tuple[int, bytes]:
+        """
+        :param url: Absolute url of the request, for the logs
+        :return: Status code and rendered data of the response
+        """
+        request_data = ''
+        try:
+            if view_name == 'v1:address-status':
+                status_code, data = await address_status(kwargs['address'])
+            else:
+                request_data = self.parser.parse(BytesIO(body)) if body else {}
+                status_code, data = await addresses_check(request_data)
+        except ParseError as exc:
+            status_code, data = exc.status_code, {'detail': exc.detail}
+        except Exception as exc:  # Same response as `custom_exception_handler`
+            exception_str = '{}: {}'.format(exc.__class__.__name__, exc) if str(exc) else exc.__class__.__name__
+            status_code, data = 422, {'exception': exception_str}
+            logger.warning('%s - Exception: %s - Data received %s' % (url, exception_str, request_data))
+        return status_code, self.renderer.render(data)
+
+    async def handle(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        headers = dict(scope['headers'])
+        request = self.get_request(scope)
+        route = self.resolve(scope, headers, request)
+        if route is None:
+            return await self.fallback(scope, receive, send)
+
+        view_name, allowed_methods, kwargs = route
+        start = time.perf_counter()
+        redis_stats.reset()  # Every request is run on its own task, so it gets its own stats
+        client_ip = get_client_ip(request.META, settings.GEOIP_TRUSTED_PROXIES) if self.blocked_countries else None
+        if client_ip and self.geoip_database.get_country(client_ip) in self.blocked_countries:
+            view_name = 'unresolved'  # Django middleware blocks the request before resolving it
+            response = JsonResponse({'detail': 'Service is not available in your jurisdiction'}, status=451)
+        else:
+            body = await self.read_body(receive)
+            if body is None:
+                return
+            try:
+                status_code, content = await self.run_view(view_name, request.build_absolute_uri(), body, kwargs)
+                response = HttpResponse(content, status=status_code, content_type='application/json')
+                response['Allow'] = allowed_methods
+                response['Vary'] = 'Cookie'  # Session is read by `SessionAuthentication`
+            except Exception:
+                log_response(request.path, 500, exc_info=True)
+                response = HttpResponseServerError('<h1>Server Error (500)</h1>')
+        if response.status_code != 500:
+            log_response(request.path, response.status_code)
+        status_code, size = await self.send_response(send, request, response)
+
+        # Database queries are run on threads of the executor, they are not recorded
+        MetricsProvider().record_request(view_name, scope['method'], status_code, time.perf_counter() - start,
+                                         size, 0, 0., redis_stats.calls, redis_stats.time)
+
+    async def reject(self, scope: Dict[str, Any], send: Callable):
+        """
+        Same response as `ConcurrencyLimitMiddleware` when the process is serving too many requests
+        """
+        redis_stats.reset()
+        response = JsonResponse({'detail': 'Too many concurrent requests, retry later'}, status=503)
+        response['Retry-After'] = '1'
+        status_code, size = await self.send_response(send, self.get_request(scope), response)
+        MetricsProvider().record_request('unresolved', scope['method'], status_code, 0., size, 0, 0., 0, 0.)
+
+    async def lifespan(self, receive: Callable, send: Callable):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await AsyncRedisRepository.del_singleton()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] != 'http' or scope['path'].startswith(self.exempt_paths):
+            await self.fallback(scope, receive, send)
+        elif self.max_concurrent_requests and self.concurrent_requests >= self.max_concurrent_requests:
+            await self.reject(scope, send)
+        else:
+            self.concurrent_requests += 1
+            try:
+                await self.handle(scope, receive, send)
+            finally:
+                self.concurrent_requests -= 1
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test.utils import setup_databases, teardown_databases
+
+from redis import BlockingConnectionPool
+
+from ..blocklist import BlocklistIndexProvider
+from ..metrics import MetricsProvider
+from ..repositories.redis_repository import RedisRepository
+from ..services import NotificationServiceProvider, SafeCreationServiceProvider
+from ..status_cache import ComplianceStatusCacheProvider
+
+# Singletons keeping a Redis client or data from the database
+PROVIDERS = (BlocklistIndexProvider, ComplianceStatusCacheProvider, MetricsProvider, NotificationServiceProvider,
+             SafeCreationServiceProvider)
+
+
+@contextmanager
+def stand_ins():
+    """
+    Use a new test database (SQLite with `config.settings.benchmark`) and a fake Redis server (`fakeredis`), so
+    benchmarks don't need external services and never modify real data
+    """
+    try:
+        import fakeredis
+    except ImportError:
+        raise ImproperlyConfigured('fakeredis is required to run benchmarks, install requirements-test.txt')
+
+    old_config = setup_databases(verbosity=0, interactive=False)
+    RedisRepository.del_singleton()
+    RedisRepository.instance = RedisRepository.from_connection_pool(
+        BlockingConnectionPool(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
+    )
+    for provider in PROVIDERS:
+        provider.del_singleton()
+    try:
+        yield
+    finally:
+        for provider in PROVIDERS:
+            provider.del_singleton()
+        RedisRepository.del_singleton()
+        teardown_databases(old_config, verbosity=0)
@@ -0,0 +1,136 @@
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Any, Callable, Dict, List, NamedTuple, Optional, Sequence,
+                    Tuple)
+from wsgiref.util import setup_testing_defaults
+
+from django.db import connections
+
+from eth_account import Account
+
+from ..models import BlockedAddress, ComplianceStatus, ComplianceStatusType
+from ..services import SafeCreationServiceProvider
+from ..signatures import SignatureVerificationService
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+
+
+def create_fixtures(addresses: int = 1000) -> List[Scenario]:
+    """
+    Insert statuses, blocked addresses and Safes in the benchmark database
+    :return: Scenarios using them
+    """
+    verified_addresses = [Account.create().address for _ in range(addresses)]
+    ComplianceStatus.objects.bulk_create([ComplianceStatus(address=address, status=ComplianceStatusType.VERIFIED.value)
+                                          for address in verified_addresses])
+    BlockedAddress.objects.bulk_create([BlockedAddress(address=address, source='benchmark')
+                                        for address in verified_addresses[:addresses // 10]])
+    safe_creation_service = SafeCreationServiceProvider()
+    safe_creation_service.store_addresses(verified_addresses, list(range(addresses)))
+    safes = safe_creation_service.derive_addresses(verified_addresses, list(range(addresses)))
+
+    signatures = []
+    for i in range(10):
+        account = Account.create()
+        message = 'Benchmark message %d' % i
+        signature = account.signHash(SignatureVerificationService.hash_message(message)).signature
+        signatures.append({'message': message, 'signature': signature.hex(), 'address': account.address})
+
+    return [
+        Scenario('about', 'GET', '/api/v1/about/'),
+        Scenario('address-status', 'GET', '/api/v1/addresses/%s/' % verified_addresses[-1]),
+        Scenario('addresses-check-100', 'POST', '/api/v1/addresses/check/',
+                 {'addresses': verified_addresses[:100]}),
+        Scenario('signatures-verify-10', 'POST', '/api/v1/signatures/verify/', {'signatures': signatures}),
+        Scenario('safes-owners-100', 'POST', '/api/v1/safes/owners/', {'safes': safes[:100]}),
+    ]
+
+
+def request_wsgi(application: Callable, method: str, path: str, body: bytes = b'') -> Tuple[int, int]:
+    """
+    Send a request to a WSGI application in the same process
+    :return: Status code and bytes of the response
+    """
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'SERVER_NAME': 'testserver',
+        'HTTP_HOST': 'testserver',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    setup_testing_defaults(environ)
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split(' ', 1)[0]))
+
+    response = application(environ, start_response)
+    try:
+        size = sum(len(chunk) for chunk in response)
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status[0], size
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+def run_scenario(application: Callable, scenario: Scenario, concurrency: int, requests: int) -> Dict[str, Any]:
+    """
+    Send `requests` requests of the scenario using `concurrency` threads
+    :return: Throughput and latency percentiles of the scenario
+    """
+    body = json.dumps(scenario.body).encode() if scenario.body else b''
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(worker_requests: int):
+        worker_latencies = []
+        worker_errors = 0
+        try:
+            for _ in range(worker_requests):
+                start = time.perf_counter()
+                status_code, _ = request_wsgi(application, scenario.method, scenario.path, body)
+                worker_latencies.append(time.perf_counter() - start)
+                if status_code >= 400:
+                    worker_errors += 1
+        finally:
+            connections.close_all()  # Connections are per thread
+        with lock:
+            latencies.extend(worker_latencies)
+            errors.append(worker_errors)
+
+    request_wsgi(application, scenario.method, scenario.path, body)  # Warm up caches and connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker, requests // concurrency + (1 if i < requests % concurrency else 0))
+                   for i in range(concurrency)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'name': scenario.name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
@@ -0,0 +1,59 @@
+import io
+import os
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from eth_account import Account
+from eth_utils import to_checksum_address
+
+from ..blocklist import BlocklistIndex
+from ..camel_case import CamelCaseJSONParser, CamelCaseJSONRenderer
+from ..signatures import SignatureVerificationService, recover_address
+from ..utils import checksum_encode_many, chunks
+
+Microbenchmark = Tuple[str, Callable[[], Any]]
+
+
+def get_microbenchmarks() -> List[Microbenchmark]:
+    """
+    :return: Name and function of every microbenchmark. Input data is random but has always the same size
+    """
+    addresses = ['0x' + os.urandom(20).hex() for _ in range(1000)]
+    raw_addresses = [bytes.fromhex(address[2:]) for address in addresses]
+    addresses_check_response = {'results': [{'address': address, 'blocked': False} for address in addresses]}
+    addresses_check_request = CamelCaseJSONRenderer().render({'addresses': addresses})
+
+    account = Account.create()
+    message_hash = SignatureVerificationService.hash_message('Benchmark message')
+    signature = bytes(account.signHash(message_hash).signature)
+
+    items = list(range(10000))
+
+    return [
+        ('renderers.camel_case_render_1000_results', lambda: CamelCaseJSONRenderer().render(addresses_check_response)),
+        ('renderers.camel_case_parse_1000_addresses',
+         lambda: CamelCaseJSONParser().parse(io.BytesIO(addresses_check_request))),
+        ('signatures.hash_message', lambda: SignatureVerificationService.hash_message('Benchmark message')),
+        ('signatures.recover_address', lambda: recover_address((message_hash, signature))),
+        ('addresses.to_checksum_address_1000', lambda: [to_checksum_address(address) for address in addresses]),
+        ('addresses.checksum_encode_many_1000', lambda: checksum_encode_many(raw_addresses)),
+        ('addresses.pack_address_1000', lambda: [BlocklistIndex.pack_address(address) for address in addresses]),
+        ('utils.chunks_10000_by_500', lambda: list(chunks(items, 500))),
+    ]
+
+
+def run_microbenchmark(name: str, function: Callable[[], Any], repeat: int = 5) -> Dict[str, Any]:
+    """
+    Calls are repeated until they take at least 0.2 seconds, and that is measured `repeat` times
+    :return: Result of the microbenchmark. Best time is the most stable one to compare between runs
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'name': name,
+        'calls': number * repeat,
+        'best_us': min(times) * 1e6,
+        'mean_us': sum(times) / len(times) * 1e6,
+        'calls_per_second': 1 / min(times),
+    }
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from django.core.management.base import CommandError
+
+from eth_utils import to_checksum_address
+
+from ..models import ComplianceStatus
+from .load import Scenario, percentile
+
+# Gunicorn application and worker class of every deployment mode
+MODES = {
+    'wsgi': ('config.wsgi:application', 'gevent'),
+    'asgi': ('config.asgi:application', 'uvicorn.workers.UvicornWorker'),
+}
+
+
+def get_scenarios(addresses: int = 100) -> List[Scenario]:
+    """
+    Screening scenarios using addresses of the database, nothing is written. Random addresses are used if there are
+    not enough
+    """
+    known_addresses = list(ComplianceStatus.objects.values_list('address', flat=True)[:addresses])
+    known_addresses += [to_checksum_address(os.urandom(20)) for _ in range(addresses - len(known_addresses))]
+    return [
+        Scenario('address-status', 'GET', '/api/v1/addresses/%s/' % known_addresses[0]),
+        Scenario('addresses-check-%d' % addresses, 'POST', '/api/v1/addresses/check/',
+                 {'addresses': known_addresses}),
+    ]
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def run_server(mode: str, workers: int, timeout: int = 60):
+    """
+    Run Gunicorn with the application and worker class of `mode` and the settings of this process
+    :return: Port of the server
+    """
+    application, worker_class = MODES[mode]
+    port = get_free_port()
+    # Gunicorn 19 can't be run with `python -m gunicorn`
+    process = subprocess.Popen([sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()', application,
+                                '--worker-class', worker_class, '--workers', str(workers),
+                                '--bind', '127.0.0.1:%d' % port, '--log-level', 'warning',
+                                '--pythonpath', os.getcwd()],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise CommandError('%s server exited: %s' % (mode, process.stderr.read().decode()[-2000:]))
+            try:
+                with urllib.request.urlopen('http://127.0.0.1:%d/check/' % port, timeout=1):
+                    break
+            except urllib.error.HTTPError:  # Server is answering, e.g. `400` if host is not allowed
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError('%s server did not start in %d seconds' % (mode, timeout))
+                time.sleep(.2)
+        yield port
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    :return: Status code of the response, body is read and discarded
+    """
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    headers = dict((name.strip().lower(), value.strip()) for name, _, value in
+                   (line.partition(':') for line in head[1:] if line))
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    return int(head[0].split(' ', 2)[1])
+
+
+async def send_requests(port: int, request: bytes, requests: int, latencies: List[float]) -> int:
+    """
+    Send `requests` requests one after another on a keep alive connection
+    :return: Number of responses with an error status
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    errors = 0
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            writer.write(request)
+            status_code = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            errors += status_code >= 400
+    finally:
+        writer.close()
+    return errors
+
+
+def run_http_scenario(port: int, scenario: Scenario, connections: int, requests: int, host: str) -> Dict[str, Any]:
+    """
+    Send `requests` requests of the scenario to a server over `connections` concurrent connections
+    :return: Throughput and latency percentiles of the scenario
+    """
+    body = json.dumps(scenario.body).encode() if scenario.body else b''
+    request = ('%s %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n' %
+               (scenario.method, scenario.path, host, len(body))).encode() + body
+    latencies = []
+
+    async def run() -> List[int]:
+        return await asyncio.gather(*[send_requests(port, request,
+                                                    requests // connections + (1 if i < requests % connections else 0),
+                                                    latencies)
+                                      for i in range(connections)])
+
+    asyncio.run(send_requests(port, request, 1, []))  # Warm up caches and connections of the server
+    start = time.perf_counter()
+    errors = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'name': scenario.name,
+        'connections': connections,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
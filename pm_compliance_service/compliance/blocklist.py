@@ -0,0 +1,116 @@
+import threading
+import time
+from logging import getLogger
+from typing import List, Sequence
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+import numpy as np
+
+from .models import BlockedAddress
+
+logger = getLogger(__name__)
+
+
+class BlocklistIndexProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = BlocklistIndex(settings.BLOCKLIST_INDEX_TTL)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class BlocklistIndex:
+    """
+    Per process index of blocked addresses. Addresses are packed as 20 bytes and kept sorted in a numpy array, so
+    a batch of addresses is answered with one vectorized binary search instead of one query per address.
+    Database is only queried every `ttl` seconds to check if the blocklist changed
+    """
+    ADDRESS_DTYPE = 'S20'
+
+    def __init__(self, ttl: int):
+        """
+        :param ttl: Seconds between checks for blocklist changes
+        """
+        self.ttl = ttl
+        self._addresses = np.empty(0, dtype=self.ADDRESS_DTYPE)
+        self._fingerprint = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._addresses)
+
+    @staticmethod
+    def pack_address(address: str) -> bytes:
+        """
+        :param address: Ethereum address, checksumed or not
+        :return: 20 bytes of the address
+        """
+        return bytes.fromhex(address[2:])
+
+    def is_expired(self) -> bool:
+        return self._checked_at is None or (time.monotonic() - self._checked_at) >= self.ttl
+
+    def _get_fingerprint(self):
+        """
+        :return: Cheap summary of the blocklist table, it changes when addresses are inserted, updated or deleted
+        """
+        result = BlockedAddress.objects.aggregate(count=Count('id'), last_modified=Max('modified'))
+        return result['count'], result['last_modified']
+
+    def _load(self) -> np.ndarray:
+        """
+        :return: Sorted and deduplicated array of packed addresses
+        """
+        addresses = BlockedAddress.objects.values_list('address', flat=True).iterator()
+        return np.unique(np.array([self.pack_address(address) for address in addresses],
+                                  dtype=self.ADDRESS_DTYPE))
+
+    def refresh(self, force: bool = False):
+        """
+        Reload the index if the blocklist changed since the last load. Checks are done at most every `ttl` seconds
+        :param force: Reload the index even if `ttl` did not expire and blocklist did not change
+        """
+        if not force and not self.is_expired():
+            return
+
+        with self._lock:
+            if not force and not self.is_expired():  # Index was refreshed while waiting for the lock
+                return
+            fingerprint = self._get_fingerprint()
+            if force or fingerprint != self._fingerprint:
+                start = time.monotonic()
+                self._addresses = self._load()
+                self._fingerprint = fingerprint
+                logger.info('Loaded %d blocked addresses in %.3f seconds',
+                            len(self._addresses), time.monotonic() - start)
+            self._checked_at = time.monotonic()
+
+    def expire(self):
+        """
+        Check for blocklist changes on the next lookup, even if `ttl` did not expire
+        """
+        self._checked_at = None
+
+    def contains(self, address: str) -> bool:
+        return self.contains_many([address])[0]
+
+    def contains_many(self, addresses: Sequence[str]) -> List[bool]:
+        """
+        :param addresses: Ethereum addresses, checksumed or not
+        :return: List with `True` for every address blocked and `False` otherwise, in the same order as `addresses`
+        """
+        self.refresh()
+        index = self._addresses  # Keep a reference, index can be replaced by other thread
+        if not addresses or not len(index):
+            return [False] * len(addresses)
+
+        queries = np.array([self.pack_address(address) for address in addresses], dtype=self.ADDRESS_DTYPE)
+        positions = np.minimum(np.searchsorted(index, queries), len(index) - 1)
+        return (index[positions] == queries).tolist()
@@ -0,0 +1,140 @@
+"""
+Drop-in replacements of `djangorestframework_camel_case` `CamelCaseJSONRenderer` and `CamelCaseJSONParser`.
+Payloads are walked only once, conversion of every key is calculated once per process and `orjson` is used to
+encode and decode JSON if installed. Output is the same as the original classes
+"""
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Any
+
+from django.conf import settings
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+
+from djangorestframework_camel_case.settings import \
+    api_settings as camel_case_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+KEYS_CACHE_SIZE = 4096  # Keys of requests are provided by users, so the cache must be bounded
+
+CAMELIZE_REGEX = re.compile(r'[a-z0-9]?_[a-z0-9]')
+UNDERSCOREIZE_REGEX = re.compile(r'([a-z]|[0-9]+[a-z]?|[A-Z]?)([A-Z])'
+                                 if camel_case_settings.JSON_UNDERSCOREIZE.get('no_underscore_before_number')
+                                 else r'([a-z]|[0-9]+[a-z]?|[A-Z]?)([A-Z0-9])')
+
+SCALAR_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def _underscore_to_camel(match) -> str:
+    group = match.group()
+    return group[0] + group[2].upper() if len(group) == 3 else group[1].upper()
+
+
+@lru_cache(maxsize=KEYS_CACHE_SIZE)
+def camelize_key(key: str) -> str:
+    return CAMELIZE_REGEX.sub(_underscore_to_camel, key) if '_' in key else key
+
+
+@lru_cache(maxsize=KEYS_CACHE_SIZE)
+def underscoreize_key(key: str) -> str:
+    return UNDERSCOREIZE_REGEX.sub(r'\1_\2', key).lower()
+
+
+def camelize(data: Any) -> Any:
+    """
+    :return: Copy of `data` with the `snake_case` keys of every dictionary converted to `camelCase`
+    """
+    if isinstance(data, SCALAR_TYPES):
+        return data
+    if isinstance(data, dict):
+        new_dict = {}
+        for key, value in data.items():
+            if isinstance(key, Promise):
+                key = force_text(key)
+            new_dict[camelize_key(key) if isinstance(key, str) else key] = camelize(value)
+        return new_dict
+    if isinstance(data, (list, tuple)):
+        return [camelize(item) for item in data]
+    if isinstance(data, Promise):
+        return force_text(data)
+    try:
+        return [camelize(item) for item in data]
+    except TypeError:  # Not iterable
+        return data
+
+
+def underscoreize(data: Any) -> Any:
+    """
+    :return: Copy of `data` with the `camelCase` keys of every dictionary converted to `snake_case`
+    """
+    if isinstance(data, dict):
+        return {underscoreize_key(key) if isinstance(key, str) else key: underscoreize(value)
+                for key, value in data.items()}
+    if isinstance(data, list):
+        return [underscoreize(item) for item in data]
+    return data
+
+
+def has_non_finite_floats(data: Any) -> bool:
+    """
+    :return: If `data` (already camelized, so only dictionaries and lists) contains `NaN` or `Infinity`
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(has_non_finite_floats(value) for value in data.values())
+    if isinstance(data, list):
+        return any(has_non_finite_floats(item) for item in data)
+    return False
+
+
+class CamelCaseJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return bytes()
+
+        data = camelize(data)
+        # Indentation is only requested by the browsable API or explicitly by clients, `orjson` does not support
+        # custom indentation
+        if (orjson is None or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # `orjson` encodes datetimes with microseconds, DRF encoder is used to keep the same output
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # e.g. integers bigger than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # `orjson` encodes `NaN` and `Infinity` as `null`, DRF raises `ValueError` on strict mode (default)
+        if b'null' in ret and has_non_finite_floats(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as DRF so output is a strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class CamelCaseJSONParser(JSONParser):
+    renderer_class = CamelCaseJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read()
+            if orjson is not None and encoding.lower().replace('-', '') == 'utf8':
+                return underscoreize(orjson.loads(data))
+            return underscoreize(json.loads(data.decode(encoding)))
+        except ValueError as exc:  # `orjson.JSONDecodeError` and `UnicodeDecodeError` are `ValueError`
+            raise ParseError('JSON parse error - %s' % exc)
@@ -0,0 +1,90 @@
+import csv
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .models import BlockedAddress, ComplianceStatus, ComplianceStatusType
+
+
+class Export(NamedTuple):
+    get_queryset: Callable[[], QuerySet]
+    fields: List[str]
+    converters: Dict[str, Callable[[Any], Any]]  # Transform the database value of a field before exporting it
+
+
+# Records that can be exported, by name
+EXPORTS = {
+    'statuses': Export(lambda: ComplianceStatus.objects.order_by('id'),
+                       ['address', 'status', 'created', 'modified'],
+                       {'status': lambda status: ComplianceStatusType(status).name}),
+    'blocked-addresses': Export(lambda: BlockedAddress.objects.order_by('id'),
+                                ['address', 'source', 'created', 'modified'],
+                                {}),
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class Echo:
+    """
+    File like object that returns what is written, so `csv.writer` can be used with generators
+    """
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_rows(export: Export, chunk_size: int) -> Iterator[Sequence[Any]]:
+    """
+    Rows are fetched `chunk_size` at a time using a server side cursor on PostgreSQL, so memory used is constant
+    """
+    converters = [export.converters.get(field) for field in export.fields]
+    for row in export.get_queryset().values_list(*export.fields).iterator(chunk_size=chunk_size):
+        yield [converter(value) if converter else value for converter, value in zip(converters, row)]
+
+
+def iter_ndjson(export: Export, chunk_size: int) -> Iterator[str]:
+    """
+    :return: Lines of `chunk_size` JSON objects at a time, so the response is not written a row at a time
+    """
+    encoder = DjangoJSONEncoder()
+    lines = []
+    for row in iter_rows(export, chunk_size):
+        lines.append(encoder.encode(dict(zip(export.fields, row))) + '\n')
+        if len(lines) == chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_csv(export: Export, chunk_size: int) -> Iterator[str]:
+    """
+    :return: CSV with a header, `chunk_size` rows at a time
+    """
+    writer = csv.writer(Echo())
+    lines = [writer.writerow(export.fields)]
+    for row in iter_rows(export, chunk_size):
+        lines.append(writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value
+                                      for value in row]))
+        if len(lines) == chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_export(name: str, file_format: str, chunk_size: int) -> Iterator[str]:
+    """
+    :param name: One of `EXPORTS`
+    :param file_format: One of `FORMATS`
+    """
+    if name not in EXPORTS or file_format not in FORMATS:
+        raise ValueError('Unknown export %s.%s' % (name, file_format))
+    export = EXPORTS[name]
+    if file_format == 'csv':
+        return iter_csv(export, chunk_size)
+    return iter_ndjson(export, chunk_size)
@@ -0,0 +1,222 @@
+import ipaddress
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+from logging import getLogger
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+import numpy as np
+
+logger = getLogger(__name__)
+
+# Header: magic, number of IPv4 ranges, number of IPv6 ranges. Then for every version (IPv4 first) starts, ends and
+# countries of its ranges, every column as a contiguous array. Addresses are big endian, so byte order is numeric
+MAGIC = b'PMGEOIP1'
+HEADER = struct.Struct('<8sQQ')
+ADDRESS_SIZES = {4: 4, 6: 16}
+COUNTRY_SIZE = 2
+IPV4_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
+
+
+class GeoIPRange(NamedTuple):
+    start: bytes
+    end: bytes
+    country: bytes
+
+
+class GeoIPTable(NamedTuple):
+    starts: np.ndarray
+    ends: np.ndarray
+    countries: np.ndarray
+
+
+def pack_ip(ip: str) -> Tuple[int, bytes]:
+    """
+    :param ip: IPv4 or IPv6 address. IPv4 mapped IPv6 addresses are returned as IPv4
+    :return: IP version and big endian address
+    :raises: ValueError if `ip` is not valid
+    """
+    try:
+        return 4, socket.inet_pton(socket.AF_INET, ip)
+    except OSError:
+        pass
+    try:
+        packed = socket.inet_pton(socket.AF_INET6, ip)
+    except OSError:
+        raise ValueError('Invalid IP address %s' % ip)
+    if packed.startswith(IPV4_MAPPED_PREFIX):
+        return 4, packed[len(IPV4_MAPPED_PREFIX):]
+    return 6, packed
+
+
+def parse_range(row: List[str]) -> Tuple[int, GeoIPRange]:
+    """
+    :param row: `start ip, end ip, country` or `network, country`
+    :return: IP version and range
+    :raises: ValueError if row is not valid
+    """
+    if len(row) == 2:
+        network = ipaddress.ip_network(row[0].strip(), strict=False)
+        version, start = pack_ip(str(network.network_address))
+        _, end = pack_ip(str(network.broadcast_address))
+    elif len(row) >= 3:
+        version, start = pack_ip(row[0].strip())
+        end_version, end = pack_ip(row[1].strip())
+        if version != end_version or end < start:
+            raise ValueError('Invalid range %s - %s' % (row[0], row[1]))
+    else:
+        raise ValueError('Expected `start, end, country` or `network, country`')
+    country = row[-1].strip().upper().encode()
+    if len(country) != COUNTRY_SIZE:
+        raise ValueError('Invalid country code %s' % row[-1])
+    return version, GeoIPRange(start, end, country)
+
+
+def merge_ranges(ranges: Iterable[GeoIPRange]) -> List[GeoIPRange]:
+    """
+    :return: Ranges sorted, with adjacent ranges of the same country merged
+    :raises: ValueError if ranges overlap
+    """
+    merged = []
+    for geoip_range in sorted(ranges):
+        if merged and geoip_range.start <= merged[-1].end:
+            raise ValueError('Range %s overlaps with %s' % (ipaddress.ip_address(geoip_range.start),
+                                                            ipaddress.ip_address(merged[-1].start)))
+        if (merged and merged[-1].country == geoip_range.country
+                and int.from_bytes(merged[-1].end, 'big') + 1 == int.from_bytes(geoip_range.start, 'big')):
+            merged[-1] = merged[-1]._replace(end=geoip_range.end)
+        else:
+            merged.append(geoip_range)
+    return merged
+
+
+def write_database(path: str, ranges: Dict[int, List[GeoIPRange]]):
+    """
+    Write the database atomically, so processes using it never read a partial file
+    :param ranges: Sorted and non overlapping ranges by IP version
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as f:
+        f.write(HEADER.pack(MAGIC, len(ranges[4]), len(ranges[6])))
+        for version in (4, 6):
+            for field in GeoIPRange._fields:
+                f.write(b''.join(getattr(geoip_range, field) for geoip_range in ranges[version]))
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
+
+
+def get_client_ip(meta: Mapping[str, str], trusted_proxies: int) -> Optional[str]:
+    """
+    :param meta: WSGI environ of the request (`request.META`)
+    :param trusted_proxies: Proxies in front of nginx appending to `X-Forwarded-For`
+    :return: IP of the client. Nginx appends the address connecting to it to `X-Forwarded-For`, previous entries
+    can be set by the client unless they were added by a trusted proxy
+    """
+    forwarded_for = meta.get('HTTP_X_FORWARDED_FOR')
+    if forwarded_for:
+        addresses = forwarded_for.split(',')
+        return addresses[max(0, len(addresses) - 1 - trusted_proxies)].strip()
+    return meta.get('HTTP_X_REAL_IP') or meta.get('REMOTE_ADDR')
+
+
+class GeoIPDatabaseProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = GeoIPDatabase(settings.GEOIP_DATABASE_PATH, settings.GEOIP_RELOAD_INTERVAL)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class GeoIPDatabase:
+    """
+    Country of IP addresses, looked up with a binary search over the sorted ranges of a file built by
+    `build_geoip_database`. File is memory mapped read only, so every process shares the same pages. File is
+    checked for changes every `reload_interval` seconds and loaded again if it was replaced
+    """
+    def __init__(self, path: str, reload_interval: int):
+        """
+        :param path: Database file
+        :param reload_interval: Seconds between checks for changes of the file
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._tables = {}  # type: Dict[int, GeoIPTable]
+        self._file_id = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(table.starts) for table in self._tables.values())
+
+    def _is_expired(self) -> bool:
+        return self._checked_at is None or (time.monotonic() - self._checked_at) >= self.reload_interval
+
+    def _load(self) -> Dict[int, GeoIPTable]:
+        with open(self.path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)  # Mapping is kept after closing the file
+        magic, *counts = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError('%s is not a GeoIP database' % self.path)
+
+        tables = {}
+        offset = HEADER.size
+        for version, count in zip((4, 6), counts):
+            columns = []
+            for dtype in ('S%d' % ADDRESS_SIZES[version], 'S%d' % ADDRESS_SIZES[version], 'S%d' % COUNTRY_SIZE):
+                columns.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+                offset += columns[-1].nbytes
+            tables[version] = GeoIPTable(*columns)
+        return tables
+
+    def refresh(self):
+        """
+        Load the database again if the file changed. Checks are done at most every `reload_interval` seconds. If
+        the file cannot be loaded, previous version is kept
+        """
+        if not self._is_expired():
+            return
+
+        with self._lock:
+            if not self._is_expired():  # Database was refreshed while waiting for the lock
+                return
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if file_id != self._file_id:
+                    self._tables = self._load()
+                    self._file_id = file_id
+                    logger.info('Loaded %d GeoIP ranges from %s', len(self), self.path)
+            except (OSError, ValueError, struct.error):
+                logger.error('Cannot load GeoIP database %s', self.path, exc_info=True)
+
+    def get_country(self, ip: str) -> Optional[str]:
+        """
+        :param ip: IPv4 or IPv6 address
+        :return: ISO 3166-1 alpha-2 code of the country, `None` if unknown or `ip` is not valid
+        """
+        self.refresh()
+        try:
+            version, packed = pack_ip(ip)
+        except ValueError:
+            return None
+        table = self._tables.get(version)  # Keep a reference, tables can be replaced by other thread
+        if table is None:
+            return None
+
+        position = int(table.starts.searchsorted(packed, side='right')) - 1
+        # Fixed size bytes lose their trailing zeros when read from the array
+        if position < 0 or packed > table.ends[position].ljust(len(packed), b'\0'):
+            return None
+        return table.countries[position].decode()
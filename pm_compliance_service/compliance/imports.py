@@ -0,0 +1,180 @@
+import csv
+import itertools
+import re
+import time
+from logging import getLogger
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+
+from redis.exceptions import RedisError
+
+from .exports import Echo
+from .models import ComplianceStatus, ComplianceStatusType
+from .status_cache import ComplianceStatusCacheProvider
+from .utils import checksum_encode_many
+
+logger = getLogger(__name__)
+
+ADDRESS_REGEX = re.compile(r'^0x[0-9a-fA-F]{40}$')
+STAGING_TABLE = 'compliance_status_import'
+
+
+class ImportResult(NamedTuple):
+    rows: int  # Valid rows
+    invalid_rows: int
+    changed: int  # Statuses inserted or updated
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.
+
+
+class CopyBuffer:
+    """
+    File like object that reads from an iterator of strings, so rows can be streamed to `COPY FROM STDIN`
+    without keeping the whole file in memory
+    """
+    def __init__(self, iterator: Iterator[str]):
+        self.iterator = iterator
+        self.buffer = ''
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.iterator)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self.buffer = self.buffer, ''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class StatusesImporter:
+    """
+    Bulk import of compliance statuses from rows of `address[,email]`. Rows are validated and addresses
+    checksummed in a streaming pass, copied to a temporary staging table with `COPY FROM STDIN` and merged into
+    `ComplianceStatus` with one `INSERT ... ON CONFLICT`. Everything is done in a transaction, so an aborted import
+    does not modify anything
+    """
+    def __init__(self, status: ComplianceStatusType = ComplianceStatusType.VERIFIED, batch_size: int = 1000):
+        """
+        :param status: Status set for every imported address. Addresses rejected are only modified if status is
+        `REJECTED`
+        :param batch_size: Rows checksummed and sent to the database at once
+        """
+        self.status = status
+        self.batch_size = batch_size
+        self.invalid_rows = 0
+        self.rows = 0
+
+    def _iter_valid_rows(self, rows: Iterable[List[str]]) -> Iterator[Tuple[str, str]]:
+        """
+        :return: Address and email (empty if not provided) of rows with a valid format. Header is skipped
+        """
+        for line_number, row in enumerate(rows, start=1):
+            if not row or (line_number == 1 and row[0].strip().lower() == 'address'):
+                continue
+            address = row[0].strip()
+            email = row[1].strip() if len(row) > 1 else ''
+            try:
+                if not ADDRESS_REGEX.match(address):
+                    raise ValidationError('Invalid address')
+                if email:
+                    validate_email(email)
+            except ValidationError:
+                self.invalid_rows += 1
+                logger.debug('Invalid row %d: %s', line_number, row)
+                continue
+            yield address, email
+
+    def iter_copy_rows(self, rows: Iterable[List[str]]) -> Iterator[str]:
+        """
+        Addresses are checksummed `batch_size` rows at a time. Mixed case addresses with a wrong checksum are
+        considered invalid, as they are probably mistyped
+        :return: Valid rows as CSV lines for `COPY`
+        """
+        writer = csv.writer(Echo())
+        valid_rows = self._iter_valid_rows(rows)
+        while True:
+            batch = list(itertools.islice(valid_rows, self.batch_size))
+            if not batch:
+                return
+            lines = []
+            checksummed_addresses = checksum_encode_many([bytes.fromhex(address[2:]) for address, _ in batch])
+            for (address, email), checksummed_address in zip(batch, checksummed_addresses):
+                hex_digits = address[2:]
+                if hex_digits.islower() or hex_digits.isupper() or address == checksummed_address:
+                    lines.append(writer.writerow([checksummed_address, email]))  # Empty email is copied as NULL
+                else:
+                    self.invalid_rows += 1
+            self.rows += len(lines)
+            yield ''.join(lines)
+
+    def _merge(self, cursor) -> List[Tuple[str, Optional[str], bool]]:
+        """
+        :return: Address, email and whether status changed (or was inserted) for the statuses inserted or updated
+        """
+        table = ComplianceStatus._meta.db_table
+        rejected = ComplianceStatusType.REJECTED.value
+        # Every statement of the query sees the table as it was before the insert, so `previous` keeps old statuses
+        cursor.execute("""
+            WITH previous AS (
+                SELECT address, status FROM {table} WHERE address IN (SELECT address FROM {staging_table})
+            ), merged AS (
+                INSERT INTO {table} (created, modified, address, status, email)
+                SELECT DISTINCT ON (address) now(), now(), address, %(status)s, email
+                FROM {staging_table} ORDER BY address
+                ON CONFLICT (address) DO UPDATE
+                SET status = EXCLUDED.status, email = COALESCE(EXCLUDED.email, {table}.email), modified = now()
+                WHERE ({table}.status, {table}.email) IS DISTINCT FROM (EXCLUDED.status,
+                                                                         COALESCE(EXCLUDED.email, {table}.email))
+                AND ({table}.status <> %(rejected)s OR EXCLUDED.status = %(rejected)s)
+                RETURNING address, email, status
+            )
+            SELECT merged.address, merged.email, previous.status IS DISTINCT FROM merged.status
+            FROM merged LEFT JOIN previous ON previous.address = merged.address
+        """.format(table=table, staging_table=STAGING_TABLE), {'status': self.status.value, 'rejected': rejected})
+        return cursor.fetchall()
+
+    def _on_commit(self, changed: List[Tuple[str, Optional[str], bool]]):
+        """
+        Invalidate the cached statuses and notify status changes, as saving every status would do
+        """
+        from .services.notification_service import NotificationServiceProvider  # Services import models
+
+        # Statuses are already stored, Redis errors must not fail the import
+        try:
+            ComplianceStatusCacheProvider().invalidate_many([address for address, _, _ in changed])
+        except RedisError:
+            logger.error('Cannot invalidate cached statuses of %d imported statuses', len(changed), exc_info=True)
+        status_changes = [(address, self.status, email) for address, email, status_changed in changed
+                          if status_changed]
+        try:
+            NotificationServiceProvider().notify_status_changes(status_changes)
+        except RedisError:
+            logger.error('Cannot queue status change notifications for %d imported statuses', len(status_changes),
+                         exc_info=True)
+
+    def run(self, rows: Iterable[List[str]]) -> ImportResult:
+        """
+        :param rows: Parsed CSV rows of `address[,email]`, e.g. a `csv.reader`. A header is optional
+        """
+        start = time.monotonic()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE %s (address varchar(42) NOT NULL, email varchar(254)) '
+                           'ON COMMIT DROP' % STAGING_TABLE)
+            cursor.copy_expert('COPY %s (address, email) FROM STDIN WITH (FORMAT csv)' % STAGING_TABLE,
+                               CopyBuffer(self.iter_copy_rows(rows)))
+            changed = self._merge(cursor)
+            transaction.on_commit(lambda: self._on_commit(changed))
+
+        result = ImportResult(self.rows, self.invalid_rows, len(changed), time.monotonic() - start)
+        logger.info('Imported %d rows (%d invalid), %d statuses changed, %.0f rows/s',
+                    result.rows, result.invalid_rows, result.changed, result.rows_per_second)
+        return result
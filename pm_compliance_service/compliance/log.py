@@ -0,0 +1,181 @@
+import logging
+import os
+import queue
+import random
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Sequence
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+import orjson
+
+# `MetricsMiddleware` stores the url name of the request on the WSGI environ, Gunicorn exposes it on access records
+ROUTE_ENVIRON_KEY = 'compliance.route'
+ROUTE_ATOM = '{%s}e' % ROUTE_ENVIRON_KEY
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Puts records on a queue and writes them with `handlers` from a thread, so formatting and I/O don't happen on the
+    request path. Records of level `ERROR` and above wait up to `error_timeout` seconds until every queued record
+    is written, so they are not lost if the process dies afterwards. Other threads logging meanwhile wait too, as
+    records are emitted holding the lock of the handler. Targets are referenced as `cfg://handlers.<name>` on
+    `LOGGING` and must be configured before this handler (handlers are configured in alphabetical order)
+    """
+    def __init__(self, handlers: Sequence[logging.Handler], error_timeout: float = 2.):
+        """
+        :param handlers: Handlers writing the records
+        :param error_timeout: Max seconds a record of level `ERROR` or above waits for the queued records
+        """
+        super().__init__(queue.Queue())
+        self.target_handlers = [handlers[i] for i in range(len(handlers))]  # Index access resolves `cfg://`
+        self.error_timeout = error_timeout
+        self.listener = None  # type: Optional[QueueListener]
+        self.pid = None  # type: Optional[int]
+
+    def start(self):
+        """
+        Threads don't survive a fork, so every process (Gunicorn and Celery workers) starts its own listener. Lock
+        of the handler is reinitialized by `logging` after a fork
+        """
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.Queue()
+            self.listener = QueueListener(self.queue, *self.target_handlers, respect_handler_level=True)
+            self.listener.start()
+            self.pid = os.getpid()
+
+    def wait_written(self, timeout: float) -> bool:
+        """
+        :return: `True` if every queued record was written before `timeout` seconds
+        """
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record  # Queue is not shared between processes, so the record is formatted by the listener
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.pid != os.getpid():
+                self.start()
+            self.enqueue(self.prepare(record))
+            if record.levelno >= logging.ERROR:
+                self.wait_written(self.error_timeout)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        if self.pid == os.getpid():
+            self.queue.join()
+
+    def close(self):
+        """
+        Called by `logging.shutdown` on exit, queued records are written before the listener stops
+        """
+        if self.pid == os.getpid():
+            self.listener.stop()
+            self.pid = None
+        super().close()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record. Fields of Gunicorn access records are written under `http` instead of formatting
+    the access log line
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'process_name': record.processName,
+            'thread_name': record.threadName,
+        }  # type: Dict[str, Any]
+        if record.name == 'gunicorn.access' and isinstance(record.args, Mapping):
+            data['message'] = record.args['r']
+            data['http'] = self.get_access_fields(record.args)
+        else:
+            data['message'] = record.getMessage()
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return orjson.dumps(data, default=str).decode()
+
+    @staticmethod
+    def get_access_fields(atoms: Mapping) -> Dict[str, Any]:
+        """
+        :param atoms: Gunicorn access log atoms
+        :return: Fields of the request and the response
+        """
+        return {
+            'method': atoms['m'],
+            'path': atoms['U'],
+            'query': atoms['q'],
+            'route': atoms[ROUTE_ATOM],
+            'status': int(atoms['s']),
+            'size': atoms['B'],
+            'duration_ms': atoms['D'] / 1000,
+            'remote_address': atoms['h'],
+            'user_agent': atoms['a'],
+            'referer': atoms['f'],
+        }
+
+
+class AccessLogSampler(logging.Filter):
+    """
+    Keeps `ACCESS_LOG_SAMPLE_RATES[url name]` (or `ACCESS_LOG_SAMPLE_RATE`) of the successful (2xx) access records
+    of Gunicorn (`gunicorn.access`), Uvicorn (`uvicorn.access`) and the development server (`django.server`).
+    Records with other status codes are always kept
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if isinstance(record.args, Mapping):  # Gunicorn access atoms
+            status = str(record.args['s'])
+            route = record.args[ROUTE_ATOM]
+        elif record.name == 'uvicorn.access':  # Client, method, path, HTTP version and status
+            status = str(record.args[4])
+            route = self.get_route(record.args[2])
+        else:
+            status = str(getattr(record, 'status_code', ''))
+            route = self.get_development_server_route(record)
+        if not status.startswith('2'):
+            return True
+        rate = settings.ACCESS_LOG_SAMPLE_RATES.get(route, settings.ACCESS_LOG_SAMPLE_RATE)
+        return rate >= 1. or random.random() < rate
+
+    @staticmethod
+    def get_route(path: str) -> Optional[str]:
+        """
+        :return: Url name of `path`, query string is ignored
+        """
+        try:
+            return resolve(path.split('?')[0]).view_name
+        except Resolver404:
+            return None
+
+    def get_development_server_route(self, record: logging.LogRecord) -> Optional[str]:
+        """
+        :return: Url name of the request line of a `django.server` record
+        """
+        try:
+            request_line = record.args[0]
+            return self.get_route(request_line.split(' ')[1])
+        except (IndexError, TypeError, AttributeError):
+            return None
@@ -0,0 +1,67 @@
+import io
+import os
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+
+from djangorestframework_camel_case.parser import \
+    CamelCaseJSONParser as LibraryCamelCaseJSONParser
+from djangorestframework_camel_case.render import \
+    CamelCaseJSONRenderer as LibraryCamelCaseJSONRenderer
+
+from ...camel_case import CamelCaseJSONParser, CamelCaseJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = ('Compare the camelCase JSON renderer and parser of the project with the ones of '
+            '`djangorestframework_camel_case` using payloads like the ones of the bulk endpoints')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000, help='Items of every payload')
+        parser.add_argument('--repetitions', type=int, default=100)
+
+    def time_function(self, function, repetitions: int) -> float:
+        """
+        :return: Mean milliseconds of a call
+        """
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            function()
+        return (time.perf_counter() - start) * 1000 / repetitions
+
+    def compare(self, name: str, library_function, function, repetitions: int):
+        if library_function() != function():
+            self.stdout.write(self.style.WARNING('%s - Output is different' % name))
+        library_elapsed = self.time_function(library_function, repetitions)
+        elapsed = self.time_function(function, repetitions)
+        self.stdout.write('%s - djangorestframework_camel_case: %.2f ms, project: %.2f ms - %.1fx faster' %
+                          (name, library_elapsed, elapsed, library_elapsed / elapsed))
+
+    def handle(self, *args, **options):
+        items, repetitions = options['items'], options['repetitions']
+        self.stdout.write('Using %s' % ('orjson' if orjson else 'json'))
+        addresses = ['0x' + os.urandom(20).hex() for _ in range(items)]
+        now = datetime.now(timezone.utc)
+        payloads = {
+            'addresses check response': {'results': [{'address': address, 'blocked': i % 7 == 0}
+                                                     for i, address in enumerate(addresses)]},
+            'safes owners response': {'results': [{'safe': address, 'owner': address, 'status': 'VERIFIED',
+                                                   'verified': True} for address in addresses]},
+            'statuses response': {'next': None, 'previous': None,
+                                  'results': [{'address': address, 'status': 'VERIFIED', 'created': now,
+                                               'modified': now, 'recovered_address': address}
+                                              for address in addresses]},
+        }
+        for name, payload in payloads.items():
+            self.compare('Render %s' % name,
+                         lambda: LibraryCamelCaseJSONRenderer().render(payload),
+                         lambda: CamelCaseJSONRenderer().render(payload),
+                         repetitions)
+
+        for name, payload in payloads.items():
+            body = CamelCaseJSONRenderer().render(payload)
+            self.compare('Parse %s' % name.replace('response', 'request'),
+                         lambda: LibraryCamelCaseJSONParser().parse(io.BytesIO(body)),
+                         lambda: CamelCaseJSONParser().parse(io.BytesIO(body)),
+                         repetitions)
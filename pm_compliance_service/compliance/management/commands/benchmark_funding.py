@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from eth_account import Account
+
+from ...services.funding_service import FundingServiceProvider
+
+
+class Command(BaseCommand):
+    help = ('Compare funding transactions per second sending one by one (nonce and gas price requested for every '
+            'transaction) and in batch. Use it against a local chain like ganache, as ether is sent')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=100, help='Transactions to send for every mode')
+        parser.add_argument('--value', type=int, default=1, help='Wei to send on every transaction')
+
+    def send_one_by_one(self, funding_service, transfers):
+        w3 = funding_service.w3
+        funder_account = funding_service.funder_account
+        for to, value in transfers:
+            tx = {
+                'to': to,
+                'value': value,
+                'gas': funding_service.ETHER_TRANSFER_GAS,
+                'gasPrice': w3.eth.gasPrice,
+                'nonce': w3.eth.getTransactionCount(funder_account.address, 'pending'),
+            }
+            if funding_service.chain_id:
+                tx['chainId'] = funding_service.chain_id
+            w3.eth.sendRawTransaction(funder_account.signTransaction(tx).rawTransaction)
+
+    def handle(self, *args, **options):
+        funding_service = FundingServiceProvider()
+        transactions = options['transactions']
+
+        transfers = [(Account.create().address, options['value']) for _ in range(transactions)]
+        start = time.perf_counter()
+        self.send_one_by_one(funding_service, transfers)
+        one_by_one_elapsed = time.perf_counter() - start
+        self.stdout.write('One by one: %d txs in %.2f seconds - %.2f txs/s' %
+                          (transactions, one_by_one_elapsed, transactions / one_by_one_elapsed))
+
+        # Nonce on Redis does not include the transactions sent one by one
+        funding_service.nonce_manager.reset()
+        transfers = [(Account.create().address, options['value']) for _ in range(transactions)]
+        start = time.perf_counter()
+        funding_service.send_eth_to_many(transfers)
+        batch_elapsed = time.perf_counter() - start
+        self.stdout.write('Batch: %d txs in %.2f seconds - %.2f txs/s' %
+                          (transactions, batch_elapsed, transactions / batch_elapsed))
+        self.stdout.write(self.style.SUCCESS('Batch is %.1fx faster' % (one_by_one_elapsed / batch_elapsed)))
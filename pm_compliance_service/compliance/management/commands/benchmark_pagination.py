@@ -0,0 +1,75 @@
+import time
+from typing import List, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+
+from ...models import ComplianceStatus
+from ...pagination import KeysetPagination
+
+
+class Command(BaseCommand):
+    help = ('Compare latency of the first and a deep page using limit/offset and keyset pagination. Synthetic '
+            'statuses are inserted in a transaction that is rolled back, use it against PostgreSQL')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=10000, help='Deep page to compare with the first one')
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--rows', type=int, help='Synthetic statuses to insert. By default, enough rows for '
+                                                     'the deep page')
+        parser.add_argument('--repetitions', type=int, default=20, help='Requests done for every page')
+
+    def time_page(self, paginator, params, repetitions: int) -> Tuple[float, List[int]]:
+        """
+        :return: Mean milliseconds to get a page and ids of the page
+        """
+        request = Request(RequestFactory().get('/api/v1/statuses/', params))
+        queryset = ComplianceStatus.objects.order_by('-created', '-id')
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            results = paginator.paginate_queryset(queryset, request)
+        return (time.perf_counter() - start) * 1000 / repetitions, [result.id for result in results]
+
+    def handle(self, *args, **options):
+        page, page_size, repetitions = options['page'], options['page_size'], options['repetitions']
+        rows = options['rows'] or (page + 1) * page_size
+        offset = (page - 1) * page_size
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            ComplianceStatus.objects.bulk_create([ComplianceStatus(address='0x%040x' % i) for i in range(rows)],
+                                                 batch_size=5000)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE %s' % ComplianceStatus._meta.db_table)
+            self.stdout.write('Inserted %d statuses in %.2f seconds' % (rows, time.perf_counter() - start))
+
+            limit_offset = LimitOffsetPagination()
+            keyset = KeysetPagination()
+            # Cursor of a deep page is built from the last item of the previous page, as a client would get it
+            deep_params = {'limit': page_size}
+            if offset:
+                last_item = ComplianceStatus.objects.order_by('-created', '-id')[offset - 1]
+                deep_params['cursor'] = keyset.encode_cursor([last_item.created, last_item.id], False)
+            timings = [
+                ('LimitOffset', 1) + self.time_page(limit_offset, {'limit': page_size}, repetitions),
+                ('LimitOffset', page) + self.time_page(limit_offset, {'limit': page_size, 'offset': offset},
+                                                       repetitions),
+                ('Keyset', 1) + self.time_page(keyset, {'limit': page_size}, repetitions),
+                ('Keyset', page) + self.time_page(keyset, deep_params, repetitions),
+            ]
+            transaction.set_rollback(True)
+
+        for name, page_number, milliseconds, ids in timings:
+            self.stdout.write('%s page %d: %.2f ms, %d results' % (name, page_number, milliseconds, len(ids)))
+        # Timings are only comparable if both paginations return the same items
+        for (_, page_number, _, limit_offset_ids), (_, _, _, keyset_ids) in zip(timings[:2], timings[2:]):
+            if limit_offset_ids != keyset_ids:
+                raise CommandError('Page %d of limit/offset and keyset pagination are different' % page_number)
+
+        self.stdout.write(self.style.SUCCESS('Deep page is %.1fx slower with limit/offset and %.1fx with keyset' %
+                                             (timings[1][2] / timings[0][2], timings[3][2] / timings[2][2])))
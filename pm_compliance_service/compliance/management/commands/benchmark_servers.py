@@ -0,0 +1,61 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...benchmarks.servers import (MODES, get_scenarios, run_http_scenario,
+                                   run_server)
+
+
+class Command(BaseCommand):
+    help = ('Compare the throughput of the screening endpoints with many concurrent connections on the WSGI '
+            '(gevent workers) and ASGI (uvicorn workers and async views) deployment modes. Servers use the '
+            'database and Redis of the current settings, so run it against services like the production ones. '
+            'Nothing is written to them')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write the results. If not provided, stdout is used')
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES),
+                            help='Deployment modes to compare')
+        parser.add_argument('--workers', type=int, default=1, help='Gunicorn workers of every server')
+        parser.add_argument('--connections', type=int, nargs='+', default=[1, 32, 256],
+                            help='Concurrent keep alive connections of every scenario')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests of every scenario')
+        parser.add_argument('--host', default='localhost', help='Host header, it must be on `ALLOWED_HOSTS`')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        scenarios = get_scenarios()
+        results = []
+        for mode in options['modes']:
+            with run_server(mode, options['workers']) as port:
+                for scenario in scenarios:
+                    for connections in options['connections']:
+                        result = run_http_scenario(port, scenario, connections, options['requests'],
+                                                   options['host'])
+                        result['mode'] = mode
+                        self.stderr.write('%s %s with %d connections: %.0f req/s, p50 %.2f ms, p99 %.2f ms, '
+                                          '%d errors' % (mode, scenario.name, connections,
+                                                         result['requests_per_second'], result['p50_ms'],
+                                                         result['p99_ms'], result['errors']))
+                        results.append(result)
+
+        if len(options['modes']) > 1:
+            baseline_mode = options['modes'][0]
+            baseline = {(result['name'], result['connections']): result for result in results
+                        if result['mode'] == baseline_mode}
+            for result in results:
+                if result['mode'] != baseline_mode:
+                    change = (result['requests_per_second']
+                              / baseline[(result['name'], result['connections'])]['requests_per_second'] - 1)
+                    self.stderr.write('%s %s with %d connections: %+.1f%% req/s compared to %s' %
+                                      (result['mode'], result['name'], result['connections'], change * 100,
+                                       baseline_mode))
+
+        output = json.dumps({'workers': options['workers'], 'results': results,
+                             'seconds': time.monotonic() - start}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
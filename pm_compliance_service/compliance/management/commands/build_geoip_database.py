@@ -0,0 +1,41 @@
+import csv
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...geoip import merge_ranges, parse_range, write_database
+
+
+class Command(BaseCommand):
+    help = ('Build the GeoIP database used to block jurisdictions from a CSV file with rows of '
+            '`start ip,end ip,country` (e.g. DB-IP country lite) or `network,country`. Running processes load the '
+            'new file without restarting')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV file with IPv4 and IPv6 ranges')
+        parser.add_argument('--output', default=settings.GEOIP_DATABASE_PATH, help='Database file to write')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        ranges = {4: [], 6: []}
+        invalid_rows = 0
+        with open(options['file'], newline='') as csv_file:
+            for row in csv.reader(csv_file):
+                if not row or row[0].startswith('#'):
+                    continue
+                try:
+                    version, geoip_range = parse_range(row)
+                except ValueError:
+                    invalid_rows += 1  # Headers are skipped too
+                    continue
+                ranges[version].append(geoip_range)
+
+        try:
+            ranges = {version: merge_ranges(version_ranges) for version, version_ranges in ranges.items()}
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        write_database(options['output'], ranges)
+        self.stdout.write(self.style.SUCCESS('Wrote %d IPv4 and %d IPv6 ranges (%d invalid rows) to %s in %.2f '
+                                             'seconds' % (len(ranges[4]), len(ranges[6]), invalid_rows,
+                                                          options['output'], time.monotonic() - start)))
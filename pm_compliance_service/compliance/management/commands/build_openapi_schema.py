@@ -0,0 +1,20 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...schema import build_schema_files
+
+
+class Command(BaseCommand):
+    help = 'Generate and validate the OpenAPI schema, and write it to disk so it is not generated on every request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=settings.OPENAPI_SCHEMA_DIR,
+                            help='Directory to write the schema files')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        paths = build_schema_files(options['output_dir'])
+        self.stdout.write(self.style.SUCCESS('Built %s in %.2f seconds' %
+                                             (', '.join(paths), time.monotonic() - start)))
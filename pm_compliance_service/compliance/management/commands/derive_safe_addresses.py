@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models import ComplianceStatus, ComplianceStatusType
+from ...services import SafeCreationServiceProvider
+
+
+class Command(BaseCommand):
+    help = 'Derive and store the Safe addresses of every owner and salt nonce'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owners', nargs='+', help='Owners of the Safes. If not provided, every verified user')
+        parser.add_argument('--salt-nonces', nargs='+', type=int, default=[0], help='Salt nonces used for every owner')
+
+    def handle(self, *args, **options):
+        owners = options['owners']
+        if not owners:
+            owners = list(ComplianceStatus.objects.filter(status=ComplianceStatusType.VERIFIED.value
+                                                          ).values_list('address', flat=True))
+        salt_nonces = options['salt_nonces']
+
+        start = time.monotonic()
+        count = SafeCreationServiceProvider().store_addresses(
+            [owner for owner in owners for _ in salt_nonces],
+            [salt_nonce for _ in owners for salt_nonce in salt_nonces]
+        )
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS('Derived %d Safe addresses in %.2f seconds (%.0f/s)' %
+                                             (count, elapsed, count / elapsed if elapsed else 0)))
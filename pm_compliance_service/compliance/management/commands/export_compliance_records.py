@@ -0,0 +1,32 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...exports import EXPORTS, FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Export every compliance record as NDJSON or CSV using constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS), help='Records to export')
+        parser.add_argument('--format', dest='file_format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File to write the export. If not provided, stdout is used')
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE,
+                            help='Rows fetched from the database on every round trip')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in iter_export(options['name'], options['file_format'], options['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS('Exported %s to %s in %.2f seconds' %
+                                                 (options['name'], options['output'], time.monotonic() - start)))
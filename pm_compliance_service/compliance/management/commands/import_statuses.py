@@ -0,0 +1,28 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand
+
+from ...imports import StatusesImporter
+from ...models import ComplianceStatusType
+
+
+class Command(BaseCommand):
+    help = 'Bulk import of statuses from a CSV file with rows of `address[,email]`'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV file, `-` to read from stdin')
+        parser.add_argument('--status', choices=[tag.name for tag in ComplianceStatusType],
+                            default=ComplianceStatusType.VERIFIED.name, help='Status set for every address')
+
+    def handle(self, *args, **options):
+        importer = StatusesImporter(ComplianceStatusType[options['status']])
+        if options['file'] == '-':
+            result = importer.run(csv.reader(sys.stdin))
+        else:
+            with open(options['file'], newline='') as csv_file:
+                result = importer.run(csv.reader(csv_file))
+
+        self.stdout.write(self.style.SUCCESS('Imported %d rows (%d invalid), %d statuses changed in %.2f seconds '
+                                             '(%.0f rows/s)' % (result.rows, result.invalid_rows, result.changed,
+                                                                result.seconds, result.rows_per_second)))
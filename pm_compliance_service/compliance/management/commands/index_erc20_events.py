@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ...services.erc20_events_service import Erc20EventsServiceProvider
+
+
+class Command(BaseCommand):
+    help = 'Index ERC20 Transfer events from the last checkpoint of every token'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--add-tokens', nargs='+', default=[], help='Tokens to start indexing')
+        parser.add_argument('--from-block', type=int, default=0, help='First block to index for the added tokens')
+        parser.add_argument('--tokens', nargs='+', help='Only index these tokens')
+
+    def handle(self, *args, **options):
+        erc20_events_service = Erc20EventsServiceProvider()
+        if options['add_tokens']:
+            added = erc20_events_service.add_tokens(options['add_tokens'], from_block=options['from_block'])
+            self.stdout.write(self.style.SUCCESS('Added %d tokens' % added))
+
+        transfers_count = erc20_events_service.index(token_addresses=options['tokens'])
+        self.stdout.write(self.style.SUCCESS('Indexed %d transfers' % transfers_count))
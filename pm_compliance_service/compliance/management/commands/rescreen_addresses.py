@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services import RescreeningServiceProvider
+from ...tasks import rescreen_addresses_task
+
+
+class Command(BaseCommand):
+    help = 'Screen every known address against the blocklists again, using celery workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job-id', help='Restart this job from the last completed chunk')
+        parser.add_argument('--priority', type=int, help='Priority of the job on the rescreening queue (0 highest)')
+        parser.add_argument('--status', metavar='JOB_ID', help='Show the progress of a job instead of starting one')
+
+    def handle(self, *args, **options):
+        rescreening_service = RescreeningServiceProvider()
+        if options['status']:
+            progress = rescreening_service.get_progress(options['status'])
+            if progress is None:
+                raise CommandError('Job %s does not exist or expired' % options['status'])
+            self.stdout.write(json.dumps(progress, indent=2))
+            return
+
+        job_id = options['job_id'] or rescreening_service.create_job()
+        rescreen_addresses_task.delay(job_id=job_id, priority=options['priority'])
+        self.stdout.write(self.style.SUCCESS('Started rescreening job %s' % job_id))
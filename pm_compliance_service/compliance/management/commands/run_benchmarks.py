@@ -0,0 +1,102 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.core.management.base import BaseCommand
+
+from ...benchmarks.environment import stand_ins
+from ...benchmarks.load import create_fixtures, run_scenario
+from ...benchmarks.micro import get_microbenchmarks, run_microbenchmark
+
+
+class Command(BaseCommand):
+    help = ('Run microbenchmarks of hot functions and a load test of the WSGI application in this process, without '
+            'external services. Use it with `DJANGO_SETTINGS_MODULE=config.settings.benchmark`. Results are written '
+            'as JSON, so they can be compared with the ones of another commit using `--compare`')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write the results. If not provided, stdout is used')
+        parser.add_argument('--compare', help='Results of a previous run to compare with')
+        parser.add_argument('--filter', default='', help='Only run benchmarks with this text in their name')
+        parser.add_argument('--skip-micro', action='store_true', help='Do not run microbenchmarks')
+        parser.add_argument('--skip-load', action='store_true', help='Do not run the load test')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32],
+                            help='Concurrent requests of every load scenario')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests of every load scenario')
+
+    @staticmethod
+    def get_commit() -> str:
+        try:
+            return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                           stderr=subprocess.DEVNULL).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    def run_micro(self, name_filter: str):
+        results = []
+        for name, function in get_microbenchmarks():
+            if name_filter in name:
+                result = run_microbenchmark(name, function)
+                self.stderr.write('%s: %.2f us' % (name, result['best_us']))
+                results.append(result)
+        return results
+
+    def run_load(self, name_filter: str, concurrency_levels, requests: int):
+        from config.wsgi import application
+
+        results = []
+        with stand_ins():
+            for scenario in create_fixtures():
+                if name_filter not in scenario.name:
+                    continue
+                for concurrency in concurrency_levels:
+                    result = run_scenario(application, scenario, concurrency, requests)
+                    self.stderr.write('%s with concurrency %d: %.0f req/s, p50 %.2f ms, p99 %.2f ms, %d errors' %
+                                      (scenario.name, concurrency, result['requests_per_second'],
+                                       result['p50_ms'], result['p99_ms'], result['errors']))
+                    results.append(result)
+        return results
+
+    def compare(self, results, baseline):
+        """
+        Print the change of every benchmark present on both runs. Best time is used for microbenchmarks and
+        throughput for load scenarios
+        """
+        baseline_micro = {result['name']: result for result in baseline.get('micro', [])}
+        for result in results['micro']:
+            if result['name'] in baseline_micro:
+                change = result['best_us'] / baseline_micro[result['name']]['best_us'] - 1
+                self.stderr.write('%s: %+.1f%% time' % (result['name'], change * 100))
+
+        baseline_load = {(result['name'], result['concurrency']): result for result in baseline.get('load', [])}
+        for result in results['load']:
+            key = (result['name'], result['concurrency'])
+            if key in baseline_load:
+                change = result['requests_per_second'] / baseline_load[key]['requests_per_second'] - 1
+                self.stderr.write('%s with concurrency %d: %+.1f%% req/s' % (key[0], key[1], change * 100))
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        results = {
+            'commit': self.get_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'micro': [] if options['skip_micro'] else self.run_micro(options['filter']),
+            'load': [] if options['skip_load'] else self.run_load(options['filter'], options['concurrency'],
+                                                                  options['requests']),
+        }
+        results['seconds'] = time.monotonic() - start
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.compare(results, json.load(f))
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
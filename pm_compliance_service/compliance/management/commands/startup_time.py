@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Code run on a new interpreter. It prints the times as JSON on the last line of stdout
+WEB_STARTUP_CODE = """
+import io, json, sys, time
+start = time.perf_counter()
+from config.wsgi import application
+imported = time.perf_counter()
+environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+           'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr}
+status = []
+response = application(environ, lambda status_line, headers, exc_info=None: status.append(status_line))
+b''.join(response)
+response.close()
+print(json.dumps({'import_seconds': imported - start, 'first_request_seconds': time.perf_counter() - start,
+                  'status': status[0]}))
+"""
+
+WORKER_STARTUP_CODE = """
+import json, time
+start = time.perf_counter()
+import django
+django.setup()
+from pm_compliance_service.taskapp.celery import app
+imported = time.perf_counter()
+app.loader.import_default_modules()  # Tasks are imported as the worker does before consuming
+print(json.dumps({'import_seconds': imported - start, 'first_request_seconds': time.perf_counter() - start,
+                  'status': '%d tasks' % len(app.tasks)}))
+"""
+
+
+class Command(BaseCommand):
+    help = ('Start a web (WSGI application and first request) or worker (celery tasks) process on a new interpreter '
+            'with `-X importtime`, and report the import time of every package and the time to first request')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--process', choices=['web', 'worker'], default='web')
+        parser.add_argument('--path', default='/check/', help='Path of the first request of the web process')
+        parser.add_argument('--top', type=int, default=20, help='Number of packages and modules to report')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    @staticmethod
+    def parse_import_times(lines: List[str]) -> List[Dict[str, Any]]:
+        """
+        :param lines: Lines written to stderr by `-X importtime`
+        :return: Self and cumulative seconds of every imported module
+        """
+        modules = []
+        for line in lines:
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, module = line[len('import time:'):].split('|')
+            modules.append({'module': module.strip(), 'self_seconds': int(self_us) / 1e6,
+                            'cumulative_seconds': int(cumulative_us) / 1e6})
+        return modules
+
+    def handle(self, *args, **options):
+        code = WEB_STARTUP_CODE if options['process'] == 'web' else WORKER_STARTUP_CODE
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code, options['path']],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=os.environ.copy(),
+                                 cwd=os.getcwd(), universal_newlines=True)
+        elapsed = time.perf_counter() - start
+        if process.returncode:
+            raise CommandError('Process failed:\n%s' % process.stderr[-5000:])
+
+        modules = self.parse_import_times(process.stderr.splitlines())
+        packages = defaultdict(float)  # Self time of every module of the package
+        for module in modules:
+            packages[module['module'].split('.')[0]] += module['self_seconds']
+        top = options['top']
+        report = dict(json.loads(process.stdout.splitlines()[-1]),
+                      process=options['process'],
+                      process_seconds=elapsed,  # Includes interpreter startup and shutdown
+                      import_total_seconds=sum(module['self_seconds'] for module in modules),
+                      modules_imported=len(modules),
+                      packages=[{'package': package, 'seconds': seconds}
+                                for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]],
+                      project_modules=sorted([module for module in modules
+                                              if module['module'].startswith(('config', 'pm_compliance_service'))],
+                                             key=lambda module: -module['cumulative_seconds'])[:top])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write('%s process - %d modules imported in %.3f s, application imported in %.3f s, first '
+                          'request (%s) after %.3f s' % (report['process'], report['modules_imported'],
+                                                         report['import_total_seconds'], report['import_seconds'],
+                                                         report['status'], report['first_request_seconds']))
+        self.stdout.write('Packages by import time:')
+        for package in report['packages']:
+            self.stdout.write('  %-40s %8.1f ms' % (package['package'], package['seconds'] * 1000))
+        self.stdout.write('Project modules by cumulative import time:')
+        for module in report['project_modules']:
+            self.stdout.write('  %-60s %8.1f ms' % (module['module'], module['cumulative_seconds'] * 1000))
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from logging import getLogger
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+
+from redis.exceptions import RedisError
+
+from .repositories.redis_repository import RedisRepository
+
+logger = getLogger(__name__)
+
+METRICS_KEY = 'metrics:http'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10.)
+INF_BUCKET = '+Inf'
+
+# Name, type and help of every metric exported
+METRICS = (
+    ('http_requests_total', 'counter', 'Requests by view, method and status code'),
+    ('http_request_duration_seconds', 'histogram', 'Latency of the requests by view'),
+    ('http_response_size_bytes_total', 'counter', 'Bytes of the responses by view, streaming responses excluded'),
+    ('db_queries_total', 'counter', 'Database queries by view'),
+    ('db_query_duration_seconds_total', 'counter', 'Time spent on database queries by view'),
+    ('redis_calls_total', 'counter', 'Redis commands and pipelines by view'),
+    ('redis_duration_seconds_total', 'counter', 'Time spent on Redis by view'),
+)
+
+
+class MetricsProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = Metrics(settings.METRICS_FLUSH_INTERVAL)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class Metrics:
+    """
+    Request metrics aggregated across every gunicorn worker. Every process accumulates its metrics in memory and
+    adds them to a Redis hash at most once every `flush_interval` seconds, so requests don't wait for Redis.
+    Fields of the hash are `<metric>|<labels>`, histogram buckets are not cumulative on Redis
+    """
+    def __init__(self, flush_interval: int):
+        """
+        :param flush_interval: Max seconds between flushes of the metrics of the process to Redis
+        """
+        self.flush_interval = flush_interval
+        self.redis = RedisRepository().redis
+        self.pending = Counter()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_field(metric: str, labels: Tuple[Tuple[str, str], ...]) -> str:
+        return '%s|%s' % (metric, ','.join('%s="%s"' % (name, value.replace('"', '\\"'))
+                                           for name, value in labels))
+
+    @staticmethod
+    def _get_bucket(seconds: float) -> str:
+        for bucket in LATENCY_BUCKETS:
+            if seconds <= bucket:
+                return repr(bucket)
+        return INF_BUCKET
+
+    def record_request(self, view: str, method: str, status_code: int, seconds: float, response_size: int,
+                       db_queries: int, db_seconds: float, redis_calls: int, redis_seconds: float):
+        """
+        :param response_size: Bytes of the response, `None` for streaming responses
+        """
+        view_labels = (('view', view),)
+        metrics = [
+            (self._get_field('http_requests_total', view_labels + (('method', method),
+                                                                   ('status', str(status_code)))), 1),
+            (self._get_field('http_request_duration_seconds_bucket',
+                             view_labels + (('le', self._get_bucket(seconds)),)), 1),
+            (self._get_field('http_request_duration_seconds_sum', view_labels), seconds),
+            (self._get_field('http_request_duration_seconds_count', view_labels), 1),
+            (self._get_field('db_queries_total', view_labels), db_queries),
+            (self._get_field('db_query_duration_seconds_total', view_labels), db_seconds),
+            (self._get_field('redis_calls_total', view_labels), redis_calls),
+            (self._get_field('redis_duration_seconds_total', view_labels), redis_seconds),
+        ]
+        if response_size is not None:
+            metrics.append((self._get_field('http_response_size_bytes_total', view_labels), response_size))
+
+        with self._lock:
+            for field, value in metrics:
+                self.pending[field] += value
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Add metrics of the process to Redis. If Redis is not available they are kept for the next flush
+        """
+        with self._lock:
+            pending, self.pending = self.pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for field, value in pending.items():
+                if isinstance(value, int):
+                    pipe.hincrby(METRICS_KEY, field, value)
+                else:
+                    pipe.hincrbyfloat(METRICS_KEY, field, value)
+            pipe.execute()
+        except RedisError:
+            logger.warning('Cannot flush metrics to Redis', exc_info=True)
+            with self._lock:
+                self.pending.update(pending)
+
+    def export(self) -> str:
+        """
+        :return: Metrics of every process in Prometheus text format
+        """
+        self.flush()
+        values = defaultdict(list)  # type: Dict[str, List[Tuple[str, float]]]
+        for field, value in self.redis.hgetall(METRICS_KEY).items():
+            metric, labels = field.decode().split('|', 1)
+            values[metric].append((labels, float(value)))
+
+        lines = []
+        for metric, metric_type, help_text in METRICS:
+            lines.append('# HELP %s %s' % (metric, help_text))
+            lines.append('# TYPE %s %s' % (metric, metric_type))
+            if metric_type == 'histogram':
+                lines.extend(self._export_histogram(metric, values))
+            else:
+                lines.extend('%s{%s} %s' % (metric, labels, repr(value)) for labels, value in sorted(values[metric]))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _export_histogram(metric: str, values: Dict[str, List[Tuple[str, float]]]) -> List[str]:
+        """
+        :return: Lines of the histogram with cumulative buckets
+        """
+        buckets = defaultdict(Counter)  # Non cumulative counts by labels without `le`
+        for labels, value in values[metric + '_bucket']:
+            labels, bucket = labels.rsplit(',le=', 1)
+            buckets[labels][bucket.strip('"')] += value
+
+        sums = dict(values[metric + '_sum'])
+        lines = []
+        for labels, count in sorted(values[metric + '_count']):
+            cumulative = 0.
+            for bucket in [repr(bucket) for bucket in LATENCY_BUCKETS] + [INF_BUCKET]:
+                cumulative += buckets[labels][bucket]
+                lines.append('%s_bucket{%s,le="%s"} %s' % (metric, labels, bucket, repr(cumulative)))
+            lines.append('%s_sum{%s} %s' % (metric, labels, repr(sums.get(labels, 0.))))
+            lines.append('%s_count{%s} %s' % (metric, labels, repr(count)))
+        return lines
@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+
+from .geoip import GeoIPDatabaseProvider, get_client_ip
+from .log import ROUTE_ENVIRON_KEY
+from .metrics import MetricsProvider
+from .repositories.redis_repository import redis_stats
+
+logger = logging.getLogger(__name__)
+
+
+class RedisTimingMiddleware:
+    """
+    Reports time spent on Redis by every request on the `Server-Timing` header
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        redis_stats.reset()
+        response = self.get_response(request)
+        self.add_server_timing(request, response)
+        return response
+
+    @staticmethod
+    def add_server_timing(request, response):
+        response['Server-Timing'] = 'redis;dur=%.3f;desc="%d calls"' % (redis_stats.time * 1000, redis_stats.calls)
+        if redis_stats.calls:
+            logger.debug('%s - %d redis calls in %.3f ms', request.path, redis_stats.calls, redis_stats.time * 1000)
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Rejects requests with `503` when the process is already serving `MAX_CONCURRENT_REQUESTS`, so clients can
+    retry on another worker instead of waiting for database and Redis connections. Streaming responses stop
+    counting when their iterator is returned. Health checks and metrics are not limited
+    """
+    exempt_paths = ('/check/', '/ready/', '/metrics')
+
+    def __init__(self, get_response):
+        if not settings.MAX_CONCURRENT_REQUESTS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.semaphore = threading.BoundedSemaphore(settings.MAX_CONCURRENT_REQUESTS)
+
+    def __call__(self, request):
+        if request.path.startswith(self.exempt_paths):
+            return self.get_response(request)
+        if not self.semaphore.acquire(blocking=False):
+            response = JsonResponse({'detail': 'Too many concurrent requests, retry later'}, status=503)
+            response['Retry-After'] = '1'
+            response._has_been_logged = True  # Not an error of the request, don't email admins on overload
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            self.semaphore.release()
+
+
+class GeoBlockMiddleware:
+    """
+    Rejects requests from `GEOIP_BLOCKED_COUNTRIES` with `451`. Client IP is taken from `X-Forwarded-For`, skipping
+    the `GEOIP_TRUSTED_PROXIES` proxies in front of nginx, or from `X-Real-IP`. Requests with unknown country are
+    allowed. Health checks and metrics are not blocked
+    """
+    exempt_paths = ('/check/', '/ready/', '/metrics')
+
+    def __init__(self, get_response):
+        if not settings.GEOIP_BLOCKED_COUNTRIES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.blocked_countries = frozenset(country.upper() for country in settings.GEOIP_BLOCKED_COUNTRIES)
+        self.trusted_proxies = settings.GEOIP_TRUSTED_PROXIES
+        self.database = GeoIPDatabaseProvider()
+        self.database.refresh()
+
+    def __call__(self, request):
+        if not request.path.startswith(self.exempt_paths):
+            client_ip = get_client_ip(request.META, self.trusted_proxies)
+            country = self.database.get_country(client_ip) if client_ip else None
+            if country in self.blocked_countries:
+                return JsonResponse({'detail': 'Service is not available in your jurisdiction'}, status=451)
+        return self.get_response(request)
+
+
+class QueryStats:
+    """
+    Database execute wrapper counting queries and time spent on them
+    """
+    def __init__(self):
+        self.queries = 0
+        self.time = 0.
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.time += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Records latency, database queries, Redis calls and response size of every request by url name. Metrics are
+    exported on `/metrics`
+    """
+    ignored_url_names = ('check', 'ready', 'metrics')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_stats = QueryStats()
+        redis_calls, redis_time = redis_stats.calls, redis_stats.time
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_stats))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        resolver_match = request.resolver_match
+        url_name = resolver_match.url_name if resolver_match else None
+        view_name = resolver_match.view_name if resolver_match else 'unresolved'
+        request.META[ROUTE_ENVIRON_KEY] = view_name  # Used to sample access log records
+        if url_name not in self.ignored_url_names:
+            MetricsProvider().record_request(view_name, request.method, response.status_code, elapsed,
+                                             None if response.streaming else len(response.content),
+                                             query_stats.queries, query_stats.time,
+                                             redis_stats.calls - redis_calls, redis_stats.time - redis_time)
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.13 on 2026-10-18 08:00
+
+from django.db import migrations, models
+import django.utils.timezone
+import gnosis.eth.django.models
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockedAddress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('address', gnosis.eth.django.models.EthereumAddressField(db_index=True)),
+                ('source', models.CharField(max_length=50)),
+            ],
+            options={
+                'verbose_name_plural': 'Blocked addresses',
+                'unique_together': {('address', 'source')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.13 on 2026-10-18 08:04
+
+from django.db import migrations, models
+import django.utils.timezone
+import gnosis.eth.django.models
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceStatus',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('address', gnosis.eth.django.models.EthereumAddressField(unique=True)),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'PENDING'), (1, 'VERIFIED'), (2, 'REJECTED')], default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Compliance statuses',
+            },
+        ),
+    ]
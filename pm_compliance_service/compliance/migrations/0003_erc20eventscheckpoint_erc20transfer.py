@@ -0,0 +1,45 @@
+# Generated by Django 2.2.13 on 2026-10-18 08:06
+
+from django.db import migrations, models
+import django.utils.timezone
+import gnosis.eth.django.models
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0002_compliancestatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Erc20EventsCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('token_address', gnosis.eth.django.models.EthereumAddressField(unique=True)),
+                ('block_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Erc20Transfer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_address', gnosis.eth.django.models.EthereumAddressField(db_index=True)),
+                ('_from', gnosis.eth.django.models.EthereumAddressField(db_index=True)),
+                ('to', gnosis.eth.django.models.EthereumAddressField(db_index=True)),
+                ('value', gnosis.eth.django.models.Uint256Field()),
+                ('block_number', models.PositiveIntegerField(db_index=True)),
+                ('transaction_hash', gnosis.eth.django.models.Sha3HashField()),
+                ('log_index', models.PositiveIntegerField()),
+            ],
+            options={
+                'unique_together': {('transaction_hash', 'log_index')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.13 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0003_erc20eventscheckpoint_erc20transfer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compliancestatus',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.13 on 2026-10-18 08:14
+
+from django.db import migrations, models
+import django.utils.timezone
+import gnosis.eth.django.models
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0004_compliancestatus_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SafeAddress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('address', gnosis.eth.django.models.EthereumAddressField(unique=True)),
+                ('owner', gnosis.eth.django.models.EthereumAddressField(db_index=True)),
+                ('salt_nonce', gnosis.eth.django.models.Uint256Field()),
+                ('master_copy', gnosis.eth.django.models.EthereumAddressField()),
+                ('proxy_factory', gnosis.eth.django.models.EthereumAddressField()),
+            ],
+            options={
+                'verbose_name_plural': 'Safe addresses',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.13 on 2026-10-18 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0005_safeaddress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blockedaddress',
+            index=models.Index(fields=['created', 'id'], name='compliance__created_181f90_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compliancestatus',
+            index=models.Index(fields=['created', 'id'], name='compliance__created_88a1f5_idx'),
+        ),
+    ]
@@ -1 +1,98 @@
+from enum import Enum
+
 from django.db import models
+
+from model_utils import FieldTracker
+from model_utils.models import TimeStampedModel
+
+from gnosis.eth.django.models import (EthereumAddressField, Sha3HashField,
+                                      Uint256Field)
+
+
+class ComplianceStatusType(Enum):
+    PENDING = 0
+    VERIFIED = 1
+    REJECTED = 2
+
+
+class BlockedAddress(TimeStampedModel):
+    """
+    Address present on a sanctions list or blocklist. The same address can be listed by more than one source
+    """
+    address = EthereumAddressField(db_index=True)
+    source = models.CharField(max_length=50)
+
+    class Meta:
+        indexes = [models.Index(fields=['created', 'id'])]  # Keyset pagination
+        unique_together = (('address', 'source'),)
+        verbose_name_plural = 'Blocked addresses'
+
+    def __str__(self):
+        return '{} - {}'.format(self.address, self.source)
+
+
+class ComplianceStatus(TimeStampedModel):
+    """
+    Verification status of a user, identified by the address they proved to own
+    """
+    address = EthereumAddressField(unique=True)
+    status = models.PositiveSmallIntegerField(choices=[(tag.value, tag.name) for tag in ComplianceStatusType],
+                                              default=ComplianceStatusType.PENDING.value)
+    email = models.EmailField(null=True, blank=True)  # Used to notify status changes
+
+    tracker = FieldTracker(fields=['status'])
+
+    class Meta:
+        indexes = [models.Index(fields=['created', 'id'])]  # Keyset pagination
+        verbose_name_plural = 'Compliance statuses'
+
+    def __str__(self):
+        return '{} - {}'.format(self.address, ComplianceStatusType(self.status).name)
+
+    @property
+    def is_verified(self) -> bool:
+        return self.status == ComplianceStatusType.VERIFIED.value
+
+
+class Erc20EventsCheckpoint(TimeStampedModel):
+    """
+    Progress of the ERC20 events indexer for a token, so indexing is resumed where it stopped
+    """
+    token_address = EthereumAddressField(unique=True)
+    block_number = models.PositiveIntegerField(default=0)  # Next block to be indexed
+
+    def __str__(self):
+        return '{} - Next block {}'.format(self.token_address, self.block_number)
+
+
+class Erc20Transfer(models.Model):
+    token_address = EthereumAddressField(db_index=True)
+    _from = EthereumAddressField(db_index=True)
+    to = EthereumAddressField(db_index=True)
+    value = Uint256Field()
+    block_number = models.PositiveIntegerField(db_index=True)
+    transaction_hash = Sha3HashField()
+    log_index = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = (('transaction_hash', 'log_index'),)
+
+    def __str__(self):
+        return 'Token {} - {} -> {} - {}'.format(self.token_address, self._from, self.to, self.value)
+
+
+class SafeAddress(TimeStampedModel):
+    """
+    Safe address (deployed or counterfactual) derived for an owner, created by a `ProxyFactory` using CREATE2
+    """
+    address = EthereumAddressField(unique=True)
+    owner = EthereumAddressField(db_index=True)
+    salt_nonce = Uint256Field()
+    master_copy = EthereumAddressField()
+    proxy_factory = EthereumAddressField()
+
+    class Meta:
+        verbose_name_plural = 'Safe addresses'
+
+    def __str__(self):
+        return 'Safe {} - Owner {}'.format(self.address, self.owner)
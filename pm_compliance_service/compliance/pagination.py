@@ -0,0 +1,166 @@
+import datetime
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
+
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_estimated_count(queryset: QuerySet) -> Optional[int]:
+    """
+    Estimation of the rows of the table from the PostgreSQL statistics, so no `COUNT(*)` is needed. Filters of
+    the queryset are not taken into account
+    :return: Estimated rows of the table, `None` if database is not PostgreSQL or table was never analyzed
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    `DjangoJSONEncoder` truncates datetimes to milliseconds. Keys of a cursor must be exact, or items between the
+    truncated and the real value are skipped (e.g. statuses imported on the same transaction share `created`)
+    """
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination on `(created, id)` (or just `id` for models without `created`), newest first. Pages are
+    requested with an opaque cursor holding the keys of the last item returned, so every page is an index range
+    scan no matter how deep it is, and no `COUNT(*)` is done. An estimated count can be requested with
+    `?count=estimate`
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    keyset_fields = ('created', 'id')  # Fields not present on the model are ignored, `id` is always present
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request) -> int:
+        try:
+            return _positive_int(request.query_params[self.page_size_query_param], strict=True,
+                                 cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_keyset_fields(self, queryset: QuerySet) -> List[str]:
+        fields = []
+        for field_name in self.keyset_fields:
+            try:
+                queryset.model._meta.get_field(field_name)
+                fields.append(field_name)
+            except FieldDoesNotExist:
+                pass
+        return fields
+
+    def encode_cursor(self, values: Sequence[Any], reverse: bool) -> str:
+        data = json.dumps([list(values), reverse], cls=CursorJSONEncoder, separators=(',', ':'))
+        return b64encode(data.encode(), altchars=b'-_').decode()
+
+    def decode_cursor(self, encoded: str, queryset: QuerySet, fields: Sequence[str]) -> Tuple[List[Any], bool]:
+        """
+        :return: Keys of the item of the cursor and if items before it must be returned instead of the ones after
+        """
+        try:
+            values, reverse = json.loads(b64decode(encoded.encode(), altchars=b'-_', validate=True).decode())
+            if len(values) != len(fields):
+                raise ValueError('Unexpected number of keys')
+            return [queryset.model._meta.get_field(field).to_python(value)
+                    for field, value in zip(fields, values)], bool(reverse)
+        except (TypeError, ValueError, ValidationError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def get_keyset_filter(fields: Sequence[str], values: Sequence[Any], reverse: bool) -> Q:
+        """
+        Filter items after the keys (before them if `reverse`) on descending order. First field is also filtered
+        alone so the database can use it as the bound of the index range scan
+        """
+        lookup = 'gt' if reverse else 'lt'
+        keyset_filter = Q()
+        for position, (field, value) in enumerate(zip(fields, values)):
+            keyset_filter |= Q(**{field: value for field, value in zip(fields[:position], values[:position])},
+                               **{'%s__%s' % (field, lookup): value})
+        return Q(**{'%s__%se' % (fields[0], lookup): values[0]}) & keyset_filter
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> List[Any]:
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        fields = self.get_keyset_fields(queryset)
+        page_size = self.get_page_size(request)
+
+        encoded_cursor = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if encoded_cursor:
+            values, reverse = self.decode_cursor(encoded_cursor, queryset, fields)
+            queryset = queryset.filter(self.get_keyset_filter(fields, values, reverse))
+
+        ordering = fields if reverse else ['-' + field for field in fields]
+        results = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        # Going forward there are previous items if a cursor was used, going backwards there are next items
+        has_next = has_more if not reverse else bool(encoded_cursor)
+        has_previous = has_more if reverse else bool(encoded_cursor)
+        self.next_cursor = self.encode_cursor([getattr(results[-1], field) for field in fields],
+                                              False) if has_next and results else None
+        self.previous_cursor = self.encode_cursor([getattr(results[0], field) for field in fields],
+                                                  True) if has_previous and results else None
+
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.estimated_count = get_estimated_count(queryset)
+        else:
+            self.estimated_count = None
+        return results
+
+    def get_link(self, cursor: Optional[str]) -> Optional[str]:
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict([
+            ('next', self.get_link(self.next_cursor)),
+            ('previous', self.get_link(self.previous_cursor)),
+        ])
+        if self.estimated_count is not None:
+            response['estimated_count'] = self.estimated_count
+        response['results'] = data
+        return Response(response)
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(name=self.cursor_query_param, required=False, location='query',
+                          schema=coreschema.String(title='Cursor', description='Cursor of the page')),
+            coreapi.Field(name=self.page_size_query_param, required=False, location='query',
+                          schema=coreschema.Integer(title='Limit', description='Number of results per page')),
+            coreapi.Field(name=self.count_query_param, required=False, location='query',
+                          schema=coreschema.String(title='Count',
+                                                   description='`estimate` to get an estimated count')),
+        ]
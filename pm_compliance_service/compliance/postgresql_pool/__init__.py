@@ -0,0 +1,5 @@
+"""
+PostgreSQL database backend sharing a bounded pool of persistent connections between the greenlets (or threads)
+of every process. Queries of gevent workers yield to other greenlets instead of blocking the worker.
+Set `ENGINE` of the database to `pm_compliance_service.compliance.postgresql_pool` and `POOL_SIZE`/`POOL_TIMEOUT`
+"""
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+from logging import getLogger
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from django.db.backends.postgresql import base
+
+import psycopg2
+from gevent import monkey
+from gevent.socket import wait_read, wait_write
+from psycopg2 import extensions
+
+logger = getLogger(__name__)
+
+
+def gevent_wait_callback(connection, timeout: Optional[float] = None):
+    """
+    Wait for the result of psycopg2 operations yielding to other greenlets, instead of blocking the worker
+    """
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError('Bad result from poll: %r' % state)
+
+
+def patch_psycopg() -> bool:
+    """
+    Make psycopg2 cooperative if gevent patched the standard library (e.g. on gevent workers of Gunicorn)
+    :return: `True` if psycopg2 is cooperative
+    """
+    if not monkey.is_module_patched('socket'):
+        return False
+    if extensions.get_wait_callback() is None:
+        extensions.set_wait_callback(gevent_wait_callback)
+        logger.info('Psycopg2 patched to yield to other greenlets')
+    return True
+
+
+class ConnectionPool:
+    """
+    Bounded pool of connections shared by the greenlets (or threads) of a process. At most `size` connections are
+    in use, other greenlets wait up to `timeout` seconds for one of them to be released. Idle connections are reused
+    last in first out, so the ones not needed anymore are closed when they get older than `max_age` seconds
+    """
+    def __init__(self, size: int, timeout: float, max_age: Optional[int]):
+        """
+        :param size: Maximum number of connections in use
+        :param timeout: Seconds to wait for a connection
+        :param max_age: Seconds connections are reused, `None` for unlimited
+        """
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.pid = os.getpid()
+        self._semaphore = threading.BoundedSemaphore(size)
+        self._idle = deque()  # type: Deque[Any]
+        self._connected_at = {}  # type: Dict[Any, float]
+
+    def _is_reusable(self, connection) -> bool:
+        if connection.closed:
+            return False
+        if self.max_age is not None and time.monotonic() - self._connected_at[connection] >= self.max_age:
+            return False
+        transaction_status = connection.get_transaction_status()
+        if transaction_status in (extensions.TRANSACTION_STATUS_INTRANS, extensions.TRANSACTION_STATUS_INERROR):
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+            transaction_status = connection.get_transaction_status()
+        return transaction_status == extensions.TRANSACTION_STATUS_IDLE
+
+    def _close(self, connection):
+        self._connected_at.pop(connection, None)
+        try:
+            connection.close()
+        except psycopg2.Error:
+            logger.warning('Cannot close database connection', exc_info=True)
+
+    def acquire(self, connect: Callable[[], Any]):
+        """
+        :param connect: Function opening a new connection if no idle one can be reused
+        :return: Connection, it must be released with `release`
+        :raises: psycopg2.OperationalError if no connection is released in `timeout` seconds
+        """
+        if not self._semaphore.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError('No database connection was released in %s seconds, pool size is %d' %
+                                            (self.timeout, self.size))
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                if self._is_reusable(connection):
+                    return connection
+                self._close(connection)
+            connection = connect()
+            self._connected_at[connection] = time.monotonic()
+            return connection
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def release(self, connection, reuse: bool = True):
+        """
+        Return a connection to the pool. It's closed if it cannot be reused or it's older than `max_age`
+        :param reuse: `False` to close the connection
+        """
+        if os.getpid() != self.pid:  # Connection was borrowed by the parent of a forked process
+            connection.close()
+            return
+
+        try:
+            if reuse and self._is_reusable(connection):
+                self._idle.append(connection)
+            else:
+                self._close(connection)
+        finally:
+            self._semaphore.release()
+
+
+_pools = {}  # type: Dict[Tuple[int, str], ConnectionPool]
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, settings_dict: Dict[str, Any]) -> ConnectionPool:
+    """
+    :return: Pool of the database `alias` for the current process
+    """
+    key = (os.getpid(), alias)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(settings_dict.get('POOL_SIZE', 10), settings_dict.get('POOL_TIMEOUT', 10),
+                                      settings_dict['CONN_MAX_AGE'])
+                _pools[key] = pool
+    return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Connections are borrowed from the pool of the process when needed and returned at the end of every request
+    (or task), so persistent connections are reused by any greenlet of a gevent worker. `CONN_MAX_AGE` is the time
+    connections are kept on the pool
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        patch_psycopg()
+        self.pool = None
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, self.settings_dict)
+        return self.pool.acquire(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            # A connection closed inside a transaction is still referenced until the outermost atomic block exits
+            reuse = not self.in_atomic_block and (not self.errors_occurred or self.is_usable())
+            with self.wrap_database_errors:
+                self.pool.release(self.connection, reuse=reuse)
+
+    def close_if_unusable_or_obsolete(self):
+        # Called at the start and end of every request, connection goes back to the pool even if it's not obsolete
+        if self.connection is not None:
+            self.close()
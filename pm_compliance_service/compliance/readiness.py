@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from logging import getLogger
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+import requests
+from redis import Redis
+
+logger = getLogger(__name__)
+
+
+class ReadinessCheckerProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = ReadinessChecker(settings.READINESS_TIMEOUT, settings.READINESS_CACHE_TTL)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            cls.instance.executor.shutdown(wait=False)
+            del cls.instance
+
+
+class ReadinessChecker:
+    """
+    Probes the dependencies of the service concurrently. Result is cached for `cache_ttl` seconds and only one
+    check runs at a time on every process, so frequent health checks don't load the dependencies. A probe still
+    running from a previous check is not started again, it's reported as timed out
+    """
+    def __init__(self, timeout: float, cache_ttl: float):
+        """
+        :param timeout: Max seconds to wait for all the probes
+        :param cache_ttl: Seconds to reuse the last result
+        """
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.probes = self.get_probes()
+        self.executor = ThreadPoolExecutor(max_workers=len(self.probes), thread_name_prefix='readiness')
+        # Not the shared pool, so probes don't wait for a free connection and fail fast
+        self.redis = Redis.from_url(settings.REDIS_URL, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.http_session = requests.Session()
+        self.futures = {}  # type: Dict[str, Future]
+        self.result = None  # type: Optional[Dict[str, Any]]
+        self.checked = 0.
+        self._lock = threading.Lock()
+
+    def get_probes(self) -> Dict[str, Callable[[], None]]:
+        """
+        :return: Probes by dependency name. Every probe raises an exception if dependency is not available
+        """
+        probes = {
+            'database': self.probe_database,
+            'redis': self.probe_redis,
+            'celery_broker': self.probe_celery_broker,
+        }
+        if settings.ETHEREUM_NODE_URL:
+            probes['ethereum_node'] = self.probe_ethereum_node
+        return probes
+
+    def probe_database(self):
+        # Every probe thread keeps its own connection for `CONN_MAX_AGE`, with the pool it's returned after every probe
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            connection.close()
+            raise
+        connection.close_if_unusable_or_obsolete()
+
+    def probe_redis(self):
+        self.redis.ping()
+
+    def probe_celery_broker(self):
+        from pm_compliance_service.taskapp.celery import app
+
+        with app.connection_for_write(connect_timeout=self.timeout) as broker_connection:
+            broker_connection.ensure_connection(max_retries=1, interval_start=0)
+
+    def probe_ethereum_node(self):
+        response = self.http_session.post(settings.ETHEREUM_NODE_URL,
+                                          json={'jsonrpc': '2.0', 'method': 'eth_blockNumber', 'params': [], 'id': 1},
+                                          timeout=self.timeout)
+        response.raise_for_status()
+        if 'result' not in response.json():
+            raise ValueError('Unexpected response %s' % response.text[:200])
+
+    @staticmethod
+    def run_probe(probe: Callable[[], None]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            probe()
+            error = None
+        except Exception as exc:
+            error = '{}: {}'.format(exc.__class__.__name__, exc)
+        return {'ready': error is None, 'latency_ms': (time.perf_counter() - start) * 1000, 'error': error}
+
+    def run_probes(self) -> Dict[str, Dict[str, Any]]:
+        for name, probe in self.probes.items():
+            future = self.futures.get(name)
+            if not future or future.done():
+                self.futures[name] = self.executor.submit(self.run_probe, probe)
+
+        deadline = time.monotonic() + self.timeout
+        results = {}
+        for name, future in self.futures.items():
+            try:
+                results[name] = future.result(timeout=max(0., deadline - time.monotonic()))
+            except FutureTimeoutError:
+                results[name] = {'ready': False, 'latency_ms': None,
+                                 'error': 'No response after %.2f seconds' % self.timeout}
+        return results
+
+    def check(self) -> Dict[str, Any]:
+        """
+        :return: Readiness of the service and of every dependency, with the latency of its probe
+        """
+        with self._lock:
+            if not self.result or time.monotonic() - self.checked >= self.cache_ttl:
+                dependencies = self.run_probes()
+                self.result = {
+                    'ready': all(result['ready'] for result in dependencies.values()),
+                    'checked_at': datetime.now(timezone.utc).isoformat(),
+                    'dependencies': dependencies,
+                }
+                self.checked = time.monotonic()
+                if not self.result['ready']:
+                    logger.warning('Service is not ready: %s',
+                                   {name: result['error'] for name, result in dependencies.items()
+                                    if not result['ready']})
+            return self.result
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+
+import aioredis
+from aioredis.errors import ReplyError
+
+from ..utils import chunks
+from .redis_repository import (COMPARE_AND_SET_SCRIPT, INCR_WITH_TTL_SCRIPT,
+                               redis_stats)
+
+logger = getLogger(__name__)
+
+SCRIPT_SHAS = {script: hashlib.sha1(script.encode()).hexdigest()
+               for script in (COMPARE_AND_SET_SCRIPT, INCR_WITH_TTL_SCRIPT)}
+
+
+class AsyncRedisRepository:
+    """
+    asyncio variant of `RedisRepository` for async views. The connection pool is created on first use, as it must
+    be bound to the running event loop
+    """
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            instance = super().__new__(cls)
+            instance.redis = None
+            instance.batch_size = settings.REDIS_BATCH_SIZE
+            instance._lock = None
+            cls.instance = instance
+        return cls.instance
+
+    @classmethod
+    async def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            if cls.instance.redis is not None:
+                cls.instance.redis.close()
+                await cls.instance.redis.wait_closed()
+            del cls.instance
+
+    async def get_redis(self) -> aioredis.Redis:
+        if self.redis is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self.redis is None:
+                    self.redis = await aioredis.create_redis_pool(settings.REDIS_URL,
+                                                                  maxsize=settings.REDIS_MAX_CONNECTIONS)
+        return self.redis
+
+    async def _run_script(self, script: str, keys: Sequence[str], args: Sequence[Any]):
+        """
+        Use `EVALSHA` and only send the script body if Redis does not know it yet
+        """
+        redis = await self.get_redis()
+        with redis_stats.measure():
+            try:
+                return await redis.evalsha(SCRIPT_SHAS[script], keys=list(keys), args=list(args))
+            except ReplyError as e:
+                if not str(e).startswith('NOSCRIPT'):
+                    raise
+                return await redis.eval(script, keys=list(keys), args=list(args))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        redis = await self.get_redis()
+        with redis_stats.measure():
+            return await redis.get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """
+        :return: Values for `keys` in the same order, `None` if key is not found
+        """
+        if not keys:
+            return []
+        redis = await self.get_redis()
+        pipe = redis.pipeline()
+        for keys_chunk in chunks(keys, self.batch_size):
+            pipe.mget(*keys_chunk)
+        with redis_stats.measure():
+            results = await pipe.execute()
+        return [value for values in results for value in values]
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None):
+        """
+        :param ttl: Expiration in seconds for every key. If not provided keys don't expire
+        """
+        if not mapping:
+            return
+        redis = await self.get_redis()
+        pipe = redis.pipeline()
+        for key, value in mapping.items():
+            pipe.set(key, value, expire=ttl or 0)
+        with redis_stats.measure():
+            await pipe.execute()
+
+    async def incr_with_ttl(self, key: str, amount: int = 1, ttl: int = 60) -> int:
+        return await self._run_script(INCR_WITH_TTL_SCRIPT, [key], [amount, ttl])
+
+    async def compare_and_set(self, key: str, expected: Any, value: Any) -> bool:
+        return bool(await self._run_script(COMPARE_AND_SET_SCRIPT, [key], [expected, value]))
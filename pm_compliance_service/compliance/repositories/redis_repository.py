@@ -1,13 +1,235 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
 from django.conf import settings
 
-from redis import Redis
+from redis import BlockingConnectionPool, ConnectionPool, Redis
+from redis.client import Pipeline
+
+from ..utils import chunks
+
+logger = getLogger(__name__)
+
+# KEYS[1] - key, ARGV[1] - amount, ARGV[2] - ttl in seconds. Ttl is only set when key is created
+INCR_WITH_TTL_SCRIPT = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value == tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+# KEYS[1] - key, ARGV[1] - expected value, ARGV[2] - new value. Returns 1 if value was replaced, 0 otherwise
+COMPARE_AND_SET_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl > 0 then
+        redis.call('SET', KEYS[1], ARGV[2], 'PX', ttl)
+    else
+        redis.call('SET', KEYS[1], ARGV[2])
+    end
+    return 1
+end
+return 0
+"""
+
+# Sliding window counter approximated with the counters of the current and the previous fixed windows
+# KEYS[1] - current window counter, KEYS[2] - previous window counter, KEYS[3] - usage hash
+# ARGV[1] - limit, ARGV[2] - window seconds, ARGV[3] - part of the previous window still inside the sliding window
+# (0-1), ARGV[4] - usage field, ARGV[5] - ttl of the usage hash in seconds
+# Returns {1 if allowed 0 otherwise, requests in the sliding window before this one}. Rejected requests are not
+# counted, they are added to `<usage field>:rejected`
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local count = math.floor(previous * tonumber(ARGV[3])) + current
+local allowed = 0
+if count < tonumber(ARGV[1]) then
+    allowed = 1
+    if redis.call('INCR', KEYS[1]) == 1 then
+        redis.call('EXPIRE', KEYS[1], 2 * tonumber(ARGV[2]))
+    end
+    redis.call('HINCRBY', KEYS[3], ARGV[4], 1)
+else
+    redis.call('HINCRBY', KEYS[3], ARGV[4] .. ':rejected', 1)
+end
+redis.call('EXPIRE', KEYS[3], ARGV[5])
+return {allowed, count}
+"""
+
+
+class RedisCounters:
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.
+
+
+class RedisStats:
+    """
+    Time spent on Redis by the current request. Counters are kept on a context variable, so every thread, greenlet
+    (greenlet 0.4.17 or newer) and asyncio task gets its own. Tasks created by a task share its counters
+    """
+    def __init__(self):
+        self._counters = ContextVar('redis_counters', default=None)
+
+    def _get_counters(self) -> RedisCounters:
+        counters = self._counters.get()
+        if counters is None:
+            counters = RedisCounters()
+            self._counters.set(counters)
+        return counters
+
+    @property
+    def calls(self) -> int:
+        return self._get_counters().calls
+
+    @property
+    def time(self) -> float:
+        return self._get_counters().time
+
+    def reset(self):
+        self._counters.set(RedisCounters())
+
+    def add(self, elapsed: float, calls: int = 1):
+        counters = self._get_counters()
+        counters.calls += calls
+        counters.time += elapsed
+
+    @contextmanager
+    def measure(self, calls: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(time.perf_counter() - start, calls=calls)
+
+
+redis_stats = RedisStats()
+
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        with redis_stats.measure():
+            return super().execute(raise_on_error=raise_on_error)
+
+
+class InstrumentedRedis(Redis):
+    """
+    Redis client that accounts every command and pipeline on `redis_stats`
+    """
+    def execute_command(self, *args, **options):
+        with redis_stats.measure():
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
 
 
 class RedisRepository:
+    """
+    Process wide access to Redis. Every caller shares one client and a bounded connection pool. When every
+    connection is in use callers wait for a free one up to `REDIS_POOL_TIMEOUT` seconds instead of opening
+    more connections
+    """
     def __new__(cls):
         if not hasattr(cls, 'instance'):
-            cls.instance = super().__new__(cls)
+            cls.instance = cls.from_connection_pool(
+                BlockingConnectionPool.from_url(settings.REDIS_URL,
+                                                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                                                timeout=settings.REDIS_POOL_TIMEOUT)
+            )
         return cls.instance
 
-    def __init__(self):
-        self.redis = Redis.from_url(settings.REDIS_URL)
+    @classmethod
+    def from_connection_pool(cls, connection_pool: ConnectionPool) -> 'RedisRepository':
+        """
+        Create a repository not bound to `REDIS_URL`, e.g. to use a fake Redis server. It can be used as the
+        singleton setting `RedisRepository.instance`
+        """
+        instance = super().__new__(cls)
+        instance.connection_pool = connection_pool
+        instance.redis = InstrumentedRedis(connection_pool=connection_pool)
+        instance.batch_size = settings.REDIS_BATCH_SIZE
+        instance.incr_with_ttl_script = instance.redis.register_script(INCR_WITH_TTL_SCRIPT)
+        instance.compare_and_set_script = instance.redis.register_script(COMPARE_AND_SET_SCRIPT)
+        instance.sliding_window_script = instance.redis.register_script(SLIDING_WINDOW_SCRIPT)
+        return instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            cls.instance.connection_pool.disconnect()
+            del cls.instance
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """
+        :return: Values for `keys` in the same order, `None` if key is not found. One `MGET` is sent per
+        `REDIS_BATCH_SIZE` keys, all of them in the same pipeline
+        """
+        if not keys:
+            return []
+        pipe = self.redis.pipeline(transaction=False)
+        for keys_chunk in chunks(keys, self.batch_size):
+            pipe.mget(keys_chunk)
+        return [value for values in pipe.execute() for value in values]
+
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None):
+        """
+        Set every key of `mapping` in just one round trip
+        :param ttl: Expiration in seconds for every key. If not provided keys don't expire
+        """
+        if not mapping:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        if ttl:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ttl)
+        else:
+            for keys_chunk in chunks(list(mapping), self.batch_size):
+                pipe.mset({key: mapping[key] for key in keys_chunk})
+        pipe.execute()
+
+    def delete_many(self, keys: Sequence[str]) -> int:
+        """
+        :return: Number of keys deleted
+        """
+        if not keys:
+            return 0
+        pipe = self.redis.pipeline(transaction=False)
+        for keys_chunk in chunks(keys, self.batch_size):
+            pipe.delete(*keys_chunk)
+        return sum(pipe.execute())
+
+    def incr_with_ttl(self, key: str, amount: int = 1, ttl: int = 60) -> int:
+        """
+        Atomic counter that expires `ttl` seconds after being created
+        :return: Value of the counter after increment
+        """
+        return self.incr_with_ttl_script(keys=[key], args=[amount, ttl])
+
+    def compare_and_set(self, key: str, expected: Any, value: Any) -> bool:
+        """
+        Atomically set `key` to `value` only if current value is `expected`. Ttl of the key is kept
+        :return: `True` if value was set, `False` otherwise
+        """
+        return bool(self.compare_and_set_script(keys=[key], args=[expected, value]))
+
+    def incr_sliding_window(self, key: str, limit: int, window: int, usage_key: str, usage_field: str,
+                            usage_ttl: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        """
+        Count a request on a sliding window of `window` seconds if there were less than `limit` on it, and add it to
+        field `usage_field` (or `<usage_field>:rejected`) of hash `usage_key`. Everything is done in one round trip
+        :param key: Prefix of the counters of every fixed window, `<key>:<window number>`
+        :param usage_ttl: Seconds to keep the usage hash after its last update
+        :param now: Epoch seconds, current time by default
+        :return: If request is allowed and the requests on the window before this one
+        """
+        window_number, elapsed = divmod(time.time() if now is None else now, window)
+        allowed, count = self.sliding_window_script(
+            keys=['%s:%d' % (key, window_number), '%s:%d' % (key, window_number - 1), usage_key],
+            args=[limit, window, 1 - elapsed / window, usage_field, usage_ttl]
+        )
+        return bool(allowed), count
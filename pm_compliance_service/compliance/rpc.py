@@ -0,0 +1,175 @@
+import itertools
+import time
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from .utils import chunks
+
+logger = getLogger(__name__)
+
+# JSON-RPC errors caused by the request itself, retrying them would fail again
+NOT_RETRYABLE_ERROR_CODES = {
+    -32700,  # Parse error
+    -32600,  # Invalid request
+    -32601,  # Method not found
+    -32602,  # Invalid params
+}
+
+
+class JsonRpcError(Exception):
+    def __init__(self, code: Optional[int], message: str, data: Any = None):
+        super().__init__(code, message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+    @property
+    def retryable(self) -> bool:
+        return self.code not in NOT_RETRYABLE_ERROR_CODES
+
+
+class JsonRpcBatchError(Exception):
+    def __init__(self, errors: Dict[int, JsonRpcError], results: List[Any]):
+        """
+        :param errors: Errors by position of the call in the batch
+        :param results: Results of the batch, `None` for the calls that failed
+        """
+        super().__init__('%d calls of the batch failed' % len(errors))
+        self.errors = errors
+        self.results = results
+
+
+class JsonRpcBatchTransportProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            from django.conf import settings
+            cls.instance = JsonRpcBatchTransport(settings.ETHEREUM_NODE_URL,
+                                                 settings.ETHEREUM_RPC_BATCH_SIZE,
+                                                 max_retries=settings.ETHEREUM_RPC_MAX_RETRIES,
+                                                 timeout=settings.ETHEREUM_RPC_TIMEOUT,
+                                                 pool_size=settings.ETHEREUM_RPC_POOL_SIZE)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class JsonRpcBatchTransport:
+    """
+    Sends JSON-RPC calls to the node in batches over a persistent keep-alive session. If some calls of a batch
+    fail, only those calls are retried
+    """
+    def __init__(self, node_url: str, batch_size: int, max_retries: int = 3, retry_backoff: float = 0.5,
+                 timeout: int = 10, pool_size: int = 10, session: Optional[Any] = None):
+        """
+        :param batch_size: Max calls sent on the same HTTP request
+        :param max_retries: Max retries for the calls that failed
+        :param retry_backoff: Seconds to wait before the first retry, doubled for every retry
+        :param timeout: Seconds to wait for the node to answer a batch
+        :param pool_size: Max keep-alive connections to the node
+        :param session: Object with the `requests.Session.post` interface. If not provided, a `requests.Session`
+        is created
+        """
+        self.node_url = node_url
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.session = session or self._create_session(pool_size)
+        self._request_ids = itertools.count(1)
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _send(self, payload: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        response = self.session.post(self.node_url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        responses = response.json()
+        if isinstance(responses, dict):  # Node can answer with just one error if the whole batch is not valid
+            error = responses.get('error') or {}
+            raise JsonRpcError(error.get('code'), error.get('message', 'Invalid batch response'), error.get('data'))
+        return responses
+
+    def _send_batch(self, calls: Sequence[Tuple[str, Sequence[Any]]], positions: Sequence[int],
+                    results: List[Any], errors: Dict[int, JsonRpcError]) -> List[int]:
+        """
+        Send the calls on `positions`, storing successful results on `results` and failures on `errors`
+        :return: Positions of the calls that failed and can be retried
+        """
+        ids = {}
+        payload = []
+        for position in positions:
+            request_id = next(self._request_ids)
+            ids[request_id] = position
+            method, params = calls[position]
+            payload.append({'jsonrpc': '2.0', 'method': method, 'params': list(params), 'id': request_id})
+
+        try:
+            responses = self._send(payload)
+        except (RequestException, ValueError, JsonRpcError) as e:
+            error = e if isinstance(e, JsonRpcError) else JsonRpcError(None, str(e))
+            logger.warning('Batch of %d calls failed: %s', len(positions), error)
+            errors.update({position: error for position in positions})
+            return list(positions) if error.retryable else []
+
+        pending = set(positions)
+        for response in responses:
+            position = ids.get(response.get('id'))
+            if position is None:
+                continue
+            pending.discard(position)
+            if 'error' in response:
+                error = response['error']
+                errors[position] = JsonRpcError(error.get('code'), error.get('message', ''), error.get('data'))
+            else:
+                results[position] = response.get('result')
+                errors.pop(position, None)
+
+        for position in pending:  # Calls not answered by the node
+            errors[position] = JsonRpcError(None, 'No response for call')
+        return [position for position in positions if position in errors and errors[position].retryable]
+
+    def batch(self, calls: Sequence[Tuple[str, Sequence[Any]]], raise_on_error: bool = True) -> List[Any]:
+        """
+        :param calls: Tuples of method and params
+        :param raise_on_error: If `True`, raise `JsonRpcBatchError` if any call keeps failing after retries.
+        If `False`, failed calls get a `JsonRpcError` as result
+        :return: Result of every call in the same order
+        """
+        results = [None] * len(calls)
+        errors = {}
+        pending = list(range(len(calls)))
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                logger.info('Retrying %d failed calls, attempt %d', len(pending), attempt)
+            failed = []
+            for positions in chunks(pending, self.batch_size):
+                failed.extend(self._send_batch(calls, positions, results, errors))
+            pending = failed
+            if not pending:
+                break
+
+        if errors:
+            if raise_on_error:
+                raise JsonRpcBatchError(errors, results)
+            for position, error in errors.items():
+                results[position] = error
+        return results
+
+    def call(self, method: str, params: Sequence[Any]) -> Any:
+        try:
+            return self.batch([(method, params)])[0]
+        except JsonRpcBatchError as e:
+            raise e.errors[0]
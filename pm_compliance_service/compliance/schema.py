@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import io
+import os
+from logging import getLogger
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.views import View
+
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework.response import Response
+
+logger = getLogger(__name__)
+
+SCHEMA_INFO = openapi.Info(
+    title='Gnosis PM Compliance API',
+    default_version='v1',
+    description='API to manage complianceing of Prediction markets users',
+    license=openapi.License(name='MIT License'),
+)
+SCHEMA_VALIDATORS = ['flex', 'ssv']
+
+# Format of the schema url and the content type of every schema file
+SCHEMA_FILES = {
+    '.json': ('swagger.json', 'application/json'),
+    '.yaml': ('swagger.yaml', 'application/yaml'),
+}
+
+# Schema is generated on every request, only used to build the schema files and if they were not built
+schema_view = get_schema_view(
+    SCHEMA_INFO,
+    validators=SCHEMA_VALIDATORS,
+    public=True,
+)
+
+
+class SchemaUIView(schema_view):
+    """
+    Swagger UI and ReDoc pages. Schema is only used for the title of the page, as UIs request the schema file
+    (`SPEC_URL` setting), so it's not generated. It's still generated if requested with `?format=openapi`
+    """
+    def get(self, request, version='', format=None):
+        if not isinstance(request.accepted_renderer, (SwaggerUIRenderer, ReDocRenderer)):
+            return super().get(request, version=version, format=format)
+        return Response(openapi.Swagger(info=SCHEMA_INFO, _prefix='/', paths=openapi.Paths(paths={})))
+
+
+class SchemaFile(NamedTuple):
+    content: bytes
+    gzip_content: bytes
+    content_type: str
+    etag: str
+
+
+def gzip_compress(data: bytes) -> bytes:
+    """
+    :return: `data` compressed with a fixed mtime, so the same schema always has the same gzip file
+    """
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def build_schema_files(output_dir: str) -> List[str]:
+    """
+    Generate and validate the schema once, and write it to `output_dir` as JSON and YAML, with gzip variants
+    :return: Paths of the files written
+    """
+    schema = schema_view.generator_class(SCHEMA_INFO).get_schema(request=None, public=True)
+    contents = {
+        '.json': OpenAPICodecJson(SCHEMA_VALIDATORS).encode(schema),  # Schema is validated only once
+        '.yaml': OpenAPICodecYaml([]).encode(schema),
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for file_format, (file_name, _) in SCHEMA_FILES.items():
+        content = contents[file_format]
+        for path, data in ((os.path.join(output_dir, file_name), content),
+                           (os.path.join(output_dir, file_name + '.gz'), gzip_compress(content))):
+            # Files are replaced atomically, so workers never read a partial schema
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+            paths.append(path)
+    return paths
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    :param accept_encoding: `Accept-Encoding` header of the request
+    :return: If gzip is accepted by name or with `*`, and not refused with `q=0`
+    """
+    qvalues = {}  # type: Dict[str, float]
+    for item in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        qvalue = 1.
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.
+        if coding:
+            qvalues[coding.lower()] = qvalue
+    return qvalues.get('gzip', qvalues.get('x-gzip', qvalues.get('*', 0.))) > 0
+
+
+class SchemaFileView(View):
+    """
+    Serve the schema files written by `build_openapi_schema` command with `ETag` and gzip support. Files are read
+    once per process. If files were not built, schema is generated on every request
+    """
+    schema_files = {}  # type: Dict[str, Optional[SchemaFile]]
+    cache_control = {'public': True, 'max_age': 300}
+
+    @classmethod
+    def get_schema_file(cls, file_format: str) -> Optional[SchemaFile]:
+        if file_format not in cls.schema_files:
+            file_name, content_type = SCHEMA_FILES[file_format]
+            path = os.path.join(settings.OPENAPI_SCHEMA_DIR, file_name)
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+                with open(path + '.gz', 'rb') as f:
+                    gzip_content = f.read()
+                cls.schema_files[file_format] = SchemaFile(content, gzip_content, content_type,
+                                                           hashlib.sha1(content).hexdigest())
+            except FileNotFoundError:
+                logger.warning('Schema file %s not found, run `build_openapi_schema`. Schema will be generated on '
+                               'every request', path)
+                cls.schema_files[file_format] = None
+        return cls.schema_files[file_format]
+
+    def get(self, request, format: str):
+        schema_file = self.get_schema_file(format)
+        if not schema_file:
+            return schema_view.without_ui(cache_timeout=None)(request, format=format)
+
+        use_gzip = accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        # Every encoding must have a different `ETag`
+        etag = '"%s%s"' % (schema_file.etag, '-gzip' if use_gzip else '')
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(schema_file.gzip_content if use_gzip else schema_file.content,
+                                    content_type=schema_file.content_type)
+            if use_gzip:
+                response['Content-Encoding'] = 'gzip'
+        response['ETag'] = etag
+        patch_cache_control(response, **self.cache_control)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
@@ -1,2 +1,123 @@
+from django.conf import settings
+
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+
+from .models import ComplianceStatus, ComplianceStatusType
+
+# Checksum is not required, addresses are only used for lookups
+ADDRESS_REGEX = r'^0x[0-9a-fA-F]{40}$'
+SIGNATURE_REGEX = r'^(0x)?[0-9a-fA-F]{130}$'
+
+
+class AddressesCheckSerializer(serializers.Serializer):
+    addresses = serializers.ListField(child=serializers.RegexField(ADDRESS_REGEX),
+                                      allow_empty=False,
+                                      max_length=settings.ADDRESSES_CHECK_MAX_ADDRESSES)
+
+
+class AddressCheckResultSerializer(serializers.Serializer):
+    address = serializers.CharField()
+    blocked = serializers.BooleanField()
+
+
+class AddressesCheckResponseSerializer(serializers.Serializer):
+    results = AddressCheckResultSerializer(many=True)
+
+
+class AddressStatusResponseSerializer(serializers.Serializer):
+    address = serializers.CharField()
+    status = serializers.CharField(allow_null=True)
+    blocked = serializers.BooleanField()
+    allowed = serializers.BooleanField()
+
+
+class StatusCacheStatsResponseSerializer(serializers.Serializer):
+    pid = serializers.IntegerField()
+    local_size = serializers.IntegerField()
+    local_max_size = serializers.IntegerField()
+    local_hits = serializers.IntegerField()
+    local_misses = serializers.IntegerField()
+    shared_hits = serializers.IntegerField()
+    shared_misses = serializers.IntegerField()
+    evictions = serializers.IntegerField()
+    invalidations = serializers.IntegerField()
+
+
+class TokenUsageSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    requests = serializers.IntegerField()
+    rejected = serializers.IntegerField()
+
+
+class TokenUsageResponseSerializer(serializers.Serializer):
+    quota = serializers.IntegerField()
+    window = serializers.IntegerField()
+    usage = TokenUsageSerializer(many=True)
+
+
+class SignatureSerializer(serializers.Serializer):
+    message = serializers.CharField(trim_whitespace=False)
+    signature = serializers.RegexField(SIGNATURE_REGEX)
+    address = serializers.RegexField(ADDRESS_REGEX, required=False)
+
+
+class SignaturesVerifySerializer(serializers.Serializer):
+    signatures = SignatureSerializer(many=True, allow_empty=False)
+
+    def validate_signatures(self, value):
+        if len(value) > settings.SIGNATURE_VERIFICATION_MAX_SIGNATURES:
+            raise ValidationError('No more than %d signatures can be verified at once' %
+                                  settings.SIGNATURE_VERIFICATION_MAX_SIGNATURES)
+        return value
+
+
+class SignatureVerifyResultSerializer(serializers.Serializer):
+    recovered_address = serializers.CharField(allow_null=True)
+    valid = serializers.BooleanField()
+
+
+class SignaturesVerifyResponseSerializer(serializers.Serializer):
+    results = SignatureVerifyResultSerializer(many=True)
+
+
+class SafesOwnersSerializer(serializers.Serializer):
+    safes = serializers.ListField(child=serializers.RegexField(ADDRESS_REGEX),
+                                  allow_empty=False,
+                                  max_length=settings.ADDRESSES_CHECK_MAX_ADDRESSES)
+
+
+class SafeOwnerResultSerializer(serializers.Serializer):
+    safe = serializers.CharField()
+    owner = serializers.CharField(allow_null=True)
+    status = serializers.CharField(allow_null=True)
+    verified = serializers.BooleanField()
+
+
+class SafesOwnersResponseSerializer(serializers.Serializer):
+    results = SafeOwnerResultSerializer(many=True)
+
+
+class StatusesImportSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text='CSV with rows of `address[,email]`, header is optional')
+    status = serializers.ChoiceField(choices=[tag.name for tag in ComplianceStatusType],
+                                     default=ComplianceStatusType.VERIFIED.name)
+
+
+class StatusesImportResponseSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    invalid_rows = serializers.IntegerField()
+    changed = serializers.IntegerField()
+    seconds = serializers.FloatField()
+    rows_per_second = serializers.FloatField()
+
+
+class ComplianceStatusSerializer(serializers.ModelSerializer):
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ComplianceStatus
+        fields = ('address', 'status', 'created', 'modified')
+
+    def get_status(self, obj: ComplianceStatus) -> str:
+        return ComplianceStatusType(obj.status).name
@@ -1,9 +1,37 @@
-from .erc20_events_service import (Erc20EventsService,
-                                   Erc20EventsServiceProvider)
-from .funding_service import FundingService, FundingServiceProvider
-from .internal_tx_service import InternalTxService, InternalTxServiceProvider
-from .notification_service import (NotificationService,
-                                   NotificationServiceProvider)
-from .safe_creation_service import (SafeCreationService,
-                                    SafeCreationServiceProvider)
-from .transaction_service import TransactionService, TransactionServiceProvider
+"""
+Services are imported on first use (PEP 562), so processes only load the chain libraries (`web3`, `ethereum`,
+`eth_account`, `numpy`...) of the services they use
+"""
+import importlib
+
+# Module of every exported name
+_SERVICE_MODULES = {
+    'Erc20EventsService': 'erc20_events_service',
+    'Erc20EventsServiceProvider': 'erc20_events_service',
+    'FundingService': 'funding_service',
+    'FundingServiceProvider': 'funding_service',
+    'InternalTxService': 'internal_tx_service',
+    'InternalTxServiceProvider': 'internal_tx_service',
+    'NotificationService': 'notification_service',
+    'NotificationServiceProvider': 'notification_service',
+    'RescreeningService': 'rescreening_service',
+    'RescreeningServiceProvider': 'rescreening_service',
+    'SafeCreationService': 'safe_creation_service',
+    'SafeCreationServiceProvider': 'safe_creation_service',
+    'TransactionService': 'transaction_service',
+    'TransactionServiceProvider': 'transaction_service',
+}
+
+__all__ = list(_SERVICE_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _SERVICE_MODULES:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    value = getattr(importlib.import_module('.' + _SERVICE_MODULES[name], __name__), name)
+    globals()[name] = value  # Next lookups don't go through `__getattr__`
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,193 @@
+import re
+import time
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db import transaction
+
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+from requests.exceptions import Timeout
+
+from gnosis.eth import EthereumClient, EthereumClientProvider
+
+from ..models import Erc20EventsCheckpoint, Erc20Transfer
+from ..utils import chunks
+
+logger = getLogger(__name__)
+
+# Errors returned by nodes (Infura, Geth, Parity, Alchemy...) when a `eth_getLogs` range is too big to be served
+RANGE_TOO_BIG_REGEX = re.compile(r'more than|too many|size exceeded|limit exceeded|timeout|timed out', re.IGNORECASE)
+
+
+class Erc20EventsServiceException(Exception):
+    pass
+
+
+class Erc20EventsServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            from django.conf import settings
+            cls.instance = Erc20EventsService(EthereumClientProvider(),
+                                              settings.ERC20_EVENTS_CONFIRMATIONS,
+                                              settings.ERC20_EVENTS_INITIAL_BLOCK_RANGE,
+                                              settings.ERC20_EVENTS_MAX_BLOCK_RANGE,
+                                              settings.ERC20_EVENTS_TOKENS_PER_QUERY,
+                                              settings.ERC20_EVENTS_TARGET_QUERY_SECONDS)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class Erc20EventsService:
+    """
+    Resumable indexer of ERC20 `Transfer` events. Logs are requested in block ranges that grow while the node
+    answers fast and shrink when the node refuses the range (too many results or timeout). After every range
+    transfers are stored and the checkpoint of every token is moved forward in the same transaction, so indexing
+    is resumed from the last checkpoint after a restart
+    """
+    TRANSFER_TOPIC = HexBytes(keccak(text='Transfer(address,address,uint256)'))
+
+    def __init__(self, ethereum_client: EthereumClient, confirmations: int, initial_block_range: int,
+                 max_block_range: int, tokens_per_query: int, target_query_seconds: float):
+        """
+        :param confirmations: Blocks not indexed from the head of the chain to prevent reorgs
+        :param initial_block_range: Blocks requested on the first `eth_getLogs`
+        :param max_block_range: Range will never grow over this number of blocks
+        :param tokens_per_query: Tokens whose logs are requested on the same `eth_getLogs`
+        :param target_query_seconds: Range only grows if the node answered in less time
+        """
+        self.ethereum_client = ethereum_client
+        self.w3 = ethereum_client.w3
+        self.confirmations = confirmations
+        self.block_range = initial_block_range
+        self.max_block_range = max_block_range
+        self.block_range_ceiling = max_block_range  # Lowered when node refuses a range
+        self.tokens_per_query = tokens_per_query
+        self.target_query_seconds = target_query_seconds
+
+    @staticmethod
+    def is_range_too_big(exception: Exception) -> bool:
+        """
+        :return: `True` if node failed because of the size of the range, so it should be retried with a smaller one
+        """
+        if isinstance(exception, Timeout):
+            return True
+        return isinstance(exception, ValueError) and bool(RANGE_TOO_BIG_REGEX.search(str(exception)))
+
+    def _grow_block_range(self):
+        if self.block_range < self.block_range_ceiling:
+            self.block_range = min(self.block_range * 2, self.block_range_ceiling)
+        else:
+            # Ranges refused before are probed again slowly, as node could have been just overloaded
+            self.block_range = self.block_range_ceiling = min(self.block_range + max(self.block_range // 10, 1),
+                                                              self.max_block_range)
+
+    def _shrink_block_range(self, failed_block_range: int):
+        """
+        :param failed_block_range: Blocks of the range refused by the node, less than `block_range` at the end of
+        the range to index
+        """
+        self.block_range = self.block_range_ceiling = max(failed_block_range // 2, 1)
+
+    def add_tokens(self, token_addresses: Sequence[str], from_block: int = 0) -> int:
+        """
+        Start indexing tokens. Tokens already being indexed are not modified
+        :param from_block: First block to index, usually the block when token was deployed
+        :return: Number of tokens added
+        """
+        checkpoints = [Erc20EventsCheckpoint(token_address=to_checksum_address(token_address), block_number=from_block)
+                       for token_address in token_addresses]
+        existing = set(Erc20EventsCheckpoint.objects.filter(token_address__in=[checkpoint.token_address
+                                                                               for checkpoint in checkpoints]
+                                                            ).values_list('token_address', flat=True))
+        Erc20EventsCheckpoint.objects.bulk_create([checkpoint for checkpoint in checkpoints
+                                                   if checkpoint.token_address not in existing],
+                                                  ignore_conflicts=True)
+        return len(checkpoints) - len(existing)
+
+    def get_transfer_logs(self, token_addresses: Sequence[str], from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        return self.w3.eth.getLogs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': list(token_addresses),
+            'topics': [self.TRANSFER_TOPIC.hex()],
+        })
+
+    @staticmethod
+    def decode_transfer(log: Dict[str, Any]) -> Optional[Erc20Transfer]:
+        """
+        :return: Transfer, `None` if log is not an ERC20 transfer (ERC721 uses the same topic with 3 indexed fields)
+        """
+        topics = log['topics']
+        data = HexBytes(log['data'])
+        if len(topics) != 3 or not data:
+            return None
+        return Erc20Transfer(token_address=to_checksum_address(log['address']),
+                             _from=to_checksum_address(HexBytes(topics[1])[-20:]),
+                             to=to_checksum_address(HexBytes(topics[2])[-20:]),
+                             value=int.from_bytes(data, byteorder='big'),
+                             block_number=log['blockNumber'],
+                             transaction_hash=HexBytes(log['transactionHash']).hex(),
+                             log_index=log['logIndex'])
+
+    def _index_tokens(self, token_addresses: Sequence[str], from_block: int, to_block: int) -> int:
+        """
+        Index tokens from `from_block` to `to_block`, adapting the block range to the node responses
+        :return: Number of transfers indexed
+        """
+        transfers_count = 0
+        while from_block <= to_block:
+            range_to_block = min(from_block + self.block_range - 1, to_block)
+            start = time.monotonic()
+            try:
+                logs = self.get_transfer_logs(token_addresses, from_block, range_to_block)
+            except (Timeout, ValueError) as e:
+                failed_block_range = range_to_block - from_block + 1
+                if not self.is_range_too_big(e) or failed_block_range == 1:
+                    raise Erc20EventsServiceException('Cannot get logs from block %d to %d' %
+                                                      (from_block, range_to_block)) from e
+                self._shrink_block_range(failed_block_range)
+                logger.info('Range too big, reducing to %d blocks: %s', self.block_range, e)
+                continue
+            elapsed = time.monotonic() - start
+
+            transfers = [transfer for transfer in map(self.decode_transfer, logs) if transfer]
+            with transaction.atomic():
+                Erc20Transfer.objects.bulk_create(transfers, ignore_conflicts=True)
+                # Tokens indexed on a previous run can be ahead of the rest of the group
+                Erc20EventsCheckpoint.objects.filter(token_address__in=token_addresses,
+                                                     block_number__lte=range_to_block
+                                                     ).update(block_number=range_to_block + 1)
+            transfers_count += len(transfers)
+            logger.debug('Indexed %d transfers from block %d to %d in %.2f seconds',
+                         len(transfers), from_block, range_to_block, elapsed)
+
+            from_block = range_to_block + 1
+            if elapsed < self.target_query_seconds:
+                self._grow_block_range()
+        return transfers_count
+
+    def index(self, token_addresses: Optional[Sequence[str]] = None) -> int:
+        """
+        Index tokens from their checkpoints to the last confirmed block
+        :param token_addresses: Tokens to index. If not provided, every token with a checkpoint is indexed
+        :return: Number of transfers indexed
+        """
+        to_block = self.w3.eth.blockNumber - self.confirmations
+        checkpoints = Erc20EventsCheckpoint.objects.filter(block_number__lte=to_block).order_by('block_number')
+        if token_addresses is not None:
+            checkpoints = checkpoints.filter(token_address__in=[to_checksum_address(token_address)
+                                                                for token_address in token_addresses])
+
+        transfers_count = 0
+        # Tokens are sorted by checkpoint, so tokens on the same query are close to each other
+        for checkpoints_chunk in chunks(list(checkpoints.values_list('token_address', 'block_number')),
+                                        self.tokens_per_query):
+            token_addresses_chunk = [token_address for token_address, _ in checkpoints_chunk]
+            from_block = min(block_number for _, block_number in checkpoints_chunk)
+            transfers_count += self._index_tokens(token_addresses_chunk, from_block, to_block)
+        return transfers_count
@@ -1,5 +1,196 @@
 from logging import getLogger
+from typing import List, Optional, Sequence, Tuple
 
 from django.conf import settings
+from django.core.cache import cache
 
-from eth_account import Account
\ No newline at end of file
+from eth_account import Account
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from gnosis.eth import EthereumClient, EthereumClientProvider
+
+from ..repositories.redis_repository import RedisRepository
+from ..rpc import (JsonRpcBatchTransport, JsonRpcBatchTransportProvider,
+                   JsonRpcError)
+
+logger = getLogger(__name__)
+
+# KEYS[1] - nonce key, ARGV[1] - nonces to reserve, ARGV[2] - nonce on chain (-1 if unknown), ARGV[3] - ttl
+# Returns first nonce reserved, or nil if nonce is not known and must be requested to the node
+RESERVE_NONCES_SCRIPT = """
+local chain_nonce = tonumber(ARGV[2])
+local next_nonce = tonumber(redis.call('GET', KEYS[1]))
+if next_nonce == nil or chain_nonce > next_nonce then
+    if chain_nonce < 0 then
+        return nil
+    end
+    next_nonce = chain_nonce
+end
+redis.call('SET', KEYS[1], next_nonce + tonumber(ARGV[1]), 'EX', ARGV[3])
+return next_nonce
+"""
+
+# Errors returned by nodes when a transaction was already sent (e.g. a retry of a batch)
+ALREADY_KNOWN_ERRORS = ('known transaction', 'already known', 'already imported')
+
+
+class FundingServiceException(Exception):
+    pass
+
+
+class EtherLimitExceeded(FundingServiceException):
+    pass
+
+
+class FundingBatchException(FundingServiceException):
+    def __init__(self, message: str, tx_hashes: List[Optional[HexBytes]]):
+        """
+        :param tx_hashes: Tx hashes of the batch in order, `None` for transactions not sent
+        """
+        super().__init__(message)
+        self.tx_hashes = tx_hashes
+
+
+class FundingServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = FundingService(EthereumClientProvider(),
+                                          JsonRpcBatchTransportProvider(),
+                                          settings.FUNDING_ACCOUNT_PRIVATE_KEY,
+                                          settings.FUNDING_MAX_ETH,
+                                          settings.FUNDING_GAS_PRICE_CACHE_TTL,
+                                          chain_id=settings.FUNDING_CHAIN_ID)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class NonceManager:
+    """
+    Nonces of an account shared through Redis, so concurrent workers sending from the same account never get the
+    same nonce. Node is only asked for the nonce when Redis does not know it
+    """
+    def __init__(self, ethereum_client: EthereumClient, address: str, ttl: int = 60 * 60):
+        """
+        :param ttl: Seconds to keep the nonce on Redis without being used. After that, it's requested to the node
+        """
+        self.w3 = ethereum_client.w3
+        self.address = address
+        self.ttl = ttl
+        self.key = 'nonce:' + address
+        self.redis = RedisRepository().redis
+        self.reserve_nonces_script = self.redis.register_script(RESERVE_NONCES_SCRIPT)
+
+    def reserve(self, count: int = 1) -> List[int]:
+        """
+        :return: `count` consecutive nonces, not returned to any other caller
+        """
+        first_nonce = self.reserve_nonces_script(keys=[self.key], args=[count, -1, self.ttl])
+        if first_nonce is None:
+            chain_nonce = self.w3.eth.getTransactionCount(self.address, 'pending')
+            first_nonce = self.reserve_nonces_script(keys=[self.key], args=[count, chain_nonce, self.ttl])
+        return list(range(first_nonce, first_nonce + count))
+
+    def reset(self):
+        """
+        Forget the nonce, so it's requested again to the node. Must be called when a transaction with a reserved
+        nonce was not sent, otherwise next transactions would be stuck
+        """
+        self.redis.delete(self.key)
+
+
+class FundingService:
+    """
+    Send ether from the funder account. Batches of transactions use consecutive nonces reserved at once, are signed
+    locally and sent to the node in a single JSON-RPC batch
+    """
+    GAS_PRICE_CACHE_KEY = 'funding:gas-price'
+    ETHER_TRANSFER_GAS = 21000
+
+    def __init__(self, ethereum_client: EthereumClient, transport: JsonRpcBatchTransport, funder_private_key: str,
+                 max_eth_to_send: float, gas_price_cache_ttl: int, chain_id: Optional[int] = None):
+        """
+        :param max_eth_to_send: Max ether sent on every transaction
+        :param gas_price_cache_ttl: Seconds to reuse the gas price returned by the node
+        :param chain_id: Used for EIP155 signatures if provided
+        """
+        self.ethereum_client = ethereum_client
+        self.w3 = ethereum_client.w3
+        self.transport = transport
+        self.funder_account = Account.privateKeyToAccount(funder_private_key)
+        self.max_eth_to_send = max_eth_to_send
+        self.gas_price_cache_ttl = gas_price_cache_ttl
+        self.chain_id = chain_id
+        self.nonce_manager = NonceManager(ethereum_client, self.funder_account.address)
+
+    def get_gas_price(self) -> int:
+        gas_price = cache.get(self.GAS_PRICE_CACHE_KEY)
+        if gas_price is None:
+            gas_price = self.w3.eth.gasPrice
+            cache.set(self.GAS_PRICE_CACHE_KEY, gas_price, timeout=self.gas_price_cache_ttl)
+        return gas_price
+
+    def sign_ether_transfers(self, transfers: Sequence[Tuple[str, int]]) -> List[HexBytes]:
+        """
+        :param transfers: Tuples of address and wei
+        :return: Raw signed transactions
+        """
+        max_wei = self.w3.toWei(self.max_eth_to_send, 'ether')
+        for to, value in transfers:
+            if value > max_wei:
+                raise EtherLimitExceeded('%d is bigger than %f ether' % (value, self.max_eth_to_send))
+
+        gas_price = self.get_gas_price()
+        nonces = self.nonce_manager.reserve(len(transfers))
+        raw_transactions = []
+        for (to, value), nonce in zip(transfers, nonces):
+            tx = {
+                'to': to,
+                'value': value,
+                'gas': self.ETHER_TRANSFER_GAS,
+                'gasPrice': gas_price,
+                'nonce': nonce,
+            }
+            if self.chain_id:
+                tx['chainId'] = self.chain_id
+            raw_transactions.append(self.funder_account.signTransaction(tx).rawTransaction)
+        return raw_transactions
+
+    def send_eth_to_many(self, transfers: Sequence[Tuple[str, int]]) -> List[HexBytes]:
+        """
+        Send ether to many addresses back to back
+        :param transfers: Tuples of address and wei
+        :return: Tx hashes in the same order
+        """
+        if not transfers:
+            return []
+        raw_transactions = self.sign_ether_transfers(transfers)
+        results = self.transport.batch([('eth_sendRawTransaction', [HexBytes(raw_transaction).hex()])
+                                        for raw_transaction in raw_transactions], raise_on_error=False)
+
+        tx_hashes = []
+        for raw_transaction, result in zip(raw_transactions, results):
+            if isinstance(result, JsonRpcError) and not any(error in result.message.lower()
+                                                            for error in ALREADY_KNOWN_ERRORS):
+                logger.error('Cannot send funding transaction: %s', result)
+                tx_hashes.append(None)
+            else:
+                tx_hashes.append(HexBytes(keccak(raw_transaction)))
+
+        failed = tx_hashes.count(None)
+        if failed:
+            # Nonces of failed transactions were not used, so next transactions would get stuck
+            self.nonce_manager.reset()
+            raise FundingBatchException('%d of %d funding transactions failed' % (failed, len(transfers)), tx_hashes)
+        return tx_hashes
+
+    def send_eth_to(self, to: str, value: int) -> HexBytes:
+        """
+        :param value: Wei to send
+        :return: Tx hash
+        """
+        return self.send_eth_to_many([(to, value)])[0]
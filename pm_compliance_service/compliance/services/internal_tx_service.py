@@ -0,0 +1,216 @@
+import hashlib
+import itertools
+import json
+import queue
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from logging import getLogger
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple, Union)
+
+from hexbytes import HexBytes
+
+from ..repositories.redis_repository import RedisRepository
+from ..rpc import JsonRpcBatchTransport
+
+logger = getLogger(__name__)
+
+Trace = Dict[str, Any]
+TxHash = Union[str, bytes]
+
+
+class InternalTxServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            from django.conf import settings
+            from django.core.exceptions import ImproperlyConfigured
+            if not settings.ETHEREUM_TRACING_NODE_URLS:
+                raise ImproperlyConfigured('ETHEREUM_TRACING_NODE_URLS must have at least one node with trace '
+                                           'methods enabled')
+            transports = [JsonRpcBatchTransport(node_url, 1,
+                                                max_retries=settings.ETHEREUM_RPC_MAX_RETRIES,
+                                                timeout=settings.INTERNAL_TX_TRACE_TIMEOUT,
+                                                pool_size=settings.INTERNAL_TX_MAX_CONCURRENCY_PER_NODE)
+                          for node_url in settings.ETHEREUM_TRACING_NODE_URLS]
+            cls.instance = InternalTxService(transports,
+                                             settings.INTERNAL_TX_MAX_WORKERS,
+                                             settings.INTERNAL_TX_MAX_CONCURRENCY_PER_NODE,
+                                             settings.INTERNAL_TX_CONFIRMATIONS,
+                                             settings.INTERNAL_TX_BLOCKS_PER_FILTER)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            cls.instance.executor.shutdown(wait=False)
+            del cls.instance
+
+
+class TracingNodes:
+    """
+    Tracing nodes with a limit of concurrent requests for every node, tracing is expensive and nodes stall when
+    they get too many. Every node has `max_concurrency` slots on a queue of free slots, so a request is sent to the
+    first node with a free slot and waits only if every node is saturated
+    """
+    def __init__(self, transports: Sequence[JsonRpcBatchTransport], max_concurrency: int):
+        if not transports:
+            raise ValueError('At least one tracing node is required')
+        self.transports = list(transports)
+        self._free_slots = queue.Queue()
+        for _ in range(max_concurrency):
+            for transport in self.transports:  # Interleaved, so requests are spread between the nodes
+                self._free_slots.put(transport)
+
+    def call(self, method: str, params: Sequence[Any]) -> Any:
+        transport = self._free_slots.get()
+        try:
+            return transport.call(method, params)
+        finally:
+            self._free_slots.put(transport)
+
+
+class InternalTxService:
+    """
+    Trace internal transactions using a bounded pool of threads, as tracing is latency bound. Requests are spread
+    between the tracing nodes without exceeding the concurrency limit of every node. Traces of finalized blocks
+    never change, so they are cached on Redis without expiration
+    """
+    def __init__(self, transports: Sequence[JsonRpcBatchTransport], max_workers: int, max_concurrency_per_node: int,
+                 confirmations: int, blocks_per_filter: int):
+        """
+        :param transports: One transport for every tracing node
+        :param max_workers: Max traces requested at the same time
+        :param max_concurrency_per_node: Max traces requested at the same time to the same node
+        :param confirmations: Blocks from the head of the chain considered finalized
+        :param blocks_per_filter: Blocks requested on every `trace_filter`
+        """
+        self.nodes = TracingNodes(transports, max_concurrency_per_node)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='internal-tx')
+        self.confirmations = confirmations
+        self.blocks_per_filter = blocks_per_filter
+        self.redis = RedisRepository()
+        self._finalized_block_number = (0, 0.)  # Block number and when it was requested
+
+    def _call(self, method: str, params: Sequence[Any]) -> Any:
+        return self.nodes.call(method, params)
+
+    def get_finalized_block_number(self) -> int:
+        """
+        :return: Last finalized block. Node is asked at most once per second
+        """
+        block_number, requested_at = self._finalized_block_number
+        if time.monotonic() - requested_at >= 1:
+            block_number = int(self._call('eth_blockNumber', []), 16) - self.confirmations
+            self._finalized_block_number = (block_number, time.monotonic())
+        return block_number
+
+    @staticmethod
+    def _get_trace_transaction_key(tx_hash: str) -> str:
+        return 'trace-transaction:' + tx_hash
+
+    @staticmethod
+    def _get_trace_filter_key(params: Dict[str, Any]) -> str:
+        return 'trace-filter:' + hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def _iter_completed(self, function: Callable[[Any], Any], items: Sequence[Any],
+                        ordered: bool) -> Iterator[Tuple[Any, Any]]:
+        """
+        Run `function` for every item on the pool, with at most `2 * max_workers` items pending at the same time
+        :param ordered: If `True` results are yielded in the same order as `items`, otherwise as they are completed
+        :return: Tuples of item and result
+        """
+        items_iter = iter(items)
+        pending = deque()
+        futures_items = {}  # type: Dict[Future, Any]
+
+        def submit(count: int):
+            for item in itertools.islice(items_iter, count):
+                future = self.executor.submit(function, item)
+                futures_items[future] = item
+                pending.append(future)
+
+        try:
+            submit(self.max_workers * 2)
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    future = next(as_completed(pending))
+                    pending.remove(future)
+                yield futures_items.pop(future), future.result()
+                submit(1)
+        finally:  # Generator can be closed before finishing
+            for future in pending:
+                future.cancel()
+
+    def _cache_finalized(self, key_values: Dict[str, Any], block_numbers: Dict[str, int]):
+        """
+        :param key_values: Values to cache by key
+        :param block_numbers: Highest block involved by key. Only values of finalized blocks are cached
+        """
+        if not key_values:
+            return
+        finalized_block_number = self.get_finalized_block_number()
+        self.redis.set_many({key: json.dumps(value) for key, value in key_values.items()
+                             if block_numbers[key] <= finalized_block_number})
+
+    def trace_transaction(self, tx_hash: str) -> List[Trace]:
+        return self._call('trace_transaction', [tx_hash])
+
+    def iter_traces(self, tx_hashes: Sequence[TxHash]) -> Iterator[Tuple[str, Optional[List[Trace]]]]:
+        """
+        Stream traces as soon as they are available, so processing can start before every transaction is traced
+        :return: Tuples of tx hash and its traces (`None` if transaction is not found), in order of completion
+        """
+        tx_hashes = [HexBytes(tx_hash).hex() for tx_hash in tx_hashes]
+        keys = [self._get_trace_transaction_key(tx_hash) for tx_hash in tx_hashes]
+        missing_tx_hashes = []
+        for tx_hash, cached in zip(tx_hashes, self.redis.get_many(keys)):
+            if cached is None:
+                missing_tx_hashes.append(tx_hash)
+            else:
+                yield tx_hash, json.loads(cached)
+
+        for tx_hash, traces in self._iter_completed(self.trace_transaction, missing_tx_hashes, ordered=False):
+            if traces:
+                key = self._get_trace_transaction_key(tx_hash)
+                self._cache_finalized({key: traces}, {key: max(trace['blockNumber'] for trace in traces)})
+            yield tx_hash, traces
+
+    def get_traces(self, tx_hashes: Sequence[TxHash]) -> List[Optional[List[Trace]]]:
+        """
+        :return: Traces for every tx hash in the same order
+        """
+        traces = dict(self.iter_traces(tx_hashes))
+        return [traces[HexBytes(tx_hash).hex()] for tx_hash in tx_hashes]
+
+    def _trace_filter(self, params: Dict[str, Any]) -> List[Trace]:
+        key = self._get_trace_filter_key(params)
+        cached = self.redis.get_many([key])[0]
+        if cached is not None:
+            return json.loads(cached)
+        traces = self._call('trace_filter', [params])
+        self._cache_finalized({key: traces}, {key: int(params['toBlock'], 16)})
+        return traces
+
+    def iter_filter_traces(self, from_block: int, to_block: int, from_addresses: Optional[Sequence[str]] = None,
+                           to_addresses: Optional[Sequence[str]] = None) -> Iterator[Tuple[int, int, List[Trace]]]:
+        """
+        Stream `trace_filter` results for a block range. Range is split in ranges of `blocks_per_filter` blocks that
+        are traced in parallel, and yielded in block order as soon as they are available
+        :return: Tuples of first block, last block and traces for every sub range
+        """
+        filters = []
+        for range_from_block in range(from_block, to_block + 1, self.blocks_per_filter):
+            params = {'fromBlock': hex(range_from_block),
+                      'toBlock': hex(min(range_from_block + self.blocks_per_filter - 1, to_block))}
+            if from_addresses:
+                params['fromAddress'] = list(from_addresses)
+            if to_addresses:
+                params['toAddress'] = list(to_addresses)
+            filters.append(params)
+
+        for params, traces in self._iter_completed(self._trace_filter, filters, ordered=True):
+            yield int(params['fromBlock'], 16), int(params['toBlock'], 16), traces
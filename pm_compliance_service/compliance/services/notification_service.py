@@ -0,0 +1,226 @@
+import json
+import smtplib
+import time
+from collections import defaultdict
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from ..models import ComplianceStatusType
+from ..repositories.redis_repository import RedisRepository
+from ..utils import chunks
+
+logger = getLogger(__name__)
+
+# KEYS[1] - zset scored by due time, KEYS[2] - hash with the values (optional), ARGV[1] - now, ARGV[2] - limit
+# Pops members due and returns their values on KEYS[2], or the members themselves if KEYS[2] is not provided
+POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local values = {}
+for i, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    if KEYS[2] then
+        values[i] = redis.call('HGET', KEYS[2], member)
+        redis.call('HDEL', KEYS[2], member)
+    else
+        values[i] = member
+    end
+end
+return values
+"""
+
+Notification = Dict[str, Any]
+Delivery = Dict[str, Any]  # Notification, channel, recipient and attempts
+
+
+class NotificationServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = NotificationService(settings.NOTIFICATIONS_WEBHOOK_URLS,
+                                               settings.NOTIFICATIONS_COALESCE_SECONDS,
+                                               settings.NOTIFICATIONS_BATCH_SIZE,
+                                               settings.NOTIFICATIONS_MAX_ATTEMPTS,
+                                               settings.NOTIFICATIONS_RETRY_BACKOFF,
+                                               timeout=settings.NOTIFICATIONS_TIMEOUT)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class NotificationService:
+    """
+    Notify compliance status changes by webhook and email without blocking the request path. Changes are only
+    queued on Redis, and celery tasks send them later. Changes of the same address during the coalescing window
+    are merged into one notification with the last status. Deliveries that fail are kept on a dead letter set and
+    retried with exponential backoff
+    """
+    PENDING_KEY = 'notifications:pending'  # Addresses by time they must be notified
+    CHANGES_KEY = 'notifications:changes'  # Last change by address
+    DEAD_LETTER_KEY = 'notifications:dead-letter'  # Failed deliveries by time they must be retried
+    WEBHOOK = 'webhook'
+    EMAIL = 'email'
+    EMAIL_SUBJECT = 'Your compliance status has changed'
+
+    def __init__(self, webhook_urls: Sequence[str], coalesce_seconds: int, batch_size: int, max_attempts: int,
+                 retry_backoff: int, timeout: int = 5, pool_size: int = 10):
+        """
+        :param webhook_urls: Every notification is posted to all these urls
+        :param coalesce_seconds: Seconds to wait since the first change of an address before notifying it
+        :param batch_size: Max notifications sent on the same webhook request
+        :param max_attempts: Deliveries are dropped after failing this number of times
+        :param retry_backoff: Seconds to wait before the first retry, doubled for every retry
+        :param timeout: Seconds to wait for a webhook to answer
+        :param pool_size: Max keep-alive connections to every webhook host
+        """
+        self.webhook_urls = webhook_urls
+        self.coalesce_seconds = coalesce_seconds
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.session = self._create_session(pool_size)
+        self.redis = RedisRepository().redis
+        self.pop_due_script = self.redis.register_script(POP_DUE_SCRIPT)
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def notify_status_change(self, address: str, status: ComplianceStatusType, email: Optional[str] = None):
+        """
+        Queue a status change. Only one Redis round trip, so it can be called on the request path
+        """
+        self.notify_status_changes([(address, status, email)])
+
+    def notify_status_changes(self, changes: Sequence[Tuple[str, ComplianceStatusType, Optional[str]]],
+                              batch_size: int = 1000):
+        """
+        Queue status changes, `batch_size` changes for every Redis round trip. Commands run on a transaction,
+        otherwise `POP_DUE_SCRIPT` could pop an address between them, leaving the change without a pending entry
+        so it would never be sent
+        :param changes: Tuples of address, new status and email (optional)
+        """
+        for changes_chunk in chunks(changes, batch_size):
+            now = time.time()
+            pipe = self.redis.pipeline(transaction=True)
+            for address, status, email in changes_chunk:
+                change = json.dumps({'address': address, 'status': status.name, 'email': email, 'timestamp': now})
+                pipe.zadd(self.PENDING_KEY, {address: now + self.coalesce_seconds}, nx=True)  # Window starts on 1st
+                pipe.hset(self.CHANGES_KEY, address, change)
+            pipe.execute()
+
+    def _pop_due(self, keys: List[str], limit: int) -> List[Dict[str, Any]]:
+        values = self.pop_due_script(keys=keys, args=[time.time(), limit])
+        return [json.loads(value) for value in values if value is not None]
+
+    def _build_deliveries(self, notification: Notification) -> List[Delivery]:
+        email = notification.pop('email', None)
+        deliveries = [{'channel': self.WEBHOOK, 'recipient': webhook_url, 'notification': notification,
+                       'attempts': 0} for webhook_url in self.webhook_urls]
+        if email:
+            deliveries.append({'channel': self.EMAIL, 'recipient': email, 'notification': notification,
+                               'attempts': 0})
+        return deliveries
+
+    def _send_webhooks(self, deliveries: Sequence[Delivery]) -> List[Delivery]:
+        """
+        :return: Deliveries that failed
+        """
+        deliveries_by_url = defaultdict(list)
+        for delivery in deliveries:
+            deliveries_by_url[delivery['recipient']].append(delivery)
+
+        failed = []
+        for webhook_url, url_deliveries in deliveries_by_url.items():
+            for deliveries_chunk in chunks(url_deliveries, self.batch_size):
+                try:
+                    response = self.session.post(webhook_url, timeout=self.timeout,
+                                                 json=[delivery['notification'] for delivery in deliveries_chunk])
+                    response.raise_for_status()
+                except RequestException as e:
+                    logger.warning('Cannot send %d notifications to %s: %s', len(deliveries_chunk), webhook_url, e)
+                    failed.extend(deliveries_chunk)
+        return failed
+
+    def _send_emails(self, deliveries: Sequence[Delivery]) -> List[Delivery]:
+        """
+        Every email is sent using the same SMTP connection
+        :return: Deliveries that failed
+        """
+        if not deliveries:
+            return []
+        failed = []
+        try:
+            with get_connection() as connection:
+                for delivery in deliveries:
+                    notification = delivery['notification']
+                    body = 'Compliance status of %s is now %s' % (notification['address'], notification['status'])
+                    try:
+                        EmailMessage(self.EMAIL_SUBJECT, body, to=[delivery['recipient']],
+                                     connection=connection).send()
+                    except (smtplib.SMTPException, OSError) as e:
+                        logger.warning('Cannot send notification to %s: %s', delivery['recipient'], e)
+                        failed.append(delivery)
+        except (smtplib.SMTPException, OSError) as e:
+            logger.warning('Cannot connect to the email server: %s', e)
+            return list(deliveries)
+        return failed
+
+    def _deliver(self, deliveries: Sequence[Delivery]) -> int:
+        """
+        Send deliveries, storing the failed ones on the dead letter set
+        :return: Number of deliveries sent
+        """
+        failed = self._send_webhooks([delivery for delivery in deliveries if delivery['channel'] == self.WEBHOOK])
+        failed += self._send_emails([delivery for delivery in deliveries if delivery['channel'] == self.EMAIL])
+
+        retries = {}
+        now = time.time()
+        for delivery in failed:
+            delivery['attempts'] += 1
+            if delivery['attempts'] >= self.max_attempts:
+                logger.error('Dropping notification for %s after %d attempts: %s', delivery['recipient'],
+                             delivery['attempts'], delivery['notification'])
+            else:
+                retries[json.dumps(delivery)] = now + self.retry_backoff * 2 ** (delivery['attempts'] - 1)
+        if retries:
+            self.redis.zadd(self.DEAD_LETTER_KEY, retries)
+        return len(deliveries) - len(failed)
+
+    def send_pending(self) -> int:
+        """
+        Send notifications whose coalescing window is over
+        :return: Number of deliveries sent
+        """
+        sent = 0
+        while True:
+            notifications = self._pop_due([self.PENDING_KEY, self.CHANGES_KEY], self.batch_size)
+            if not notifications:
+                return sent
+            sent += self._deliver([delivery for notification in notifications
+                                   for delivery in self._build_deliveries(notification)])
+
+    def retry_failed(self) -> int:
+        """
+        Retry failed deliveries whose backoff is over
+        :return: Number of deliveries sent
+        """
+        sent = 0
+        while True:
+            deliveries = self._pop_due([self.DEAD_LETTER_KEY], self.batch_size)
+            if not deliveries:
+                return sent
+            sent += self._deliver(deliveries)
@@ -0,0 +1,155 @@
+import json
+import time
+import uuid
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from ..blocklist import BlocklistIndexProvider
+from ..models import ComplianceStatus, ComplianceStatusType
+from ..repositories.redis_repository import RedisRepository
+from ..status_cache import ComplianceStatusCacheProvider
+from ..utils import chunks
+from .notification_service import NotificationServiceProvider
+
+logger = getLogger(__name__)
+
+Chunk = Tuple[int, int, int]  # Chunk index, first id and last id
+
+
+class RescreeningServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = RescreeningService(settings.RESCREENING_CHUNK_SIZE,
+                                              settings.RESCREENING_JOB_TTL)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class RescreeningService:
+    """
+    Screen every known address against the blocklists again, rejecting the ones that are blocked now.
+    Population is split in chunks of consecutive ids when a job is created, so a job can be restarted and only the
+    chunks not completed are screened again. Progress of every job and chunk is stored on Redis:
+    - `rescreening:<job_id>` hash with the chunks, totals and timestamps of the job
+    - `rescreening:<job_id>:chunks` hash with the results and throughput of every completed chunk
+    """
+    def __init__(self, chunk_size: int, job_ttl: int):
+        """
+        :param chunk_size: Addresses screened by every chunk
+        :param job_ttl: Seconds to keep the progress of a job on Redis
+        """
+        self.chunk_size = chunk_size
+        self.job_ttl = job_ttl
+        self.redis = RedisRepository().redis
+        self._last_job_id = None
+
+    @staticmethod
+    def _get_job_key(job_id: str) -> str:
+        return 'rescreening:' + job_id
+
+    @staticmethod
+    def _get_chunks_key(job_id: str) -> str:
+        return 'rescreening:%s:chunks' % job_id
+
+    def create_job(self) -> str:
+        """
+        Split the current population in chunks
+        :return: Id of the job
+        """
+        job_id = uuid.uuid4().hex
+        ids = list(ComplianceStatus.objects.order_by('id').values_list('id', flat=True).iterator())
+        ranges = [(ids_chunk[0], ids_chunk[-1]) for ids_chunk in chunks(ids, self.chunk_size)]
+        key = self._get_job_key(job_id)
+        pipe = self.redis.pipeline()
+        pipe.hmset(key, {'ranges': json.dumps(ranges), 'chunks': len(ranges), 'addresses': len(ids),
+                         'created': time.time()})
+        pipe.expire(key, self.job_ttl)
+        pipe.execute()
+        logger.info('Created rescreening job %s with %d addresses in %d chunks', job_id, len(ids), len(ranges))
+        return job_id
+
+    def get_pending_chunks(self, job_id: str) -> List[Chunk]:
+        """
+        :return: Chunks of the job not completed yet
+        """
+        ranges = self.redis.hget(self._get_job_key(job_id), 'ranges')
+        if ranges is None:
+            raise ValueError('Rescreening job %s does not exist or expired' % job_id)
+        completed = {int(chunk_index) for chunk_index in self.redis.hkeys(self._get_chunks_key(job_id))}
+        return [(chunk_index, first_id, last_id)
+                for chunk_index, (first_id, last_id) in enumerate(json.loads(ranges))
+                if chunk_index not in completed]
+
+    def is_chunk_completed(self, job_id: str, chunk_index: int) -> bool:
+        return self.redis.hexists(self._get_chunks_key(job_id), chunk_index)
+
+    def screen_chunk(self, job_id: str, chunk_index: int, first_id: int, last_id: int) -> Dict[str, Any]:
+        """
+        Reject addresses of the chunk present on the blocklists, and store the progress of the chunk
+        :return: Results of the chunk
+        """
+        blocklist_index = BlocklistIndexProvider()
+        if job_id != self._last_job_id:  # Job was probably started because blocklists changed
+            blocklist_index.expire()
+            self._last_job_id = job_id
+
+        start = time.monotonic()
+        rejected_value = ComplianceStatusType.REJECTED.value
+        statuses = list(ComplianceStatus.objects.filter(id__gte=first_id, id__lte=last_id
+                                                        ).exclude(status=rejected_value
+                                                                  ).values_list('id', 'address', 'email'))
+        blocked = blocklist_index.contains_many([address for _, address, _ in statuses])
+        rejected = [status for status, is_blocked in zip(statuses, blocked) if is_blocked]
+        if rejected:
+            # `update` does not send signals, so cache and notifications are handled here
+            ComplianceStatus.objects.filter(id__in=[status_id for status_id, _, _ in rejected]
+                                            ).update(status=rejected_value)
+            ComplianceStatusCacheProvider().invalidate_many([address for _, address, _ in rejected])
+            notification_service = NotificationServiceProvider()
+            for _, address, email in rejected:
+                notification_service.notify_status_change(address, ComplianceStatusType.REJECTED, email=email)
+
+        elapsed = time.monotonic() - start
+        result = {'chunk': chunk_index, 'screened': len(statuses), 'rejected': len(rejected),
+                  'seconds': elapsed, 'addresses_per_second': len(statuses) / elapsed if elapsed else 0.}
+        job_key, chunks_key = self._get_job_key(job_id), self._get_chunks_key(job_id)
+        pipe = self.redis.pipeline()
+        pipe.hset(chunks_key, chunk_index, json.dumps(result))
+        pipe.expire(chunks_key, self.job_ttl)
+        pipe.hincrby(job_key, 'screened', len(statuses))
+        pipe.hincrby(job_key, 'rejected', len(rejected))
+        pipe.execute()
+        return result
+
+    def finish_job(self, job_id: str):
+        self.redis.hset(self._get_job_key(job_id), 'finished', time.time())
+
+    def get_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        :return: Progress of the job, `None` if job does not exist
+        """
+        job = self.redis.hgetall(self._get_job_key(job_id))
+        if not job:
+            return None
+        chunks_results = [json.loads(result) for result in self.redis.hvals(self._get_chunks_key(job_id))]
+        created = float(job[b'created'])
+        finished = float(job[b'finished']) if b'finished' in job else None
+        screened = int(job.get(b'screened', 0))
+        elapsed = (finished or time.time()) - created
+        return {
+            'job_id': job_id,
+            'addresses': int(job[b'addresses']),
+            'chunks': int(job[b'chunks']),
+            'chunks_completed': len(chunks_results),
+            'screened': screened,
+            'rejected': int(job.get(b'rejected', 0)),
+            'finished': finished is not None,
+            'addresses_per_second': screened / elapsed if elapsed else 0.,
+            'chunks_results': sorted(chunks_results, key=lambda result: result['chunk']),
+        }
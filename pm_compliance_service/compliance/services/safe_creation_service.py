@@ -0,0 +1,165 @@
+from logging import getLogger
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+
+import numpy as np
+from eth_abi import decode_single, encode_abi
+from eth_hash.auto import keccak
+from eth_utils import to_checksum_address
+from hexbytes import HexBytes
+
+from gnosis.eth import EthereumClient, EthereumClientProvider
+
+from ..models import SafeAddress
+from ..utils import checksum_encode_many, chunks
+
+logger = getLogger(__name__)
+
+NULL_ADDRESS = '0x' + '0' * 40
+
+
+class SafeCreationServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            proxy_creation_code = settings.SAFE_PROXY_CREATION_CODE
+            cls.instance = SafeCreationService(EthereumClientProvider(),
+                                               settings.SAFE_PROXY_FACTORY_ADDRESS,
+                                               settings.SAFE_MASTER_COPY_ADDRESS,
+                                               settings.SAFE_FALLBACK_HANDLER_ADDRESS,
+                                               settings.SAFE_CREATION_BATCH_SIZE,
+                                               proxy_creation_code=HexBytes(proxy_creation_code)
+                                               if proxy_creation_code else None)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+def keccak_rows(data: np.ndarray) -> np.ndarray:
+    """
+    :param data: 2D `uint8` array
+    :return: 2D `uint8` array with the keccak256 of every row
+    """
+    buffer = data.tobytes()
+    width = data.shape[1]
+    hashes = b''.join([keccak(buffer[start:start + width]) for start in range(0, len(buffer), width)])
+    return np.frombuffer(hashes, dtype=np.uint8).reshape(len(data), 32)
+
+
+class SafeCreationService:
+    """
+    Derive the addresses of Safes created by `ProxyFactory.createProxyWithNonce` with only one owner and threshold
+    1, so Safes can be mapped to their owner before being deployed. Addresses are calculated for whole batches at
+    once using numpy arrays: `setup` data is encoded once and owners are copied into it, so every item only
+    costs the three keccak required by CREATE2 (initializer, salt and address)
+    """
+    SETUP_TYPES = ['address[]', 'uint256', 'address', 'bytes', 'address', 'address', 'uint256', 'address']
+    SETUP_SELECTOR = keccak(b'setup(address[],uint256,address,bytes,address,address,uint256,address)')[:4]
+    PROXY_CREATION_CODE_SELECTOR = keccak(b'proxyCreationCode()')[:4]
+    # Owner is the only item of `_owners`, encoded after the 8 head words and the length of the array
+    OWNER_OFFSET = 4 + 9 * 32 + 12
+
+    def __init__(self, ethereum_client: EthereumClient, proxy_factory_address: str, master_copy_address: str,
+                 fallback_handler_address: str, batch_size: int, proxy_creation_code: Optional[bytes] = None):
+        """
+        :param batch_size: Max addresses derived and stored at once
+        :param proxy_creation_code: Bytecode of the `Proxy` contract. If not provided, it's requested to the
+        `ProxyFactory` when needed
+        """
+        self.ethereum_client = ethereum_client
+        self.proxy_factory_address = to_checksum_address(proxy_factory_address)
+        self.master_copy_address = to_checksum_address(master_copy_address)
+        self.fallback_handler_address = to_checksum_address(fallback_handler_address)
+        self.batch_size = batch_size
+        self._proxy_creation_code = proxy_creation_code
+        self._init_code_hash = None
+        self.setup_data_template = np.frombuffer(self.SETUP_SELECTOR + encode_abi(
+            self.SETUP_TYPES, [[NULL_ADDRESS], 1, NULL_ADDRESS, b'', self.fallback_handler_address, NULL_ADDRESS,
+                               0, NULL_ADDRESS]), dtype=np.uint8)
+
+    @property
+    def proxy_creation_code(self) -> bytes:
+        if self._proxy_creation_code is None:
+            result = self.ethereum_client.w3.eth.call({'to': self.proxy_factory_address,
+                                                       'data': HexBytes(self.PROXY_CREATION_CODE_SELECTOR).hex()})
+            self._proxy_creation_code = decode_single('bytes', HexBytes(result))
+        return self._proxy_creation_code
+
+    @property
+    def init_code_hash(self) -> bytes:
+        if self._init_code_hash is None:
+            # `ProxyFactory` appends the master copy to the creation code as the constructor argument
+            self._init_code_hash = keccak(bytes(self.proxy_creation_code)
+                                          + HexBytes(self.master_copy_address).rjust(32, b'\0'))
+        return self._init_code_hash
+
+    @staticmethod
+    def calculate_create2_addresses(deployer: str, salts: np.ndarray, init_code_hash: bytes) -> np.ndarray:
+        """
+        :param salts: 2D `uint8` array with a 32 bytes salt on every row
+        :return: 2D `uint8` array with a 20 bytes address on every row
+        """
+        data = np.empty((len(salts), 85), dtype=np.uint8)
+        data[:, 0] = 0xff
+        data[:, 1:21] = np.frombuffer(HexBytes(deployer), dtype=np.uint8)
+        data[:, 21:53] = salts
+        data[:, 53:] = np.frombuffer(init_code_hash, dtype=np.uint8)
+        return keccak_rows(data)[:, 12:]
+
+    def derive_addresses(self, owners: Sequence[str], salt_nonces: Sequence[int]) -> List[str]:
+        """
+        :param owners: Owner of every Safe
+        :param salt_nonces: Salt nonce used to deploy every Safe
+        :return: Checksummed Safe addresses in the same order
+        """
+        if len(owners) != len(salt_nonces):
+            raise ValueError('Expected same number of owners and salt nonces')
+        if not owners:
+            return []
+
+        setup_data = np.tile(self.setup_data_template, (len(owners), 1))
+        setup_data[:, self.OWNER_OFFSET:self.OWNER_OFFSET + 20] = np.frombuffer(
+            b''.join([HexBytes(owner) for owner in owners]), dtype=np.uint8).reshape(len(owners), 20)
+
+        # Salt is keccak256(keccak256(initializer) + saltNonce)
+        salts_data = np.empty((len(owners), 64), dtype=np.uint8)
+        salts_data[:, :32] = keccak_rows(setup_data)
+        salts_data[:, 32:] = np.frombuffer(b''.join([salt_nonce.to_bytes(32, 'big') for salt_nonce in salt_nonces]),
+                                           dtype=np.uint8).reshape(len(owners), 32)
+
+        addresses = self.calculate_create2_addresses(self.proxy_factory_address, keccak_rows(salts_data),
+                                                     self.init_code_hash)
+        return checksum_encode_many([address.tobytes() for address in addresses])
+
+    def store_addresses(self, owners: Sequence[str], salt_nonces: Sequence[int]) -> int:
+        """
+        Derive and store Safe addresses. Addresses already stored are ignored
+        :return: Number of addresses derived
+        """
+        count = 0
+        for owners_chunk, salt_nonces_chunk in zip(chunks(owners, self.batch_size),
+                                                   chunks(salt_nonces, self.batch_size)):
+            addresses = self.derive_addresses(owners_chunk, salt_nonces_chunk)
+            SafeAddress.objects.bulk_create([
+                SafeAddress(address=address, owner=to_checksum_address(owner), salt_nonce=salt_nonce,
+                            master_copy=self.master_copy_address, proxy_factory=self.proxy_factory_address)
+                for address, owner, salt_nonce in zip(addresses, owners_chunk, salt_nonces_chunk)
+            ], ignore_conflicts=True)
+            count += len(addresses)
+            logger.debug('Stored %d Safe addresses', count)
+        return count
+
+    def get_owners(self, safe_addresses: Sequence[str]) -> List[Optional[str]]:
+        """
+        :param safe_addresses: Safe addresses, checksumed or not
+        :return: Owner of every Safe in the same order, `None` if Safe is not known
+        """
+        owners = {}  # type: Dict[str, str]
+        for safe_addresses_chunk in chunks(list({to_checksum_address(address) for address in safe_addresses}),
+                                           self.batch_size):
+            owners.update(SafeAddress.objects.filter(address__in=safe_addresses_chunk)
+                          .values_list('address', 'owner'))
+        return [owners.get(to_checksum_address(address)) for address in safe_addresses]
@@ -0,0 +1,69 @@
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from hexbytes import HexBytes
+
+from ..rpc import JsonRpcBatchTransport, JsonRpcBatchTransportProvider
+
+logger = getLogger(__name__)
+
+TxHash = Union[str, bytes]
+
+
+class TransactionServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = TransactionService(JsonRpcBatchTransportProvider())
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class TransactionService:
+    """
+    Fetch transactions, receipts and blocks in JSON-RPC batches. Results are returned as the node sends them
+    """
+    def __init__(self, transport: JsonRpcBatchTransport):
+        self.transport = transport
+
+    @staticmethod
+    def _to_hex(tx_hash: TxHash) -> str:
+        return HexBytes(tx_hash).hex()
+
+    def get_transactions(self, tx_hashes: Sequence[TxHash]) -> List[Optional[Dict[str, Any]]]:
+        """
+        :return: Transactions in the same order, `None` if transaction is not found
+        """
+        return self.transport.batch([('eth_getTransactionByHash', [self._to_hex(tx_hash)])
+                                     for tx_hash in tx_hashes])
+
+    def get_transaction_receipts(self, tx_hashes: Sequence[TxHash]) -> List[Optional[Dict[str, Any]]]:
+        """
+        :return: Receipts in the same order, `None` if transaction is not mined yet
+        """
+        return self.transport.batch([('eth_getTransactionReceipt', [self._to_hex(tx_hash)])
+                                     for tx_hash in tx_hashes])
+
+    def get_blocks(self, block_numbers: Sequence[int],
+                   full_transactions: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """
+        :param full_transactions: If `True` blocks include transactions, otherwise just transaction hashes
+        :return: Blocks in the same order, `None` if block does not exist yet
+        """
+        return self.transport.batch([('eth_getBlockByNumber', [hex(block_number), full_transactions])
+                                     for block_number in block_numbers])
+
+    def get_receipts_with_blocks(self, tx_hashes: Sequence[TxHash]
+                                 ) -> List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Fetch receipts and then their blocks. Every block is only requested once
+        :return: Tuples of receipt and block in the same order, `(None, None)` if transaction is not mined yet
+        """
+        receipts = self.get_transaction_receipts(tx_hashes)
+        block_numbers = sorted({int(receipt['blockNumber'], 16) for receipt in receipts if receipt})
+        blocks = dict(zip(block_numbers, self.get_blocks(block_numbers)))
+        return [(receipt, blocks[int(receipt['blockNumber'], 16)]) if receipt else (None, None)
+                for receipt in receipts]
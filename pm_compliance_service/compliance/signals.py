@@ -0,0 +1,37 @@
+from logging import getLogger
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from redis.exceptions import RedisError
+
+from .models import ComplianceStatus, ComplianceStatusType
+from .status_cache import ComplianceStatusCacheProvider
+
+logger = getLogger(__name__)
+
+
+@receiver(post_save, sender=ComplianceStatus, dispatch_uid='compliance_status.invalidate_on_save')
+@receiver(post_delete, sender=ComplianceStatus, dispatch_uid='compliance_status.invalidate_on_delete')
+def invalidate_compliance_status(sender: type, instance: ComplianceStatus, **kwargs):
+    # Invalidate after commit, otherwise other processes could cache the old status again
+    address = instance.address
+    transaction.on_commit(lambda: ComplianceStatusCacheProvider().invalidate(address))
+
+
+@receiver(post_save, sender=ComplianceStatus, dispatch_uid='compliance_status.notify_on_save')
+def notify_compliance_status(sender: type, instance: ComplianceStatus, created: bool, **kwargs):
+    if not created and not instance.tracker.has_changed('status'):
+        return
+
+    address, status, email = instance.address, ComplianceStatusType(instance.status), instance.email
+
+    def notify():
+        from .services.notification_service import NotificationServiceProvider  # Services import models
+        try:
+            NotificationServiceProvider().notify_status_change(address, status, email=email)
+        except RedisError:
+            logger.error('Cannot queue status change notification for %s', address, exc_info=True)
+
+    transaction.on_commit(notify)
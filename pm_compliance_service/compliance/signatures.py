@@ -0,0 +1,228 @@
+import math
+import multiprocessing
+import os
+import queue
+import threading
+from logging import getLogger
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from cachetools import LRUCache
+from gevent import monkey
+from gevent.socket import wait_read
+from hexbytes import HexBytes
+
+from .utils import chunks
+
+logger = getLogger(__name__)
+
+_MISSING = object()
+
+
+def recover_address(message_hash_and_signature: Tuple[bytes, bytes]) -> Optional[str]:
+    """
+    :param message_hash_and_signature: Tuple of message hash and 65 bytes signature
+    :return: Checksumed address of the signer or `None` if signature is not valid
+    """
+    from eth_account import Account  # Chain libraries are imported on first use
+    from eth_keys.exceptions import BadSignature, ValidationError
+
+    message_hash, signature = message_hash_and_signature
+    try:
+        return Account.recoverHash(message_hash, signature=signature)
+    except (BadSignature, ValidationError, ValueError):
+        return None
+
+
+def recover_addresses(messages_hashes_and_signatures: Sequence[Tuple[bytes, bytes]]) -> List[Optional[str]]:
+    return [recover_address(message_hash_and_signature)
+            for message_hash_and_signature in messages_hashes_and_signatures]
+
+
+def serve_recoveries(connection: Connection):
+    """
+    Loop of the processes of `RecoveryProcessPool`: recover every batch received, until the pipe is closed
+    """
+    while True:
+        try:
+            keys = connection.recv()
+        except EOFError:
+            return
+        connection.send(recover_addresses(keys))
+
+
+class RecoveryProcessPool:
+    """
+    Processes recovering batches of signatures in parallel, out of the GIL of the calling process. Processes are
+    spawned instead of forked, as forking a process patched by gevent can hang, and they are fed through pipes
+    with no threads involved, so waiting for the results only blocks the calling greenlet. Every process recovers
+    one batch at a time, idle ones are kept on a queue
+    """
+    def __init__(self, processes: int):
+        """
+        :param processes: Number of processes of the pool
+        """
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = {}  # type: Dict[Connection, multiprocessing.process.BaseProcess]
+        self._idle = queue.Queue()
+        for _ in range(processes):
+            self._idle.put(self._start_process())
+
+    def __len__(self):
+        return len(self._processes)
+
+    def _start_process(self) -> Connection:
+        """
+        :return: Pipe to the new process
+        """
+        connection, child_connection = self._context.Pipe()
+        process = self._context.Process(target=serve_recoveries, args=(child_connection,), daemon=True)
+        process.start()
+        child_connection.close()
+        self._processes[connection] = process
+        return connection
+
+    def _stop_process(self, connection: Connection):
+        process = self._processes.pop(connection)
+        connection.close()  # Process exits when the pipe is closed
+        process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
+
+    @staticmethod
+    def _receive(connection: Connection):
+        if monkey.is_module_patched('socket'):
+            wait_read(connection.fileno())  # Let other greenlets run
+        return connection.recv()
+
+    def recover(self, keys: Sequence[Tuple[bytes, bytes]]) -> List[Optional[str]]:
+        """
+        Split the signatures between the idle processes. If every process is busy, wait for one of them
+        :param keys: Tuples of message hash and 65 bytes signature
+        :return: Checksumed address of the signer (or `None` if signature is not valid) for every tuple
+        """
+        if not keys:
+            return []
+
+        connections = [self._idle.get()]
+        while len(connections) < len(keys):
+            try:
+                connections.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        sent = []
+        try:
+            for connection, chunk in zip(connections, chunks(keys, math.ceil(len(keys) / len(connections)))):
+                sent.append(connection)
+                connection.send(chunk)
+            return [address for connection in sent for address in self._receive(connection)]
+        except BaseException:
+            # Results not read would be received by the next batch, processes are replaced (e.g. greenlet killed)
+            for connection in sent:
+                self._stop_process(connection)
+                connections[connections.index(connection)] = self._start_process()
+            raise
+        finally:
+            for connection in connections:
+                self._idle.put(connection)
+
+    def shutdown(self):
+        for connection in list(self._processes):
+            self._stop_process(connection)
+
+
+class SignatureVerificationServiceProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = SignatureVerificationService(settings.SIGNATURE_VERIFICATION_WORKERS,
+                                                        settings.SIGNATURE_VERIFICATION_CACHE_SIZE,
+                                                        settings.SIGNATURE_VERIFICATION_PARALLEL_THRESHOLD)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            cls.instance.shutdown()
+            del cls.instance
+
+
+class SignatureVerificationService:
+    """
+    Recovers signers of `personal_sign` messages. ECDSA recovery is CPU bound, so big batches are split between
+    the processes of a `RecoveryProcessPool` instead of blocking the gevent hub. Results are memoized in a bounded
+    LRU cache keyed by message hash and signature
+    """
+    def __init__(self, max_workers: int, cache_size: int, parallel_threshold: int):
+        """
+        :param max_workers: Processes of the pool. If `1` or less, recovery is always done in the calling process
+        :param cache_size: Max number of recovered signatures to memoize
+        :param parallel_threshold: Batches with less signatures to recover are not sent to the pool,
+        as sending them to other process would cost more than the recovery itself
+        """
+        self.max_workers = max_workers
+        self.parallel_threshold = parallel_threshold
+        self.cache = LRUCache(maxsize=cache_size)
+        self._cache_lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> RecoveryProcessPool:
+        """
+        Pipes of a pool cannot be shared with a forked process (e.g. every gunicorn worker), so a pool is started
+        by every process the first time it's needed
+        """
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = RecoveryProcessPool(self.max_workers)
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown()
+        self._pool = None
+
+    @staticmethod
+    def hash_message(message: str) -> bytes:
+        """
+        :return: Hash of the message with the `\x19Ethereum Signed Message` prefix, as `personal_sign` does
+        """
+        from eth_account.messages import defunct_hash_message
+
+        return bytes(defunct_hash_message(text=message))
+
+    def _recover(self, keys: Sequence[Tuple[bytes, bytes]]) -> List[Optional[str]]:
+        if self.max_workers <= 1 or len(keys) < self.parallel_threshold:
+            return recover_addresses(keys)
+
+        return self.pool.recover(keys)
+
+    def recover_many(self, messages_and_signatures: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        :param messages_and_signatures: Tuples of message and hex signature
+        :return: Checksumed address of the signer (or `None` if signature is not valid) for every tuple,
+        in the same order
+        """
+        keys = [(self.hash_message(message), bytes(HexBytes(signature)))
+                for message, signature in messages_and_signatures]
+        with self._cache_lock:
+            results = [self.cache.get(key, _MISSING) for key in keys]
+
+        missing_keys = list(dict.fromkeys(key for key, result in zip(keys, results) if result is _MISSING))
+        if not missing_keys:
+            return results
+
+        recovered = dict(zip(missing_keys, self._recover(missing_keys)))
+        with self._cache_lock:
+            self.cache.update(recovered)
+        logger.debug('Recovered %d signatures, %d were cached', len(missing_keys), len(keys) - len(missing_keys))
+        return [recovered[key] if result is _MISSING else result for key, result in zip(keys, results)]
+
+    def recover(self, message: str, signature: str) -> Optional[str]:
+        return self.recover_many([(message, signature)])[0]
@@ -0,0 +1,322 @@
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from cachetools import TTLCache
+from eth_utils import to_checksum_address
+from redis.exceptions import RedisError
+
+from .models import ComplianceStatus, ComplianceStatusType
+from .repositories.redis_repository import RedisRepository
+from .utils import run_in_thread
+
+logger = getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'compliance-status-invalidation'
+FLUSH_MESSAGE = '*'
+NOT_FOUND = -1  # Cached for addresses without status, so unknown addresses don't hit the database every time
+_MISSING = object()
+
+
+class EvictionCountingTTLCache(TTLCache):
+    """
+    `TTLCache` that counts entries evicted because cache was full
+    """
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class ComplianceStatusCacheProvider:
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = ComplianceStatusCache(settings.COMPLIANCE_STATUS_LOCAL_CACHE_SIZE,
+                                                 settings.COMPLIANCE_STATUS_LOCAL_CACHE_TTL,
+                                                 settings.COMPLIANCE_STATUS_SHARED_CACHE_TTL)
+        return cls.instance
+
+    @classmethod
+    def del_singleton(cls):
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+
+class ComplianceStatusCache:
+    """
+    Read through cache for `ComplianceStatus`. First tier is a TTL/LRU cache local to the process, second tier is
+    the Django cache shared by every process (Redis on production). When a status changes an invalidation is
+    published on Redis, so every gunicorn and celery process evicts it from its local cache.
+    Shared values are tagged with the generation of their key, changed on every invalidation, so a value loaded
+    from the database before an invalidation and written back after it is never used
+    """
+    def __init__(self, local_cache_size: int, local_cache_ttl: int, shared_cache_ttl: int):
+        """
+        :param local_cache_size: Max addresses on the local cache of every process
+        :param local_cache_ttl: Seconds to keep addresses on the local cache. Bounds staleness if an invalidation
+        is lost
+        :param shared_cache_ttl: Seconds to keep addresses on the shared cache
+        """
+        self.local_cache = EvictionCountingTTLCache(local_cache_size, local_cache_ttl)
+        self.shared_cache_ttl = shared_cache_ttl
+        self.redis_shared_cache = self._is_redis_shared_cache()
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._listener_pid = None
+        self._invalidation_seq = 0  # Incremented on every local invalidation
+
+    @staticmethod
+    def _is_redis_shared_cache() -> bool:
+        """
+        :return: `True` if shared cache is `django_redis` on the Redis of `REDIS_URL` with the default client, so
+        async views can read it with `AsyncRedisRepository` and decode values with the client of the cache
+        """
+        shared_cache = settings.CACHES['default']
+        if (shared_cache['BACKEND'] != 'django_redis.cache.RedisCache'
+                or shared_cache.get('LOCATION') != settings.REDIS_URL):
+            return False
+        from django_redis.client import DefaultClient
+
+        return type(cache.client) is DefaultClient  # Other clients (e.g. herd) store values wrapped
+
+    @staticmethod
+    def _get_key(address: str) -> str:
+        return 'compliance-status:' + address.lower()
+
+    @staticmethod
+    def _get_address(key: str) -> str:
+        return key.split(':', 1)[1]
+
+    @classmethod
+    def _get_generation_key(cls, key: str) -> str:
+        return 'compliance-status-generation:' + cls._get_address(key)
+
+    def _load(self, keys: Sequence[str]) -> Dict[str, int]:
+        addresses = {to_checksum_address(self._get_address(key)): key for key in keys}
+        statuses = dict(ComplianceStatus.objects.filter(address__in=list(addresses)
+                                                        ).values_list('address', 'status'))
+        return {key: statuses.get(address, NOT_FOUND) for address, key in addresses.items()}
+
+    def _get_local(self, keys: Sequence[str]) -> Dict[str, int]:
+        """
+        :return: Values found on the local cache
+        """
+        values = {}
+        with self._lock:
+            for key in keys:
+                value = self.local_cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    values[key] = value
+            self.stats['local_hits'] += len(values)
+            self.stats['local_misses'] += len(keys) - len(values)
+        return values
+
+    def _update_local(self, values: Dict[str, int], invalidation_seq: int):
+        """
+        Store values on the local cache, unless an invalidation was received after `invalidation_seq`, as values
+        could have been loaded before it
+        """
+        with self._lock:
+            if self._invalidation_seq == invalidation_seq:
+                self.local_cache.update(values)
+
+    def _load_and_share(self, keys: Sequence[str], generations: Dict[str, Optional[str]]) -> Dict[str, int]:
+        """
+        Load values from the database and store them on the shared cache
+        :param generations: Generation of every key read before loading the values, `None` if never invalidated
+        """
+        values = self._load(keys)
+        cache.set_many({key: [generations[key], value] for key, value in values.items()},
+                       timeout=self.shared_cache_ttl)
+        return values
+
+    def _get_valid_shared(self, keys: Sequence[str],
+                          entries: Dict[str, Any]) -> Tuple[Dict[str, int], Dict[str, Optional[str]]]:
+        """
+        :param entries: Entries found on the shared cache for the keys and their generation keys
+        :return: Values tagged with the current generation of their key, and current generation of every key
+        """
+        values = {}
+        generations = {}
+        for key in keys:
+            generation = entries.get(self._get_generation_key(key))
+            entry = entries.get(key)
+            if isinstance(entry, list) and entry[0] == generation:
+                values[key] = entry[1]
+            generations[key] = generation
+        with self._lock:
+            self.stats['shared_hits'] += len(values)
+            self.stats['shared_misses'] += len(keys) - len(values)
+        return values, generations
+
+    def _get_shared(self, keys: Sequence[str]) -> Dict[str, int]:
+        """
+        :return: Values for every key, from the shared cache or from the database if not found
+        """
+        entries = cache.get_many(list(keys) + [self._get_generation_key(key) for key in keys])
+        shared_values, generations = self._get_valid_shared(keys, entries)
+        db_keys = [key for key in keys if key not in shared_values]
+        if db_keys:
+            shared_values.update(self._load_and_share(db_keys, generations))
+        return shared_values
+
+    async def _get_shared_async(self, keys: Sequence[str]) -> Dict[str, int]:
+        """
+        Same as `_get_shared`, reading the shared cache with `AsyncRedisRepository`. Values are decoded by the
+        `django_redis` client of the cache, so serializer and compressor of the cache are used. Database is queried
+        on a thread
+        """
+        from aioredis import RedisError as AsyncRedisError
+
+        from .repositories.async_redis_repository import AsyncRedisRepository
+
+        entry_keys = list(keys) + [self._get_generation_key(key) for key in keys]
+        try:
+            raw_values = await AsyncRedisRepository().get_many([str(cache.client.make_key(key))
+                                                                for key in entry_keys])
+        except (AsyncRedisError, OSError):  # Same as `IGNORE_EXCEPTIONS` of the shared cache
+            logger.warning('Cannot read shared cache', exc_info=True)
+            raw_values = [None] * len(entry_keys)
+        entries = {key: cache.client.decode(raw_value) for key, raw_value in zip(entry_keys, raw_values)
+                   if raw_value is not None}
+        shared_values, generations = self._get_valid_shared(keys, entries)
+        db_keys = [key for key in keys if key not in shared_values]
+        if db_keys:
+            shared_values.update(await run_in_thread(self._load_and_share, db_keys, generations))
+        return shared_values
+
+    @staticmethod
+    def _to_statuses(keys: Sequence[str], values: Dict[str, int]) -> List[Optional[ComplianceStatusType]]:
+        return [None if values[key] == NOT_FOUND else ComplianceStatusType(values[key]) for key in keys]
+
+    def get_statuses(self, addresses: Sequence[str]) -> List[Optional[ComplianceStatusType]]:
+        """
+        :param addresses: Ethereum addresses, checksumed or not
+        :return: Status for every address in the same order, `None` if address has no status
+        """
+        self.start_listener()
+        keys = [self._get_key(address) for address in addresses]
+        values = self._get_local(set(keys))
+        missing_keys = [key for key in set(keys) if key not in values]
+        if missing_keys:
+            invalidation_seq = self._invalidation_seq
+            shared_values = self._get_shared(missing_keys)
+            values.update(shared_values)
+            self._update_local(shared_values, invalidation_seq)
+        return self._to_statuses(keys, values)
+
+    async def get_statuses_async(self, addresses: Sequence[str]) -> List[Optional[ComplianceStatusType]]:
+        """
+        `get_statuses` for async views, the event loop is never blocked by Redis or the database. If the shared
+        cache is not the Redis of `REDIS_URL` (e.g. local memory on development) it's read on a thread
+        """
+        self.start_listener()
+        keys = [self._get_key(address) for address in addresses]
+        values = self._get_local(set(keys))
+        missing_keys = [key for key in set(keys) if key not in values]
+        if missing_keys:
+            invalidation_seq = self._invalidation_seq
+            if self.redis_shared_cache:
+                shared_values = await self._get_shared_async(missing_keys)
+            else:
+                shared_values = await run_in_thread(self._get_shared, missing_keys)
+            values.update(shared_values)
+            self._update_local(shared_values, invalidation_seq)
+        return self._to_statuses(keys, values)
+
+    def get_status(self, address: str) -> Optional[ComplianceStatusType]:
+        return self.get_statuses([address])[0]
+
+    async def get_status_async(self, address: str) -> Optional[ComplianceStatusType]:
+        return (await self.get_statuses_async([address]))[0]
+
+    def _evict(self, keys: Sequence[str]):
+        with self._lock:
+            self._invalidation_seq += 1
+            for key in keys:
+                if self.local_cache.pop(key, None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def _clear(self):
+        with self._lock:
+            self._invalidation_seq += 1
+            self.stats['invalidations'] += len(self.local_cache)
+            self.local_cache.clear()
+
+    def invalidate_many(self, addresses: Sequence[str]):
+        """
+        Remove addresses from the shared cache and from the local cache of every process. If too many addresses
+        are provided, local caches are cleared instead
+        """
+        keys = [self._get_key(address) for address in addresses]
+        # Values loaded before the new generation are not valid anymore, even if they are written back after it.
+        # Generation outlives the values tagged with the previous one
+        generation = uuid.uuid4().hex
+        cache.set_many({self._get_generation_key(key): generation for key in keys}, timeout=2 * self.shared_cache_ttl)
+        cache.delete_many(keys)
+        if len(keys) > settings.COMPLIANCE_STATUS_MAX_INVALIDATIONS:
+            self._clear()
+            message = FLUSH_MESSAGE
+        else:
+            self._evict(keys)
+            message = ' '.join(keys)
+        RedisRepository().redis.publish(INVALIDATION_CHANNEL, message)
+
+    def invalidate(self, address: str):
+        self.invalidate_many([address])
+
+    def _handle_message(self, data: bytes):
+        message = data.decode()
+        if message == FLUSH_MESSAGE:
+            self._clear()
+        else:
+            self._evict(message.split())
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = RedisRepository().redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Invalidations published while not subscribed are lost
+                self._clear()
+                for message in pubsub.listen():
+                    self._handle_message(message['data'])
+            except RedisError:
+                logger.warning('Cannot listen to %s channel, retrying', INVALIDATION_CHANNEL, exc_info=True)
+                time.sleep(1)
+
+    def start_listener(self):
+        """
+        Start listening to invalidations in a daemon thread. It must be done once for every process, as threads
+        don't survive a fork
+        """
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            self._listener_pid = pid
+        threading.Thread(target=self._listen, name='compliance-status-listener', daemon=True).start()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {key: self.stats[key] for key in ('local_hits', 'local_misses', 'shared_hits', 'shared_misses',
+                                                      'invalidations')}
+            stats.update({
+                'local_size': len(self.local_cache),
+                'local_max_size': self.local_cache.maxsize,
+                'evictions': self.local_cache.evictions,
+            })
+        return stats
@@ -0,0 +1,82 @@
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import OperationalError
+
+from celery import chord
+from celery.utils.log import get_task_logger
+from redis.exceptions import RedisError
+
+from pm_compliance_service.taskapp.celery import app
+
+from . import services
+
+logger = get_task_logger(__name__)
+
+
+@app.task(soft_time_limit=60, ignore_result=True)
+def send_notifications_task() -> int:
+    """
+    Send notifications of status changes whose coalescing window is over
+    :return: Number of deliveries sent
+    """
+    sent = services.NotificationServiceProvider().send_pending()
+    if sent:
+        logger.info('Sent %d notifications', sent)
+    return sent
+
+
+@app.task(soft_time_limit=60, ignore_result=True)
+def retry_notifications_task() -> int:
+    """
+    Retry notifications that failed before
+    :return: Number of deliveries sent
+    """
+    sent = services.NotificationServiceProvider().retry_failed()
+    if sent:
+        logger.info('Sent %d notifications after retrying', sent)
+    return sent
+
+
+@app.task(ignore_result=True)
+def rescreen_addresses_task(job_id: Optional[str] = None, priority: Optional[int] = None) -> str:
+    """
+    Screen every known address against the blocklists. Chunks are screened in parallel on the rescreening queue
+    :param job_id: Restart this job, only chunks not completed are screened. If not provided, a new job is created
+    :param priority: Priority of the chunks on the rescreening queue (0 is the highest)
+    :return: Id of the job
+    """
+    rescreening_service = services.RescreeningServiceProvider()
+    job_id = job_id or rescreening_service.create_job()
+    pending_chunks = rescreening_service.get_pending_chunks(job_id)
+    logger.info('Rescreening job %s: dispatching %d chunks', job_id, len(pending_chunks))
+    if not pending_chunks:  # A chord without tasks never calls its body
+        finish_rescreening_task([], job_id)
+        return job_id
+    if priority is None:
+        priority = settings.RESCREENING_PRIORITY
+    chord(rescreen_chunk_task.signature((job_id, chunk_index, first_id, last_id), priority=priority)
+          for chunk_index, first_id, last_id in pending_chunks)(finish_rescreening_task.s(job_id))
+    return job_id
+
+
+@app.task(autoretry_for=(OperationalError, RedisError), retry_backoff=True, max_retries=5,
+          soft_time_limit=10 * 60)
+def rescreen_chunk_task(job_id: str, chunk_index: int, first_id: int, last_id: int) -> Dict[str, Any]:
+    """
+    :return: Results of the chunk
+    """
+    rescreening_service = services.RescreeningServiceProvider()
+    if rescreening_service.is_chunk_completed(job_id, chunk_index):  # Task was delivered again
+        return {'chunk': chunk_index, 'screened': 0, 'rejected': 0}
+    return rescreening_service.screen_chunk(job_id, chunk_index, first_id, last_id)
+
+
+@app.task(ignore_result=True)
+def finish_rescreening_task(results: List[Dict[str, Any]], job_id: str):
+    rescreening_service = services.RescreeningServiceProvider()
+    rescreening_service.finish_job(job_id)
+    progress = rescreening_service.get_progress(job_id)
+    logger.info('Rescreening job %s finished: screened %d addresses (%d on this run), rejected %d, %.0f addresses/s',
+                job_id, progress['screened'], sum(result['screened'] for result in results), progress['rejected'],
+                progress['addresses_per_second'])
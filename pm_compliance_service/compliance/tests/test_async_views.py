@@ -0,0 +1,154 @@
+import asyncio
+import json
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from eth_account import Account
+
+from ..async_views import AsyncViewsApplication
+from ..blocklist import BlocklistIndexProvider
+from ..models import BlockedAddress, ComplianceStatus, ComplianceStatusType
+from ..repositories.async_redis_repository import AsyncRedisRepository
+from ..status_cache import ComplianceStatusCacheProvider
+
+
+class TestAsyncViews(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        BlocklistIndexProvider.del_singleton()
+        ComplianceStatusCacheProvider.del_singleton()
+        self.fallback_calls = []
+
+        async def fallback(scope, receive, send):
+            self.fallback_calls.append(scope['path'])
+            await send({'type': 'http.response.start', 'status': 599, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        self.application = AsyncViewsApplication(fallback)
+
+    def tearDown(self):
+        BlocklistIndexProvider.del_singleton()
+        ComplianceStatusCacheProvider.del_singleton()
+
+    def call_application(self, method: str, path: str, body: bytes = b'', headers: List[Tuple[bytes, bytes]] = (),
+                         host: bytes = b'testserver') -> Tuple[int, Dict[str, str], bytes]:
+        """
+        :return: Status code, headers and body of the response of the ASGI application
+        """
+        scope = {
+            'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+            'root_path': '', 'query_string': b'', 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            'headers': [(b'host', host)] + list(headers),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async def run():
+            try:
+                await self.application(scope, receive, send)
+            finally:
+                await AsyncRedisRepository.del_singleton()  # Pool is bound to the event loop
+
+        asyncio.run(run())
+        start, body_message = messages
+        return (start['status'], {name.decode(): value.decode() for name, value in start['headers']},
+                body_message['body'])
+
+    def assertSameResponse(self, response, status_code: int, headers: Dict[str, str], body: bytes):
+        self.assertEqual(self.fallback_calls, [])
+        self.assertEqual(status_code, response.status_code)
+        self.assertEqual(body, response.content)
+        django_headers = {name.lower(): value for name, value in response.items()}
+        django_headers.setdefault('content-length', str(len(response.content)))
+        # Redis is read with other clients, only timings can be different
+        self.assertEqual(headers.pop('server-timing', None) is None, django_headers.pop('server-timing', None) is None)
+        self.assertEqual(headers, django_headers)
+
+    def test_address_status(self):
+        verified_address = Account.create().address
+        blocked_address = Account.create().address
+        ComplianceStatus.objects.create(address=verified_address, status=ComplianceStatusType.VERIFIED.value)
+        BlockedAddress.objects.create(address=blocked_address, source='test')
+        for address in (verified_address, blocked_address, Account.create().address, '0x1234'):
+            path = reverse('v1:address-status', kwargs={'address': address})
+            response = self.client.get(path)
+            self.assertSameResponse(response, *self.call_application('GET', path))
+
+    def test_addresses_check(self):
+        blocked_address = Account.create().address
+        BlockedAddress.objects.create(address=blocked_address, source='test')
+        path = reverse('v1:addresses-check')
+        for data in ({'addresses': [blocked_address, Account.create().address]}, {'addresses': ['0x1234']}, {}):
+            body = json.dumps(data).encode()
+            response = self.client.post(path, data=body, content_type='application/json')
+            self.assertSameResponse(response, *self.call_application(
+                'POST', path, body, [(b'content-type', b'application/json'),
+                                     (b'content-length', str(len(body)).encode())]
+            ))
+
+    def test_address_status_redis_shared_cache(self):
+        # Async views read the shared cache with `AsyncRedisRepository`, values are decoded with the cache client
+        address = Account.create().address
+        ComplianceStatus.objects.create(address=address, status=ComplianceStatusType.REJECTED.value)
+        path = reverse('v1:address-status', kwargs={'address': address})
+        for serializer in ('django_redis.serializers.pickle.PickleSerializer',
+                           'django_redis.serializers.json.JSONSerializer'):
+            with self.subTest(serializer=serializer), override_settings(CACHES={'default': {
+                'BACKEND': 'django_redis.cache.RedisCache',
+                'LOCATION': settings.REDIS_URL,
+                'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient', 'SERIALIZER': serializer},
+            }}):
+                ComplianceStatusCacheProvider.del_singleton()
+                status_cache = ComplianceStatusCacheProvider()
+                self.assertTrue(status_cache.redis_shared_cache)
+                cache.delete(status_cache._get_key(address))
+                response = self.client.get(path)  # Status is stored on the shared cache
+                status_cache.local_cache.clear()
+                try:
+                    self.assertSameResponse(response, *self.call_application('GET', path))
+                finally:
+                    cache.delete(status_cache._get_key(address))
+                self.assertEqual(status_cache.get_stats()['shared_hits'], 1)
+
+    @override_settings(SECURE_CONTENT_TYPE_NOSNIFF=True, SECURE_BROWSER_XSS_FILTER=True, X_FRAME_OPTIONS='DENY')
+    def test_middleware_settings(self):
+        self.application = AsyncViewsApplication(self.application.fallback)
+        path = reverse('v1:address-status', kwargs={'address': Account.create().address})
+        status_code, headers, body = self.call_application('GET', path)
+        self.assertEqual(headers['x-content-type-options'], 'nosniff')
+        self.assertEqual(headers['x-frame-options'], 'DENY')
+        self.assertSameResponse(self.client.get(path), status_code, headers, body)
+
+    def test_fallback(self):
+        path = reverse('v1:address-status', kwargs={'address': Account.create().address})
+        requests = [
+            ('GET', path, [(b'cookie', b'sessionid=1')]),
+            ('GET', path, [(b'authorization', b'Token 1')]),
+            ('GET', path, [(b'accept', b'application/json; indent=4')]),
+            ('POST', reverse('v1:addresses-check'), [(b'content-type', b'text/plain')]),
+            ('GET', reverse('v1:about'), []),
+        ]
+        for method, request_path, headers in requests:
+            self.assertEqual(self.call_application(method, request_path, headers=headers)[0], 599)
+        self.assertEqual(len(self.fallback_calls), len(requests))
+
+    def test_disallowed_host(self):
+        path = reverse('v1:address-status', kwargs={'address': Account.create().address})
+        self.assertEqual(self.call_application('GET', path, host=b'evil.com')[0], 599)
+        self.assertEqual(self.fallback_calls, [path])
+
+    @override_settings(MIDDLEWARE=['django.middleware.common.CommonMiddleware',
+                                   'django.middleware.csrf.CsrfViewMiddleware'])
+    def test_unsupported_middleware(self):
+        self.application = AsyncViewsApplication(self.application.fallback)
+        path = reverse('v1:address-status', kwargs={'address': Account.create().address})
+        self.assertEqual(self.call_application('GET', path)[0], 599)
@@ -0,0 +1,57 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..benchmarks.load import Scenario, percentile, request_wsgi, run_scenario
+from ..benchmarks.micro import get_microbenchmarks, run_microbenchmark
+
+
+class TestBenchmarks(SimpleTestCase):
+    def test_microbenchmarks(self):
+        names = set()
+        for name, function in get_microbenchmarks():
+            function()
+            names.add(name)
+        self.assertEqual(len(names), len(get_microbenchmarks()))
+
+        result = run_microbenchmark('sum', lambda: sum(range(100)), repeat=2)
+        self.assertEqual(result['name'], 'sum')
+        self.assertGreater(result['calls'], 0)
+        self.assertLessEqual(result['best_us'], result['mean_us'])
+        self.assertAlmostEqual(result['calls_per_second'], 1e6 / result['best_us'])
+
+    def test_run_scenario(self):
+        from config.wsgi import application
+
+        self.assertEqual(request_wsgi(application, 'GET', '/api/v1/about/')[0], 200)
+        self.assertEqual(request_wsgi(application, 'GET', '/api/v1/not-found/')[0], 404)
+        result = run_scenario(application, Scenario('about', 'GET', '/api/v1/about/'), 3, 10)
+        self.assertEqual((result['name'], result['concurrency'], result['requests'], result['errors']),
+                         ('about', 3, 10, 0))
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 99), 100)
+        self.assertEqual(percentile(values, 100), 100)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline_path = os.path.join(directory, 'baseline.json')
+            with open(baseline_path, 'w') as f:
+                json.dump({'micro': [{'name': 'utils.chunks_10000_by_500', 'best_us': 1.}], 'load': []}, f)
+
+            output_path = os.path.join(directory, 'results.json')
+            stderr = io.StringIO()
+            call_command('run_benchmarks', skip_load=True, filter='utils.chunks', output=output_path,
+                         compare=baseline_path, stderr=stderr)
+            with open(output_path) as f:
+                results = json.load(f)
+        self.assertEqual([result['name'] for result in results['micro']], ['utils.chunks_10000_by_500'])
+        self.assertEqual(results['load'], [])
+        self.assertIn('utils.chunks_10000_by_500: +', stderr.getvalue())  # Slower than 1 us of the baseline
@@ -0,0 +1,95 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from eth_account import Account
+from rest_framework.test import APIClient
+
+from ..blocklist import BlocklistIndex, BlocklistIndexProvider
+from ..models import BlockedAddress
+
+
+class TestBlocklistIndex(TestCase):
+    def setUp(self):
+        self.blocked_addresses = [Account.create().address for _ in range(5)]
+        BlockedAddress.objects.bulk_create([BlockedAddress(address=address, source='test')
+                                            for address in self.blocked_addresses])
+        # Same address listed by other source is only indexed once
+        BlockedAddress.objects.create(address=self.blocked_addresses[0], source='other')
+        self.blocklist_index = BlocklistIndex(ttl=60)
+
+    def test_contains_many(self):
+        not_blocked = [Account.create().address for _ in range(3)]
+        addresses = [not_blocked[0], self.blocked_addresses[2], not_blocked[1], self.blocked_addresses[4],
+                     not_blocked[2]]
+        self.assertEqual(self.blocklist_index.contains_many(addresses), [False, True, False, True, False])
+        self.assertEqual(len(self.blocklist_index), 5)
+        self.assertTrue(self.blocklist_index.contains(self.blocked_addresses[0]))
+        self.assertEqual(self.blocklist_index.contains_many([]), [])
+
+        # Addresses greater or lower than every blocked one
+        self.assertEqual(self.blocklist_index.contains_many(['0x' + '0' * 40, '0x' + 'f' * 40]), [False, False])
+
+    def test_case_insensitive(self):
+        address = self.blocked_addresses[1]
+        self.assertEqual(self.blocklist_index.contains_many([address.lower(), '0x' + address[2:].upper()]),
+                         [True, True])
+
+    def test_empty(self):
+        BlockedAddress.objects.all().delete()
+        self.assertEqual(self.blocklist_index.contains_many(self.blocked_addresses[:2]), [False, False])
+        self.assertEqual(len(self.blocklist_index), 0)
+
+    def test_refresh(self):
+        address = Account.create().address
+        self.assertFalse(self.blocklist_index.contains(address))
+
+        # Blocklist is not checked again until ttl expires
+        BlockedAddress.objects.create(address=address, source='test')
+        with self.assertNumQueries(0):
+            self.assertFalse(self.blocklist_index.contains(address))
+
+        self.blocklist_index.expire()
+        self.assertTrue(self.blocklist_index.contains(address))
+
+        # Index is not loaded again if blocklist did not change
+        self.blocklist_index.expire()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.blocklist_index.contains(address))
+
+        # Modified rows change the blocklist even if the number of rows is the same
+        blocked_address = BlockedAddress.objects.get(address=self.blocked_addresses[3])
+        blocked_address.address = Account.create().address
+        blocked_address.save()
+        self.blocklist_index.expire()
+        self.assertEqual(self.blocklist_index.contains_many([self.blocked_addresses[3], blocked_address.address]),
+                         [False, True])
+
+    def test_ttl(self):
+        blocklist_index = BlocklistIndex(ttl=0)
+        address = Account.create().address
+        self.assertFalse(blocklist_index.contains(address))
+        BlockedAddress.objects.create(address=address, source='test')
+        self.assertTrue(blocklist_index.contains(address))
+
+
+class TestAddressesCheckView(TestCase):
+    def setUp(self):
+        BlocklistIndexProvider.del_singleton()
+
+    def tearDown(self):
+        BlocklistIndexProvider.del_singleton()
+
+    def test_addresses_check(self):
+        blocked_address, address = Account.create().address, Account.create().address
+        BlockedAddress.objects.create(address=blocked_address, source='test')
+        response = APIClient().post(reverse('v1:addresses-check'),
+                                    data={'addresses': [address, blocked_address.lower()]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [{'address': address, 'blocked': False},
+                                                       {'address': blocked_address.lower(), 'blocked': True}]})
+
+    def test_invalid_addresses(self):
+        for addresses in ([], ['0x1234'], 'not a list'):
+            response = APIClient().post(reverse('v1:addresses-check'), data={'addresses': addresses},
+                                        format='json')
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,103 @@
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from djangorestframework_camel_case import parser, render
+from djangorestframework_camel_case.util import camelize as original_camelize
+from djangorestframework_camel_case.util import \
+    underscoreize as original_underscoreize
+from rest_framework.exceptions import ParseError
+
+from .. import camel_case
+from ..camel_case import (CamelCaseJSONParser, CamelCaseJSONRenderer, camelize,
+                          underscoreize)
+
+
+class TestCamelCase(SimpleTestCase):
+    data = {
+        'compliance_status': {'is_verified': True, 'blocked_by_sources': ['ofac_sdn', 'eu_sanctions']},
+        'safes_owners': [{'safe_address': '0x' + '1' * 40, 'owner_addresses': ['0x' + '2' * 40],
+                          'deployment_tx': {'block_number': 1, 'gas_used_2': 21000}}],
+        'results': ({'created_date': None, 'token_amount': 1.5, 'big_value': 2 ** 70},),
+        'version': 'v1',
+    }
+
+    def test_camelize(self):
+        camelized = camelize(self.data)
+        self.assertEqual(camelized['complianceStatus'], {'isVerified': True,
+                                                         'blockedBySources': ['ofac_sdn', 'eu_sanctions']})
+        self.assertEqual(camelized['safesOwners'][0]['deploymentTx'], {'blockNumber': 1, 'gasUsed2': 21000})
+        self.assertEqual(camelized, original_camelize(self.data))
+
+    def test_round_trip(self):
+        camelized = camelize(self.data)
+        self.assertEqual(underscoreize(camelized), original_underscoreize(camelized))
+        self.assertEqual(underscoreize(camelized), json.loads(json.dumps(self.data)))  # Tuples are lists
+        self.assertEqual(underscoreize({'someValue': [{'innerKey': 1}]}), {'some_value': [{'inner_key': 1}]})
+
+
+class TestCamelCaseJSONRenderer(SimpleTestCase):
+    def setUp(self):
+        self.renderer = CamelCaseJSONRenderer()
+        self.original_renderer = render.CamelCaseJSONRenderer()
+
+    def test_render(self):
+        data = {
+            'created_date': datetime.datetime(2019, 3, 4, 5, 6, 7, 123456, tzinfo=datetime.timezone.utc),
+            'naive_date': datetime.datetime(2019, 3, 4, 5, 6, 7, 999),
+            'day': datetime.date(2019, 3, 4),
+            'unicode_text': 'café    ',
+            'items': [{'item_id': 1, 'item_value': 0.1}],
+        }
+        rendered = self.renderer.render(data)
+        # Datetimes with microseconds and `Z`, as DRF encoder does
+        self.assertEqual(json.loads(rendered.decode())['createdDate'], '2019-03-04T05:06:07.123456Z')
+        self.assertEqual(json.loads(rendered.decode())['naiveDate'], '2019-03-04T05:06:07.000999')
+        self.assertEqual(json.loads(rendered.decode()), json.loads(self.original_renderer.render(data).decode()))
+        self.assertIn(b'\\u2028', rendered)
+        self.assertEqual(self.renderer.render(None), b'')
+
+    def test_fallbacks(self):
+        data = {'big_value': 2 ** 70, 'some_key': ['café']}
+        # Integers not supported by `orjson`, `TypeError` is raised and DRF renderer is used
+        self.assertEqual(self.renderer.render(data), self.original_renderer.render(data))
+
+        renderer = CamelCaseJSONRenderer()
+        renderer.ensure_ascii = True
+        self.assertEqual(renderer.render(data), b'{"bigValue":1180591620717411303424,"someKey":["caf\\u00e9"]}')
+        self.assertEqual(self.renderer.render(data, 'application/json; indent=2'),
+                         self.original_renderer.render(data, 'application/json; indent=2'))
+        self.assertIn(b'\n  "bigValue"', self.renderer.render(data, 'application/json; indent=2'))
+
+        with mock.patch.object(camel_case, 'orjson', None):
+            self.assertEqual(self.renderer.render({'some_key': 1}), b'{"someKey":1}')
+
+    def test_non_finite_floats(self):
+        # Rejected as DRF does, `orjson` would render them as `null`
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.assertRaises(ValueError):
+                self.renderer.render({'some_key': [{'value': value}]})
+        self.assertEqual(self.renderer.render({'some_key': None, 'value': 1.5}), b'{"someKey":null,"value":1.5}')
+
+        renderer = CamelCaseJSONRenderer()
+        renderer.strict = False
+        self.assertEqual(renderer.render({'value': float('nan')}), b'{"value":NaN}')
+
+
+class TestCamelCaseJSONParser(SimpleTestCase):
+    def test_parse(self):
+        content = b'{"someKey": [{"innerKey": "caf\\u00e9", "isValid": true}], "value2": null}'
+        for encoding in ('utf-8', 'latin-1'):
+            parser_context = {'encoding': encoding}
+            parsed = CamelCaseJSONParser().parse(io.BytesIO(content), parser_context=parser_context)
+            self.assertEqual(parsed, {'some_key': [{'inner_key': 'café', 'is_valid': True}], 'value_2': None})
+            original_parsed = parser.CamelCaseJSONParser().parse(io.BytesIO(content), parser_context=parser_context)
+            self.assertEqual(parsed, original_parsed)
+
+    def test_parse_error(self):
+        for content in (b'{"someKey":', b'\xff\xfe'):
+            with self.assertRaises(ParseError):
+                CamelCaseJSONParser().parse(io.BytesIO(content))
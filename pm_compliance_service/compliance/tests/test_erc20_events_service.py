@@ -0,0 +1,150 @@
+from typing import Any, Dict, List
+from unittest import SkipTest, mock
+
+from django.conf import settings
+from django.test import TestCase
+
+from eth_account import Account
+from eth_utils import keccak
+from hexbytes import HexBytes
+from requests.exceptions import Timeout
+from web3 import HTTPProvider, Web3
+
+from gnosis.eth import EthereumClient
+
+from ..models import Erc20EventsCheckpoint, Erc20Transfer
+from ..services.erc20_events_service import (Erc20EventsService,
+                                             Erc20EventsServiceException)
+
+TRANSFER_TOPIC = keccak(text='Transfer(address,address,uint256)')
+# Contract emitting `Transfer(msg.sender, to, value)` for every call with `abi.encode(to, value)` as data
+TRANSFER_EMITTER_RUNTIME = '6020602060003760003533' + '7f' + TRANSFER_TOPIC.hex() + '60206000a300'
+TRANSFER_EMITTER_INIT = '603280600b6000396000f3' + TRANSFER_EMITTER_RUNTIME
+
+
+def build_transfer_log(token_address: str, _from: str, to: str, value: int, block_number: int,
+                       log_index: int = 0) -> Dict[str, Any]:
+    return {
+        'address': token_address,
+        'topics': [HexBytes(TRANSFER_TOPIC), HexBytes(_from).rjust(32, b'\0'), HexBytes(to).rjust(32, b'\0')],
+        'data': '0x' + value.to_bytes(32, 'big').hex(),
+        'blockNumber': block_number,
+        'transactionHash': HexBytes(keccak(text='%s-%d' % (token_address, block_number))),
+        'logIndex': log_index,
+    }
+
+
+class TestErc20EventsService(TestCase):
+    def setUp(self):
+        self.ethereum_client = mock.MagicMock()
+        self.ethereum_client.w3.eth.blockNumber = 106
+        self.requested_ranges = []
+        self.errors = []
+        self.logs = []  # type: List[Dict[str, Any]]
+        self.ethereum_client.w3.eth.getLogs.side_effect = self.get_logs
+        self.erc20_events_service = Erc20EventsService(self.ethereum_client, confirmations=6, initial_block_range=8,
+                                                       max_block_range=64, tokens_per_query=10,
+                                                       target_query_seconds=10)
+        self.token_address = Account.create().address
+
+    def get_logs(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.requested_ranges.append((params['fromBlock'], params['toBlock']))
+        if self.errors:
+            raise self.errors.pop(0)
+        return [log for log in self.logs if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']]
+
+    def test_index(self):
+        _from, to = Account.create().address, Account.create().address
+        self.logs = [build_transfer_log(self.token_address, _from, to, 10, 5),
+                     build_transfer_log(self.token_address, _from, to, 20, 50)]
+        self.assertEqual(self.erc20_events_service.add_tokens([self.token_address]), 1)
+        self.assertEqual(self.erc20_events_service.add_tokens([self.token_address]), 0)
+        self.assertEqual(self.erc20_events_service.index(), 2)
+        self.assertEqual(list(Erc20Transfer.objects.order_by('block_number').values_list('_from', 'to', 'value')),
+                         [(_from, to, 10), (_from, to, 20)])
+        self.assertEqual(Erc20EventsCheckpoint.objects.get(token_address=self.token_address).block_number, 101)
+        # Range doubles while node answers fast
+        self.assertEqual(self.requested_ranges, [(0, 7), (8, 23), (24, 55), (56, 100)])
+
+        self.requested_ranges.clear()
+        self.assertEqual(self.erc20_events_service.index(), 0)  # Resumed from the checkpoint
+        self.assertEqual(self.requested_ranges, [])
+
+    def test_shrink_failed_range(self):
+        # Range refused at the end of the blocks to index is shorter than `block_range`
+        self.erc20_events_service.block_range = 64
+        self.erc20_events_service.add_tokens([self.token_address], from_block=90)
+        self.errors = [ValueError('query returned more than 10000 results')]
+        self.erc20_events_service.index()
+        self.assertEqual(self.requested_ranges, [(90, 100), (90, 94), (95, 100)])
+
+    def test_timeout(self):
+        self.erc20_events_service.add_tokens([self.token_address])
+        self.errors = [Timeout(), Timeout()]
+        self.erc20_events_service.index()
+        self.assertEqual(self.requested_ranges[:3], [(0, 7), (0, 3), (0, 1)])
+        self.assertEqual(Erc20EventsCheckpoint.objects.get(token_address=self.token_address).block_number, 101)
+
+    def test_errors(self):
+        self.erc20_events_service.add_tokens([self.token_address], from_block=100)
+        self.errors = [ValueError('query returned more than 10000 results')]
+        with self.assertRaises(Erc20EventsServiceException):  # Range has only one block
+            self.erc20_events_service.index()
+
+        self.erc20_events_service.add_tokens([Account.create().address])
+        self.errors = [ValueError('invalid argument')]
+        with self.assertRaises(Erc20EventsServiceException):
+            self.erc20_events_service.index()
+
+    def test_decode_transfer(self):
+        log = build_transfer_log(self.token_address, Account.create().address, Account.create().address, 1, 1)
+        self.assertEqual(Erc20EventsService.decode_transfer(log).value, 1)
+        erc721_log = dict(log, topics=log['topics'] + [HexBytes(1).rjust(32, b'\0')], data='0x')
+        self.assertIsNone(Erc20EventsService.decode_transfer(erc721_log))
+
+
+class TestErc20EventsServiceNode(TestCase):
+    """
+    Index events emitted on the Ethereum node of `ETHEREUM_NODE_URL` (ganache on `run_tests.sh`)
+    """
+    @classmethod
+    def setUpClass(cls):
+        if not settings.ETHEREUM_NODE_URL or not Web3(HTTPProvider(settings.ETHEREUM_NODE_URL)).isConnected():
+            raise SkipTest('Ethereum node is not available')
+        super().setUpClass()
+        cls.ethereum_client = EthereumClient(settings.ETHEREUM_NODE_URL)
+        cls.w3 = cls.ethereum_client.w3
+
+    def send_transaction(self, to: str = None, data: str = '0x') -> Dict[str, Any]:
+        tx = {'from': self.w3.eth.accounts[0], 'data': data, 'gas': 200000}
+        if to:
+            tx['to'] = to
+        return self.w3.eth.waitForTransactionReceipt(self.w3.eth.sendTransaction(tx))
+
+    def deploy_token(self) -> str:
+        """
+        :return: Address of a contract emitting ERC20 transfers
+        """
+        return self.send_transaction(data='0x' + TRANSFER_EMITTER_INIT)['contractAddress']
+
+    def transfer(self, token_address: str, to: str, value: int):
+        data = HexBytes(to).rjust(32, b'\0') + value.to_bytes(32, 'big')
+        self.send_transaction(token_address, '0x' + data.hex())
+
+    def test_index(self):
+        first_block = self.w3.eth.blockNumber + 1
+        token_address = self.deploy_token()
+        to_addresses = [Account.create().address for _ in range(3)]
+        for value, to in enumerate(to_addresses, start=1):
+            self.transfer(token_address, to, value)
+
+        erc20_events_service = Erc20EventsService(self.ethereum_client, confirmations=0, initial_block_range=1,
+                                                  max_block_range=100, tokens_per_query=10,
+                                                  target_query_seconds=10)
+        erc20_events_service.add_tokens([token_address], from_block=first_block)
+        self.assertEqual(erc20_events_service.index([token_address]), 3)
+        self.assertEqual(list(Erc20Transfer.objects.filter(token_address=token_address).order_by('block_number')
+                              .values_list('_from', 'to', 'value')),
+                         [(self.w3.eth.accounts[0], to, value) for value, to in enumerate(to_addresses, start=1)])
+        self.assertEqual(Erc20EventsCheckpoint.objects.get(token_address=token_address).block_number,
+                         self.w3.eth.blockNumber + 1)
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from eth_account import Account
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ..exports import iter_export
+from ..models import BlockedAddress, ComplianceStatus, ComplianceStatusType
+
+
+class TestExports(TestCase):
+    def setUp(self):
+        self.addresses = [Account.create().address for _ in range(5)]
+        ComplianceStatus.objects.bulk_create([ComplianceStatus(address=address,
+                                                               status=ComplianceStatusType.VERIFIED.value)
+                                              for address in self.addresses])
+        self.statuses = list(ComplianceStatus.objects.order_by('id'))
+
+    def test_ndjson(self):
+        chunks = list(iter_export('statuses', 'ndjson', 2))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [2, 2, 1])
+        records = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        encoder = DjangoJSONEncoder()
+        self.assertEqual(records, [{'address': compliance_status.address,
+                                    'status': ComplianceStatusType.VERIFIED.name,
+                                    'created': encoder.default(compliance_status.created),
+                                    'modified': encoder.default(compliance_status.modified)}
+                                   for compliance_status in self.statuses])
+
+    def test_csv(self):
+        chunks = list(iter_export('statuses', 'csv', 4))
+        self.assertEqual(len(chunks), 2)
+        rows = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(rows[0], ['address', 'status', 'created', 'modified'])
+        self.assertEqual(rows[1:], [[compliance_status.address, ComplianceStatusType.VERIFIED.name,
+                                     compliance_status.created.isoformat(), compliance_status.modified.isoformat()]
+                                    for compliance_status in self.statuses])
+
+    def test_empty(self):
+        self.assertEqual(list(iter_export('blocked-addresses', 'ndjson', 2)), [])
+        self.assertEqual(list(iter_export('blocked-addresses', 'csv', 2)), ['address,source,created,modified\r\n'])
+
+    def test_unknown_export(self):
+        for name, file_format in (('unknown', 'csv'), ('statuses', 'xml')):
+            with self.assertRaises(ValueError):
+                iter_export(name, file_format, 2)
+
+    def test_command(self):
+        BlockedAddress.objects.create(address=self.addresses[0], source='test')
+        with tempfile.TemporaryDirectory() as directory:
+            output_path = os.path.join(directory, 'blocked-addresses.csv')
+            call_command('export_compliance_records', 'blocked-addresses', file_format='csv', output=output_path,
+                         chunk_size=1, stdout=io.StringIO())
+            with open(output_path, newline='') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual([row[:2] for row in rows], [['address', 'source'], [self.addresses[0], 'test']])
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class TestExportView(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(
+            user=User.objects.create_user(Account.create().address)).key)
+        self.addresses = [Account.create().address for _ in range(3)]
+        BlockedAddress.objects.bulk_create([BlockedAddress(address=address, source='test')
+                                            for address in self.addresses])
+
+    def test_export(self):
+        response = self.client.get(reverse('v1:export', kwargs={'name': 'blocked-addresses',
+                                                                'file_format': 'ndjson'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="blocked-addresses.ndjson"')
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([json.loads(line)['address'] for line in ''.join(chunks).splitlines()], self.addresses)
+
+        response = self.client.get(reverse('v1:export', kwargs={'name': 'blocked-addresses', 'file_format': 'csv'}))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['address', 'source', 'created', 'modified'])
+        self.assertEqual([row[0] for row in rows[1:]], self.addresses)
+
+    def test_not_found(self):
+        response = self.client.get(reverse('v1:export', kwargs={'name': 'users', 'file_format': 'csv'}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('v1:export', kwargs={'name': 'statuses', 'file_format': 'xml'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_authentication(self):
+        response = APIClient().get(reverse('v1:export', kwargs={'name': 'statuses', 'file_format': 'csv'}))
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+import rlp
+from eth_account import Account
+from eth_account.internal.transactions import Transaction
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import Web3
+
+from ..rpc import JsonRpcBatchTransport, JsonRpcError
+from ..services.funding_service import (EtherLimitExceeded,
+                                        FundingBatchException, FundingService,
+                                        NonceManager)
+from .test_rpc import StubNode
+
+
+def build_ethereum_client(chain_nonce: int = 0) -> mock.MagicMock:
+    ethereum_client = mock.MagicMock()
+    ethereum_client.w3.toWei = Web3.toWei
+    ethereum_client.w3.eth.gasPrice = 10
+    ethereum_client.w3.eth.getTransactionCount.return_value = chain_nonce
+    return ethereum_client
+
+
+class TestNonceManager(TestCase):
+    def setUp(self):
+        self.ethereum_client = build_ethereum_client(chain_nonce=5)
+        self.nonce_manager = NonceManager(self.ethereum_client, Account.create().address, ttl=60)
+
+    def tearDown(self):
+        self.nonce_manager.reset()
+
+    def test_reserve(self):
+        # Nonce is not known, it's requested to the node
+        self.assertEqual(self.nonce_manager.reserve(3), [5, 6, 7])
+        self.ethereum_client.w3.eth.getTransactionCount.assert_called_once_with(self.nonce_manager.address,
+                                                                                'pending')
+        # Next reservations are consecutive without asking the node
+        self.assertEqual(self.nonce_manager.reserve(), [8])
+        self.assertEqual(self.nonce_manager.reserve(2), [9, 10])
+        self.assertEqual(self.ethereum_client.w3.eth.getTransactionCount.call_count, 1)
+        self.assertLessEqual(self.nonce_manager.redis.ttl(self.nonce_manager.key), 60)
+
+    def test_chain_nonce_ahead(self):
+        self.assertEqual(self.nonce_manager.reserve(), [5])
+        # Transactions were sent from the account by other means, and nonce on Redis expired
+        self.nonce_manager.reset()
+        self.ethereum_client.w3.eth.getTransactionCount.return_value = 20
+        self.assertEqual(self.nonce_manager.reserve(2), [20, 21])
+
+        # Nonce on chain is only used if it's ahead of Redis
+        self.assertEqual(self.nonce_manager.reserve_nonces_script(keys=[self.nonce_manager.key],
+                                                                  args=[1, 30, 60]), 30)
+        self.assertEqual(self.nonce_manager.reserve_nonces_script(keys=[self.nonce_manager.key],
+                                                                  args=[1, 10, 60]), 31)
+
+    def test_reset(self):
+        self.assertEqual(self.nonce_manager.reserve(2), [5, 6])
+        self.nonce_manager.reset()
+        self.assertEqual(self.nonce_manager.reserve(), [5])
+        self.assertEqual(self.ethereum_client.w3.eth.getTransactionCount.call_count, 2)
+
+
+class TestFundingService(TestCase):
+    def setUp(self):
+        cache.delete(FundingService.GAS_PRICE_CACHE_KEY)
+        self.errors = {}  # Errors returned for the nonces of the transactions
+        self.stub_node = StubNode({'eth_sendRawTransaction': self.send_raw_transaction})
+        self.transport = JsonRpcBatchTransport('http://localhost:8545', 100, max_retries=0, retry_backoff=0,
+                                               session=self.stub_node)
+        self.ethereum_client = build_ethereum_client(chain_nonce=2)
+        self.funding_service = FundingService(self.ethereum_client, self.transport, Account.create().privateKey,
+                                              max_eth_to_send=0.1, gas_price_cache_ttl=60, chain_id=1)
+
+    def tearDown(self):
+        self.funding_service.nonce_manager.reset()
+        cache.delete(FundingService.GAS_PRICE_CACHE_KEY)
+
+    def send_raw_transaction(self, raw_transaction: str) -> str:
+        nonce = self.get_nonce(raw_transaction)
+        if nonce in self.errors:
+            raise JsonRpcError(-32000, self.errors[nonce])
+        return HexBytes(keccak(HexBytes(raw_transaction))).hex()
+
+    @staticmethod
+    def get_nonce(raw_transaction: str) -> int:
+        return rlp.decode(HexBytes(raw_transaction), Transaction).nonce
+
+    def test_send_eth_to_many(self):
+        transfers = [(Account.create().address, i) for i in range(1, 4)]
+        tx_hashes = self.funding_service.send_eth_to_many(transfers)
+        self.assertEqual(len(self.stub_node.payloads), 1)  # Sent in one batch
+        sent = [HexBytes(request['params'][0]) for request in self.stub_node.payloads[0]]
+        self.assertEqual(tx_hashes, [HexBytes(keccak(raw_transaction)) for raw_transaction in sent])
+        self.assertEqual([self.get_nonce(raw_transaction) for raw_transaction in sent], [2, 3, 4])
+        self.assertEqual(self.funding_service.send_eth_to(Account.create().address, 1),
+                         HexBytes(keccak(HexBytes(self.stub_node.payloads[1][0]['params'][0]))))
+        self.assertEqual(self.funding_service.send_eth_to_many([]), [])
+
+    def test_ether_limit(self):
+        with self.assertRaises(EtherLimitExceeded):
+            self.funding_service.send_eth_to(Account.create().address, Web3.toWei(0.2, 'ether'))
+        self.assertEqual(self.stub_node.payloads, [])
+        self.funding_service.send_eth_to(Account.create().address, Web3.toWei(0.1, 'ether'))
+        self.assertEqual(len(self.stub_node.payloads), 1)
+
+    def test_batch_errors(self):
+        # Transactions already known by the node were sent
+        self.errors = {2: 'already known', 3: 'insufficient funds for gas * price + value'}
+        transfers = [(Account.create().address, 1) for _ in range(3)]
+        with self.assertRaises(FundingBatchException) as context:
+            self.funding_service.send_eth_to_many(transfers)
+        sent = [HexBytes(request['params'][0]) for request in self.stub_node.payloads[0]]
+        self.assertEqual(context.exception.tx_hashes,
+                         [HexBytes(keccak(sent[0])), None, HexBytes(keccak(sent[2]))])
+
+        # Nonce is requested again to the node, as nonce 3 was not used
+        self.errors = {}
+        self.funding_service.send_eth_to(Account.create().address, 1)
+        self.assertEqual(self.ethereum_client.w3.eth.getTransactionCount.call_count, 2)
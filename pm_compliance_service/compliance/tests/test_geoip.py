@@ -0,0 +1,107 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..geoip import (GeoIPDatabase, GeoIPRange, get_client_ip, merge_ranges,
+                     pack_ip, parse_range, write_database)
+
+
+def build_ranges(*rows):
+    ranges = {4: [], 6: []}
+    for row in rows:
+        version, geoip_range = parse_range(row)
+        ranges[version].append(geoip_range)
+    return {version: merge_ranges(version_ranges) for version, version_ranges in ranges.items()}
+
+
+class TestGeoIP(SimpleTestCase):
+    def test_pack_ip(self):
+        self.assertEqual(pack_ip('1.2.3.4'), (4, b'\x01\x02\x03\x04'))
+        self.assertEqual(pack_ip('::ffff:1.2.3.4'), (4, b'\x01\x02\x03\x04'))
+        self.assertEqual(pack_ip('2001:db8::1'), (6, bytes.fromhex('20010db8' + '0' * 22 + '01')))
+        with self.assertRaises(ValueError):
+            pack_ip('1.2.3')
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range(['10.0.0.0/24', 'es']),
+                         (4, GeoIPRange(b'\x0a\x00\x00\x00', b'\x0a\x00\x00\xff', b'ES')))
+        self.assertEqual(parse_range(['10.0.0.1', ' 10.0.0.9', 'ES']),
+                         (4, GeoIPRange(b'\x0a\x00\x00\x01', b'\x0a\x00\x00\x09', b'ES')))
+        for row in (['10.0.0.9', '10.0.0.1', 'ES'], ['10.0.0.1', '::1', 'ES'], ['10.0.0.0/24', 'ESP'],
+                    ['10.0.0.0/24']):
+            with self.assertRaises(ValueError):
+                parse_range(row)
+
+    def test_merge_ranges(self):
+        ranges = [parse_range(row)[1] for row in (['10.0.1.0/24', 'ES'], ['10.0.0.0/24', 'ES'],
+                                                  ['10.0.2.0/24', 'FR'], ['10.0.4.0/24', 'FR'])]
+        self.assertEqual(merge_ranges(ranges), [
+            GeoIPRange(b'\x0a\x00\x00\x00', b'\x0a\x00\x01\xff', b'ES'),
+            GeoIPRange(b'\x0a\x00\x02\x00', b'\x0a\x00\x02\xff', b'FR'),
+            GeoIPRange(b'\x0a\x00\x04\x00', b'\x0a\x00\x04\xff', b'FR'),
+        ])
+        with self.assertRaises(ValueError):
+            merge_ranges(ranges + [parse_range(['10.0.1.128/25', 'FR'])[1]])
+
+    def test_get_client_ip(self):
+        meta = {'REMOTE_ADDR': '127.0.0.1', 'HTTP_X_REAL_IP': '8.8.8.8'}
+        self.assertEqual(get_client_ip(meta, 0), '8.8.8.8')
+        meta['HTTP_X_FORWARDED_FOR'] = '1.1.1.1, 2.2.2.2, 3.3.3.3'
+        self.assertEqual(get_client_ip(meta, 0), '3.3.3.3')
+        self.assertEqual(get_client_ip(meta, 1), '2.2.2.2')
+        self.assertEqual(get_client_ip(meta, 5), '1.1.1.1')
+        self.assertEqual(get_client_ip({'REMOTE_ADDR': '127.0.0.1'}, 0), '127.0.0.1')
+
+
+class TestGeoIPDatabase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'countries.bin')
+        write_database(self.path, build_ranges(['1.0.0.0', '1.0.0.255', 'AU'], ['5.0.0.0/8', 'ES'],
+                                               ['2001:db8::/32', 'US'], ['2a00::', '2a00::ff', 'FR']))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_country(self):
+        database = GeoIPDatabase(self.path, reload_interval=60)
+        database.refresh()
+        self.assertEqual(len(database), 4)
+        self.assertEqual(database.get_country('1.0.0.0'), 'AU')
+        self.assertEqual(database.get_country('1.0.0.255'), 'AU')
+        self.assertIsNone(database.get_country('1.0.1.0'))
+        self.assertEqual(database.get_country('5.255.255.255'), 'ES')
+        self.assertEqual(database.get_country('::ffff:5.1.2.3'), 'ES')
+        self.assertIsNone(database.get_country('0.0.0.1'))
+        self.assertEqual(database.get_country('2001:db8:ffff::1'), 'US')
+        # Ranges ending with zeros are still found
+        self.assertEqual(database.get_country('2a00::'), 'FR')
+        self.assertEqual(database.get_country('2a00::ff'), 'FR')
+        self.assertIsNone(database.get_country('2a00::100'))
+        self.assertIsNone(database.get_country('not an ip'))
+
+    def test_reload(self):
+        database = GeoIPDatabase(self.path, reload_interval=0)
+        self.assertEqual(database.get_country('5.1.2.3'), 'ES')
+        write_database(self.path, build_ranges(['5.0.0.0/8', 'PT']))
+        self.assertEqual(database.get_country('5.1.2.3'), 'PT')
+        self.assertIsNone(database.get_country('1.0.0.1'))
+
+        # Previous version is kept if the new one is not valid
+        invalid_path = self.path + '.invalid'
+        with open(invalid_path, 'wb') as f:
+            f.write(b'not a database')
+        os.replace(invalid_path, self.path)
+        self.assertEqual(database.get_country('5.1.2.3'), 'PT')
+
+    def test_reload_interval(self):
+        database = GeoIPDatabase(self.path, reload_interval=3600)
+        self.assertEqual(database.get_country('5.1.2.3'), 'ES')
+        write_database(self.path, build_ranges(['5.0.0.0/8', 'PT']))
+        self.assertEqual(database.get_country('5.1.2.3'), 'ES')
+
+    def test_missing_file(self):
+        database = GeoIPDatabase(os.path.join(self.directory.name, 'missing.bin'), reload_interval=0)
+        self.assertIsNone(database.get_country('5.1.2.3'))
+        self.assertEqual(len(database), 0)
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from eth_account import Account
+from redis.exceptions import ConnectionError
+
+from ..imports import CopyBuffer, StatusesImporter
+from ..models import ComplianceStatus, ComplianceStatusType
+from ..services.notification_service import (NotificationService,
+                                             NotificationServiceProvider)
+from ..status_cache import ComplianceStatusCacheProvider
+
+
+class TestCopyBuffer(TestCase):
+    def test_read(self):
+        copy_buffer = CopyBuffer(iter(['abc', '', 'defg', 'h']))
+        self.assertEqual(copy_buffer.read(2), 'ab')
+        self.assertEqual(copy_buffer.read(5), 'cdefg')
+        self.assertEqual(copy_buffer.read(), 'h')
+        self.assertEqual(copy_buffer.read(1), '')
+
+
+class TestStatusesImporter(TestCase):
+    def test_iter_copy_rows(self):
+        address = Account.create().address
+        rows = [
+            ['address', 'email'],
+            [address, 'user@gnosis.pm'],
+            [address.lower()],
+            [],
+            ['0x1234'],
+            [Account.create().address, 'not an email'],
+            [address[:-1] + ('a' if address[-1] != 'a' else 'b')],  # Checksum is wrong
+        ]
+        importer = StatusesImporter(batch_size=2)
+        lines = list(csv.reader(io.StringIO(''.join(importer.iter_copy_rows(rows)))))
+        self.assertEqual(lines, [[address, 'user@gnosis.pm'], [address, '']])
+        self.assertEqual(importer.rows, 2)
+        self.assertEqual(importer.invalid_rows, 3)
+
+    def test_on_commit_redis_error(self):
+        # Statuses are stored when the hook runs, import does not fail if Redis is not available
+        address = Account.create().address
+        importer = StatusesImporter()
+        with mock.patch.object(ComplianceStatusCacheProvider(), 'invalidate_many',
+                               side_effect=ConnectionError) as invalidate_many, \
+                mock.patch.object(NotificationServiceProvider(), 'notify_status_changes',
+                                  side_effect=ConnectionError) as notify_status_changes:
+            importer._on_commit([(address, 'user@gnosis.pm', True)])
+        invalidate_many.assert_called_once_with([address])
+        notify_status_changes.assert_called_once_with([(address, importer.status, 'user@gnosis.pm')])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY requires PostgreSQL')
+class TestStatusesImporterRun(TransactionTestCase):
+    def setUp(self):
+        NotificationServiceProvider.del_singleton()
+        self.redis = NotificationServiceProvider().redis
+        self.redis.delete(NotificationService.PENDING_KEY, NotificationService.CHANGES_KEY)
+
+    def tearDown(self):
+        self.redis.delete(NotificationService.PENDING_KEY, NotificationService.CHANGES_KEY)
+        NotificationServiceProvider.del_singleton()
+
+    def get_notified(self):
+        return {address.decode(): json.loads(change)['status']
+                for address, change in self.redis.hgetall(NotificationService.CHANGES_KEY).items()}
+
+    def test_run(self):
+        verified_address = Account.create().address
+        email_address = Account.create().address
+        new_address = Account.create().address
+        ComplianceStatus.objects.create(address=verified_address, status=ComplianceStatusType.VERIFIED.value)
+        ComplianceStatus.objects.create(address=email_address, status=ComplianceStatusType.REJECTED.value)
+        self.redis.delete(NotificationService.PENDING_KEY, NotificationService.CHANGES_KEY)
+
+        result = StatusesImporter(ComplianceStatusType.REJECTED).run([
+            [verified_address], [email_address, 'user@gnosis.pm'], [new_address], ['0x1234'],
+        ])
+        self.assertEqual((result.rows, result.invalid_rows, result.changed), (3, 1, 3))
+        self.assertEqual(set(ComplianceStatus.objects.values_list('status', flat=True)),
+                         {ComplianceStatusType.REJECTED.value})
+        # Only email of `email_address` changed
+        self.assertEqual(self.get_notified(), {verified_address: 'REJECTED', new_address: 'REJECTED'})
+
+    def test_rejected_not_verified(self):
+        address = Account.create().address
+        ComplianceStatus.objects.create(address=address, status=ComplianceStatusType.REJECTED.value)
+        self.redis.delete(NotificationService.PENDING_KEY, NotificationService.CHANGES_KEY)
+        result = StatusesImporter(ComplianceStatusType.VERIFIED).run([[address]])
+        self.assertEqual(result.changed, 0)
+        self.assertEqual(self.get_notified(), {})
@@ -0,0 +1,88 @@
+import os
+import threading
+from typing import Any, Dict, List, Sequence
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from ..services.internal_tx_service import (InternalTxService,
+                                            InternalTxServiceProvider,
+                                            TracingNodes)
+
+
+class FakeTransport:
+    def __init__(self, block_number: int = 100, traces: Dict[str, List[Dict[str, Any]]] = None):
+        self.block_number = block_number
+        self.traces = traces or {}
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def call(self, method: str, params: Sequence[Any]) -> Any:
+        self.calls.append(method)
+        self.release.wait()
+        if method == 'eth_blockNumber':
+            return hex(self.block_number)
+        elif method == 'trace_transaction':
+            return self.traces.get(params[0])
+        elif method == 'trace_filter':
+            return [{'blockNumber': int(params[0]['fromBlock'], 16)}]
+
+
+class TestTracingNodes(TestCase):
+    def test_call_free_node(self):
+        saturated_transport = FakeTransport()
+        saturated_transport.release.clear()
+        free_transport = FakeTransport()
+        nodes = TracingNodes([saturated_transport, free_transport], 1)
+        blocked_call = threading.Thread(target=nodes.call, args=('eth_blockNumber', []))
+        blocked_call.start()
+        try:
+            for _ in range(3):
+                call = threading.Thread(target=nodes.call, args=('eth_blockNumber', []))
+                call.start()
+                call.join(timeout=5)
+                self.assertFalse(call.is_alive())
+            self.assertEqual(len(saturated_transport.calls), 1)
+            self.assertEqual(len(free_transport.calls), 3)
+        finally:
+            saturated_transport.release.set()
+            blocked_call.join()
+
+    def test_no_nodes(self):
+        with self.assertRaises(ValueError):
+            TracingNodes([], 1)
+
+        InternalTxServiceProvider.del_singleton()
+        with override_settings(ETHEREUM_TRACING_NODE_URLS=[]), self.assertRaises(ImproperlyConfigured):
+            InternalTxServiceProvider()
+
+
+class TestInternalTxService(TestCase):
+    def setUp(self):
+        self.tx_hashes = ['0x' + os.urandom(32).hex() for _ in range(3)]
+        self.transport = FakeTransport(block_number=100, traces={
+            self.tx_hashes[0]: [{'blockNumber': 10}],
+            self.tx_hashes[1]: [{'blockNumber': 99}],  # Not finalized
+        })
+        self.internal_tx_service = InternalTxService([self.transport], 2, 2, 6, 10)
+
+    def tearDown(self):
+        self.internal_tx_service.executor.shutdown()
+
+    def test_get_traces(self):
+        expected = [[{'blockNumber': 10}], [{'blockNumber': 99}], None]
+        self.assertEqual(self.internal_tx_service.get_traces(self.tx_hashes), expected)
+        self.transport.calls.clear()
+        self.assertEqual(self.internal_tx_service.get_traces(self.tx_hashes), expected)
+        # Only traces of finalized blocks are cached
+        self.assertEqual(self.transport.calls, ['trace_transaction', 'trace_transaction'])
+
+    def test_iter_filter_traces(self):
+        from_block = int.from_bytes(os.urandom(3), 'big')  # Traces are cached by block range
+        self.transport.block_number = from_block + 100
+        ranges = [(first_block, last_block, traces) for first_block, last_block, traces
+                  in self.internal_tx_service.iter_filter_traces(from_block, from_block + 24)]
+        self.assertEqual(ranges, [(from_block, from_block + 9, [{'blockNumber': from_block}]),
+                                  (from_block + 10, from_block + 19, [{'blockNumber': from_block + 10}]),
+                                  (from_block + 20, from_block + 24, [{'blockNumber': from_block + 20}])])
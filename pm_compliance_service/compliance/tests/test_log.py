@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import log
+from ..log import ROUTE_ATOM, AccessLogSampler, QueueListenerHandler
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+
+    def emit(self, record: logging.LogRecord):
+        self.unblocked.wait()
+        self.messages.append(record.getMessage())
+
+
+class TestQueueListenerHandler(SimpleTestCase):
+    def setUp(self):
+        self.target_handler = ListHandler()
+        self.handler = QueueListenerHandler([self.target_handler], error_timeout=0.2)
+        self.logger = logging.Logger('test_queue_listener_handler')
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.target_handler.unblocked.set()
+        self.handler.close()
+
+    def test_error_waits_for_queued_records(self):
+        self.logger.info('Info')
+        self.logger.error('Error')
+        self.assertEqual(self.target_handler.messages, ['Info', 'Error'])
+
+    def test_error_timeout(self):
+        self.target_handler.unblocked.clear()
+        self.logger.info('Info')
+        start = time.monotonic()
+        self.logger.error('Error')
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(self.target_handler.messages, [])
+        self.target_handler.unblocked.set()
+        self.handler.flush()
+        self.assertEqual(self.target_handler.messages, ['Info', 'Error'])
+
+    def test_start_once(self):
+        # Threads logging at the same time after a fork start only one listener
+        queue_listener = log.QueueListener
+
+        def create_listener(*args, **kwargs):
+            time.sleep(0.05)
+            return queue_listener(*args, **kwargs)
+
+        with mock.patch.object(log, 'QueueListener', side_effect=create_listener) as listener_class:
+            threads = [threading.Thread(target=self.logger.info, args=('Thread %d' % i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.handler.flush()
+        self.assertEqual(listener_class.call_count, 1)
+        self.assertEqual(len(self.target_handler.messages), 4)
+
+
+@override_settings(ACCESS_LOG_SAMPLE_RATE=1.,
+                   ACCESS_LOG_SAMPLE_RATES={'check': 0., 'ready': 0., 'metrics': 0., 'v1:about': 0.5})
+class TestAccessLogSampler(SimpleTestCase):
+    def setUp(self):
+        self.sampler = AccessLogSampler()
+
+    @staticmethod
+    def gunicorn_record(route: str, status: int = 200) -> logging.LogRecord:
+        return logging.LogRecord('gunicorn.access', logging.INFO, __file__, 0, '%(r)s',
+                                 ({'s': status, ROUTE_ATOM: route},), None)
+
+    def test_gunicorn(self):
+        # Rate 0 drops the records, rate 1 (default) keeps them
+        for route in ('check', 'ready', 'metrics'):
+            self.assertFalse(self.sampler.filter(self.gunicorn_record(route)))
+        self.assertTrue(self.sampler.filter(self.gunicorn_record('v1:addresses-check')))
+        # Only successful requests are sampled
+        self.assertTrue(self.sampler.filter(self.gunicorn_record('ready', status=503)))
+
+        with mock.patch.object(log.random, 'random', return_value=0.4):
+            self.assertTrue(self.sampler.filter(self.gunicorn_record('v1:about')))
+        with mock.patch.object(log.random, 'random', return_value=0.6):
+            self.assertFalse(self.sampler.filter(self.gunicorn_record('v1:about')))
+
+        with override_settings(ACCESS_LOG_SAMPLE_RATE=0.):
+            self.assertFalse(self.sampler.filter(self.gunicorn_record('v1:addresses-check')))
+
+    def test_uvicorn(self):
+        def record(path: str, status: int = 200):
+            return logging.LogRecord('uvicorn.access', logging.INFO, __file__, 0, '%s - "%s %s HTTP/%s" %d',
+                                     ('127.0.0.1:1234', 'GET', path, '1.1', status), None)
+
+        self.assertFalse(self.sampler.filter(record('/check/')))
+        self.assertFalse(self.sampler.filter(record('/metrics?debug=1')))
+        self.assertTrue(self.sampler.filter(record('/check/', status=500)))
+        self.assertTrue(self.sampler.filter(record('/not-found/')))
+
+    def test_development_server(self):
+        def record(request_line: str, status: int = 200, level: int = logging.INFO):
+            log_record = logging.LogRecord('django.server', level, __file__, 0, '"%s" %s %s',
+                                           (request_line, str(status), '2'), None)
+            log_record.status_code = status
+            return log_record
+
+        self.assertFalse(self.sampler.filter(record('GET /ready/ HTTP/1.1')))
+        self.assertTrue(self.sampler.filter(record('GET /ready/ HTTP/1.1', status=404, level=logging.WARNING)))
+        self.assertTrue(self.sampler.filter(record('invalid')))
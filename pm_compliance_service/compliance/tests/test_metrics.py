@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from redis.exceptions import ConnectionError
+
+from .. import metrics
+from ..log import ROUTE_ENVIRON_KEY
+from ..metrics import METRICS_KEY, Metrics, MetricsProvider
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.metrics = Metrics(flush_interval=10)
+        self.redis = self.metrics.redis
+        self.redis.delete(METRICS_KEY)
+
+    def tearDown(self):
+        self.redis.delete(METRICS_KEY)
+
+    def record_request(self, view: str = 'v1:about', status_code: int = 200, seconds: float = 0.02):
+        self.metrics.record_request(view, 'GET', status_code, seconds, 100, 2, 0.001, 1, 0.0005)
+
+    def test_flush_interval(self):
+        with mock.patch.object(metrics.time, 'monotonic', return_value=self.metrics._last_flush + 5):
+            self.record_request()
+        self.assertFalse(self.redis.exists(METRICS_KEY))
+
+        with mock.patch.object(metrics.time, 'monotonic', return_value=self.metrics._last_flush + 10):
+            self.record_request()
+        values = {field.decode(): value.decode() for field, value in self.redis.hgetall(METRICS_KEY).items()}
+        self.assertEqual(values['http_requests_total|view="v1:about",method="GET",status="200"'], '2')
+        self.assertEqual(values['http_request_duration_seconds_bucket|view="v1:about",le="0.025"'], '2')
+        self.assertEqual(values['db_queries_total|view="v1:about"'], '4')
+        self.assertAlmostEqual(float(values['http_request_duration_seconds_sum|view="v1:about"']), 0.04)
+        self.assertFalse(self.metrics.pending)
+
+    def test_flush_redis_error(self):
+        self.record_request()
+        with mock.patch.object(self.redis, 'pipeline', side_effect=ConnectionError):
+            self.metrics.flush()
+        self.assertEqual(self.metrics.pending['redis_calls_total|view="v1:about"'], 1)  # Kept for next flush
+        self.metrics.flush()
+        self.assertEqual(self.redis.hget(METRICS_KEY, 'redis_calls_total|view="v1:about"'), b'1')
+
+    def test_export(self):
+        self.record_request(seconds=0.003)
+        self.record_request(seconds=0.3)
+        self.record_request(status_code=404, seconds=20)
+        self.record_request(view='v1:addresses-check', seconds=0.01)
+        lines = self.metrics.export().splitlines()
+
+        self.assertEqual(lines[:2], ['# HELP http_requests_total Requests by view, method and status code',
+                                     '# TYPE http_requests_total counter'])
+        self.assertIn('http_requests_total{view="v1:about",method="GET",status="200"} 2.0', lines)
+        self.assertIn('http_requests_total{view="v1:about",method="GET",status="404"} 1.0', lines)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', lines)
+        # Buckets are cumulative
+        histogram = [line for line in lines if line.startswith('http_request_duration_seconds')
+                     and 'view="v1:about"' in line]
+        self.assertEqual(histogram[:2], ['http_request_duration_seconds_bucket{view="v1:about",le="0.005"} 1.0',
+                                         'http_request_duration_seconds_bucket{view="v1:about",le="0.01"} 1.0'])
+        self.assertIn('http_request_duration_seconds_bucket{view="v1:about",le="0.5"} 2.0', histogram)
+        self.assertIn('http_request_duration_seconds_bucket{view="v1:about",le="10.0"} 2.0', histogram)
+        self.assertEqual(histogram[-3:], ['http_request_duration_seconds_bucket{view="v1:about",le="+Inf"} 3.0',
+                                          'http_request_duration_seconds_sum{view="v1:about"} 20.303',
+                                          'http_request_duration_seconds_count{view="v1:about"} 3.0'])
+        self.assertIn('http_response_size_bytes_total{view="v1:addresses-check"} 100.0', lines)
+        self.assertEqual(len([line for line in lines if line.startswith('# TYPE')]), len(metrics.METRICS))
+
+
+class TestMetricsMiddleware(TestCase):
+    def setUp(self):
+        MetricsProvider.del_singleton()
+        self.metrics = MetricsProvider()
+        self.metrics.redis.delete(METRICS_KEY)
+
+    def tearDown(self):
+        self.metrics.redis.delete(METRICS_KEY)
+        MetricsProvider.del_singleton()
+
+    def test_metrics(self):
+        response = self.client.get(reverse('v1:about'))
+        self.assertEqual(response.wsgi_request.META[ROUTE_ENVIRON_KEY], 'v1:about')
+        response = self.client.get('/not-found/')
+        self.assertEqual(response.wsgi_request.META[ROUTE_ENVIRON_KEY], 'unresolved')
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertEqual(response.wsgi_request.META[ROUTE_ENVIRON_KEY], 'metrics')
+        content = response.content.decode()
+        self.assertIn('http_requests_total{view="v1:about",method="GET",status="200"} 1.0', content)
+        self.assertIn('http_requests_total{view="unresolved",method="GET",status="404"} 1.0', content)
+        self.assertNotIn('view="metrics"', content)  # Scrapes are not recorded
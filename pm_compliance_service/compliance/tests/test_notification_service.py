@@ -0,0 +1,140 @@
+import json
+from contextlib import contextmanager
+from typing import Callable
+from unittest import mock
+
+from django.test import TestCase
+
+from eth_account import Account
+from redis.connection import Connection
+from requests.exceptions import ConnectionError
+
+from ..models import ComplianceStatusType
+from ..services.notification_service import NotificationService
+
+
+class PackedCommands(list):
+    """
+    Commands of a pipeline packed one by one
+    """
+
+
+@contextmanager
+def run_between_commands(callback: Callable[[], None]):
+    """
+    Send the commands of pipelines one by one, calling `callback` after every command is sent, as if other clients
+    sent commands meanwhile
+    """
+    send_packed_command = Connection.send_packed_command
+
+    def pack_commands(connection, commands):
+        return PackedCommands(b''.join(connection.pack_command(*args)) for args in commands)
+
+    def send_commands_one_by_one(connection, command):
+        if not isinstance(command, PackedCommands):
+            return send_packed_command(connection, command)
+        for packed_command in command:
+            send_packed_command(connection, [packed_command])
+            callback()
+
+    with mock.patch.object(Connection, 'pack_commands', pack_commands), \
+            mock.patch.object(Connection, 'send_packed_command', send_commands_one_by_one):
+        yield
+
+
+class TestNotificationService(TestCase):
+    def setUp(self):
+        self.notification_service = NotificationService(['http://localhost/webhook'], 0, 2, 2, 0)
+        self.redis = self.notification_service.redis
+        self.redis.delete(NotificationService.PENDING_KEY, NotificationService.CHANGES_KEY,
+                          NotificationService.DEAD_LETTER_KEY)
+        self.posted = []
+        self.post_patcher = mock.patch.object(self.notification_service.session, 'post',
+                                              side_effect=self.post)
+        self.post_patcher.start()
+        self.post_error = None
+
+    def tearDown(self):
+        self.post_patcher.stop()
+        self.redis.delete(NotificationService.PENDING_KEY, NotificationService.CHANGES_KEY,
+                          NotificationService.DEAD_LETTER_KEY)
+
+    def post(self, url: str, timeout: int, json: list):
+        if self.post_error:
+            raise self.post_error
+        self.posted.append(json)
+        return mock.MagicMock()
+
+    def get_notified(self):
+        return [(notification['address'], notification['status']) for notifications in self.posted
+                for notification in notifications]
+
+    def test_coalesce_changes(self):
+        address = Account.create().address
+        other_address = Account.create().address
+        self.notification_service.notify_status_change(address, ComplianceStatusType.VERIFIED)
+        self.notification_service.notify_status_change(other_address, ComplianceStatusType.VERIFIED)
+        self.notification_service.notify_status_change(address, ComplianceStatusType.REJECTED)
+        self.assertEqual(self.notification_service.send_pending(), 2)
+        self.assertCountEqual(self.get_notified(), [(address, 'REJECTED'), (other_address, 'VERIFIED')])
+        self.assertEqual(self.notification_service.send_pending(), 0)
+
+    def test_coalesce_window(self):
+        self.notification_service.coalesce_seconds = 60
+        self.notification_service.notify_status_change(Account.create().address, ComplianceStatusType.REJECTED)
+        self.assertEqual(self.notification_service.send_pending(), 0)
+        self.assertEqual(self.redis.zcard(NotificationService.PENDING_KEY), 1)
+
+    def test_batches(self):
+        addresses = [Account.create().address for _ in range(5)]
+        for address in addresses:
+            self.notification_service.notify_status_change(address, ComplianceStatusType.VERIFIED)
+        self.assertEqual(self.notification_service.send_pending(), 5)
+        self.assertEqual([len(notifications) for notifications in self.posted], [2, 2, 1])
+
+    def test_retry_failed(self):
+        address = Account.create().address
+        self.notification_service.notify_status_change(address, ComplianceStatusType.REJECTED)
+        self.post_error = ConnectionError()
+        self.assertEqual(self.notification_service.send_pending(), 0)
+        self.assertEqual(self.redis.zcard(NotificationService.DEAD_LETTER_KEY), 1)
+        delivery = json.loads(self.redis.zrange(NotificationService.DEAD_LETTER_KEY, 0, 0)[0])
+        self.assertEqual(delivery['attempts'], 1)
+
+        self.post_error = None
+        self.assertEqual(self.notification_service.retry_failed(), 1)
+        self.assertEqual(self.get_notified(), [(address, 'REJECTED')])
+        self.assertEqual(self.redis.zcard(NotificationService.DEAD_LETTER_KEY), 0)
+
+    def test_drop_after_max_attempts(self):
+        self.notification_service.notify_status_change(Account.create().address, ComplianceStatusType.REJECTED)
+        self.post_error = ConnectionError()
+        self.notification_service.send_pending()
+        self.notification_service.retry_failed()
+        self.assertEqual(self.redis.zcard(NotificationService.DEAD_LETTER_KEY), 0)
+        self.assertEqual(self.posted, [])
+
+    def test_email(self):
+        address = Account.create().address
+        self.notification_service.webhook_urls = []
+        self.notification_service.notify_status_change(address, ComplianceStatusType.REJECTED, 'user@gnosis.pm')
+        with mock.patch('pm_compliance_service.compliance.services.notification_service.EmailMessage') as message:
+            self.assertEqual(self.notification_service.send_pending(), 1)
+        self.assertEqual(message.call_args[1]['to'], ['user@gnosis.pm'])
+
+    def test_pop_between_commands(self):
+        # Pending changes are sent while a new change of the same address is queued
+        address = Account.create().address
+        self.notification_service.notify_status_change(address, ComplianceStatusType.VERIFIED)
+        with run_between_commands(self.notification_service.send_pending):
+            self.notification_service.notify_status_change(address, ComplianceStatusType.REJECTED)
+        self.notification_service.send_pending()
+        self.assertEqual(self.get_notified()[-1], (address, 'REJECTED'))
+        self.assertEqual(self.redis.hlen(NotificationService.CHANGES_KEY), 0)
+
+    def test_notify_status_changes(self):
+        addresses = [Account.create().address for _ in range(3)]
+        self.notification_service.notify_status_changes([(address, ComplianceStatusType.REJECTED, None)
+                                                         for address in addresses], batch_size=2)
+        self.assertEqual(self.notification_service.send_pending(), 3)
+        self.assertCountEqual(self.get_notified(), [(address, 'REJECTED') for address in addresses])
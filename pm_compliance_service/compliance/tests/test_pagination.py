@@ -0,0 +1,77 @@
+import datetime
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from ..models import ComplianceStatus
+from ..pagination import KeysetPagination
+
+
+class TestKeysetPagination(TestCase):
+    def create_statuses(self, created: List[datetime.datetime]) -> List[int]:
+        """
+        :return: Ids of the statuses, newest first
+        """
+        ComplianceStatus.objects.bulk_create([ComplianceStatus(address='0x%040x' % i, created=value)
+                                              for i, value in enumerate(created)])
+        return list(ComplianceStatus.objects.order_by('-created', '-id').values_list('id', flat=True))
+
+    def get_page(self, limit: int, cursor: Optional[str] = None):
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        paginator = KeysetPagination()
+        results = paginator.paginate_queryset(ComplianceStatus.objects.all(),
+                                              Request(RequestFactory().get('/api/v1/statuses/', params)))
+        return [result.id for result in results], paginator
+
+    def get_all_pages(self, limit: int) -> List[int]:
+        ids, paginator = self.get_page(limit)
+        while paginator.next_cursor:
+            page_ids, paginator = self.get_page(limit, paginator.next_cursor)
+            self.assertTrue(page_ids)
+            ids.extend(page_ids)
+        return ids
+
+    def test_equal_timestamps(self):
+        # Statuses imported on the same transaction share `created`
+        now = timezone.now().replace(microsecond=123456)
+        expected_ids = self.create_statuses([now] * 7)
+        self.assertEqual(self.get_all_pages(2), expected_ids)
+
+    def test_sub_millisecond_timestamps(self):
+        now = timezone.now().replace(microsecond=100000)
+        expected_ids = self.create_statuses([now + datetime.timedelta(microseconds=i * 7) for i in range(10)])
+        self.assertEqual(self.get_all_pages(3), expected_ids)
+
+    def test_previous_page(self):
+        now = timezone.now().replace(microsecond=500500)
+        expected_ids = self.create_statuses([now - datetime.timedelta(microseconds=i % 3) for i in range(9)])
+        first_page, paginator = self.get_page(3)
+        second_page, paginator = self.get_page(3, paginator.next_cursor)
+        self.assertEqual(second_page, expected_ids[3:6])
+        previous_page, paginator = self.get_page(3, paginator.previous_cursor)
+        self.assertEqual(previous_page, first_page)
+        self.assertIsNone(paginator.previous_cursor)
+
+    def test_cursor_keeps_microseconds(self):
+        created = timezone.now().replace(microsecond=123456)
+        cursor = KeysetPagination().encode_cursor([created, 1], False)
+        values, reverse = KeysetPagination().decode_cursor(cursor, ComplianceStatus.objects.all(), ['created', 'id'])
+        self.assertEqual(values, [created, 1])
+        self.assertFalse(reverse)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(NotFound):
+            self.get_page(2, 'invalid')
+
+    def test_link(self):
+        self.create_statuses([timezone.now()] * 3)
+        _, paginator = self.get_page(2)
+        link = paginator.get_link(paginator.next_cursor)
+        self.assertEqual(parse_qs(urlparse(link).query)['cursor'], [paginator.next_cursor])
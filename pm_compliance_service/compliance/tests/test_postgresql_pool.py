@@ -0,0 +1,112 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import psycopg2
+from psycopg2 import extensions
+
+from ..postgresql_pool import base
+from ..postgresql_pool.base import ConnectionPool, get_pool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollback_error = False
+
+    def close(self):
+        self.closed = True
+
+    def get_transaction_status(self) -> int:
+        return self.transaction_status
+
+    def rollback(self):
+        if self.rollback_error:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class TestConnectionPool(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(2, 0.1, None)
+
+    def test_reuse(self):
+        first, second = self.pool.acquire(FakeConnection), self.pool.acquire(FakeConnection)
+        self.pool.release(first)
+        self.pool.release(second)
+        # Last released is reused first
+        self.assertIs(self.pool.acquire(FakeConnection), second)
+        self.assertIs(self.pool.acquire(FakeConnection), first)
+
+    def test_timeout(self):
+        connections = [self.pool.acquire(FakeConnection) for _ in range(2)]
+        with self.assertRaises(psycopg2.OperationalError):
+            self.pool.acquire(FakeConnection)
+
+        # Waiting greenlets or threads get the connection released
+        threading.Timer(0.02, self.pool.release, args=(connections[0],)).start()
+        self.assertIs(self.pool.acquire(FakeConnection), connections[0])
+
+    def test_connect_error(self):
+        def connect():
+            raise psycopg2.OperationalError('could not connect to server')
+
+        for _ in range(3):
+            with self.assertRaises(psycopg2.OperationalError):
+                self.pool.acquire(connect)
+        self.assertIsInstance(self.pool.acquire(FakeConnection), FakeConnection)
+
+    def test_not_reusable(self):
+        connection = self.pool.acquire(FakeConnection)
+        self.pool.release(connection, reuse=False)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(self.pool.acquire(FakeConnection), connection)
+
+        connection = self.pool.acquire(FakeConnection)
+        connection.close()
+        self.pool.release(connection)
+        self.assertIsNot(self.pool.acquire(FakeConnection), connection)
+
+    def test_transaction_rolled_back(self):
+        in_transaction, in_error = self.pool.acquire(FakeConnection), self.pool.acquire(FakeConnection)
+        in_transaction.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        in_error.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+        in_error.rollback_error = True
+        self.pool.release(in_transaction)
+        self.pool.release(in_error)
+        self.assertTrue(in_error.closed)
+        self.assertFalse(in_transaction.closed)
+        self.assertEqual(in_transaction.transaction_status, extensions.TRANSACTION_STATUS_IDLE)
+        self.assertIs(self.pool.acquire(FakeConnection), in_transaction)
+
+    def test_max_age(self):
+        pool = ConnectionPool(2, 0.1, 60)
+        with mock.patch.object(base.time, 'monotonic', return_value=1000.):
+            connection = pool.acquire(FakeConnection)
+            pool.release(connection)
+            self.assertIs(pool.acquire(FakeConnection), connection)
+            pool.release(connection)
+        with mock.patch.object(base.time, 'monotonic', return_value=1060.):
+            self.assertIsNot(pool.acquire(FakeConnection), connection)
+        self.assertTrue(connection.closed)
+
+    def test_release_after_fork(self):
+        connection = self.pool.acquire(FakeConnection)
+        self.pool.pid -= 1  # Pool of the parent process
+        self.pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertFalse(self.pool._idle)
+
+    def test_get_pool(self):
+        settings_dict = {'POOL_SIZE': 3, 'POOL_TIMEOUT': 5, 'CONN_MAX_AGE': 60}
+        with mock.patch.object(base, '_pools', {}):
+            pool = get_pool('default', settings_dict)
+            self.assertEqual((pool.size, pool.timeout, pool.max_age), (3, 5, 60))
+            self.assertIs(get_pool('default', settings_dict), pool)
+            self.assertIsNot(get_pool('replica', settings_dict), pool)
+            with mock.patch.object(base.os, 'getpid', return_value=pool.pid + 1):
+                forked_pool = get_pool('default', settings_dict)
+            self.assertIsNot(forked_pool, pool)
+            self.assertEqual(forked_pool.pid, pool.pid + 1)
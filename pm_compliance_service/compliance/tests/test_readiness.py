@@ -0,0 +1,105 @@
+import threading
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from redis.exceptions import ConnectionError
+
+from ..readiness import ReadinessChecker, ReadinessCheckerProvider
+
+
+class TestReadinessChecker(TestCase):
+    def setUp(self):
+        self.readiness_checker = ReadinessChecker(timeout=0.2, cache_ttl=60)
+        self.probes = {name: mock.MagicMock(return_value=None) for name in ('database', 'redis', 'celery_broker')}
+        self.readiness_checker.probes = self.probes
+
+    def tearDown(self):
+        self.readiness_checker.executor.shutdown(wait=True)
+
+    def test_ready(self):
+        result = self.readiness_checker.check()
+        self.assertTrue(result['ready'])
+        self.assertEqual(set(result['dependencies']), {'database', 'redis', 'celery_broker'})
+        for dependency in result['dependencies'].values():
+            self.assertTrue(dependency['ready'])
+            self.assertIsNone(dependency['error'])
+            self.assertGreaterEqual(dependency['latency_ms'], 0)
+
+    def test_probe_failing(self):
+        self.probes['redis'].side_effect = ConnectionError('Connection refused')
+        result = self.readiness_checker.check()
+        self.assertFalse(result['ready'])
+        self.assertEqual(result['dependencies']['redis']['error'], 'ConnectionError: Connection refused')
+        self.assertTrue(result['dependencies']['database']['ready'])
+
+    def test_probe_timeout(self):
+        release = threading.Event()
+        self.probes['database'].side_effect = lambda: release.wait(5)
+        try:
+            result = self.readiness_checker.check()
+            self.assertFalse(result['ready'])
+            self.assertEqual(result['dependencies']['database'],
+                             {'ready': False, 'latency_ms': None, 'error': 'No response after 0.20 seconds'})
+            self.assertTrue(result['dependencies']['redis']['ready'])
+
+            # Probe still running is not started again
+            self.readiness_checker.checked = 0.
+            self.readiness_checker.check()
+            self.assertEqual(self.probes['database'].call_count, 1)
+            self.assertEqual(self.probes['redis'].call_count, 2)
+        finally:
+            release.set()
+
+    def test_cache_ttl(self):
+        result = self.readiness_checker.check()
+        self.assertIs(self.readiness_checker.check(), result)
+        for probe in self.probes.values():
+            self.assertEqual(probe.call_count, 1)
+
+        # Probes are run again when result expires
+        self.readiness_checker.checked -= 60
+        self.assertIsNot(self.readiness_checker.check(), result)
+        for probe in self.probes.values():
+            self.assertEqual(probe.call_count, 2)
+
+    def test_probes(self):
+        readiness_checker = ReadinessChecker(timeout=1, cache_ttl=0)
+        try:
+            readiness_checker.probe_database()
+            readiness_checker.probe_redis()
+        finally:
+            readiness_checker.executor.shutdown(wait=True)
+
+
+class TestReadinessView(TestCase):
+    def setUp(self):
+        ReadinessCheckerProvider.del_singleton()
+        self.readiness_checker = ReadinessCheckerProvider()
+        self.probes = {name: mock.MagicMock(return_value=None) for name in ('database', 'redis')}
+        self.readiness_checker.probes = self.probes
+
+    def tearDown(self):
+        ReadinessCheckerProvider.del_singleton()
+
+    def test_ready(self):
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertTrue(response.json()['ready'])
+
+    def test_not_ready(self):
+        self.probes['database'].side_effect = ValueError('Database not available')
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 503)
+        result = response.json()
+        self.assertFalse(result['ready'])
+        self.assertEqual([name for name, dependency in result['dependencies'].items() if not dependency['ready']],
+                         ['database'])
+        self.assertEqual(result['dependencies']['database']['error'], 'ValueError: Database not available')
+
+        # Cached result is returned without probing again
+        self.probes['database'].side_effect = None
+        self.assertEqual(self.client.get(reverse('ready')).status_code, 503)
+        self.assertEqual(self.probes['database'].call_count, 1)
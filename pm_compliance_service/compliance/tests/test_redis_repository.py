@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+from django.test import TestCase
+
+import gevent
+
+from ..repositories.redis_repository import redis_stats
+
+
+class TestRedisStats(TestCase):
+    def test_reset(self):
+        redis_stats.reset()
+        with redis_stats.measure(calls=3):
+            pass
+        redis_stats.add(0.5)
+        self.assertEqual(redis_stats.calls, 4)
+        self.assertGreaterEqual(redis_stats.time, 0.5)
+        redis_stats.reset()
+        self.assertEqual((redis_stats.calls, redis_stats.time), (0, 0.))
+
+    def test_threads(self):
+        redis_stats.reset()
+        results = []
+
+        def request():
+            with redis_stats.measure(calls=2):
+                pass
+            results.append(redis_stats.calls)
+
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [2, 2, 2])
+        self.assertEqual(redis_stats.calls, 0)
+
+    def test_asyncio_tasks(self):
+        async def request(calls: int) -> int:
+            redis_stats.reset()
+            for _ in range(calls):
+                with redis_stats.measure():
+                    await asyncio.sleep(0)  # Other requests run meanwhile
+            return redis_stats.calls
+
+        async def serve():
+            return await asyncio.gather(request(1), request(2), request(3))
+
+        self.assertEqual(asyncio.run(serve()), [1, 2, 3])
+
+    def test_greenlets(self):
+        def request(calls: int) -> int:
+            redis_stats.reset()
+            for _ in range(calls):
+                with redis_stats.measure():
+                    gevent.sleep(0)
+            return redis_stats.calls
+
+        greenlets = [gevent.spawn(request, calls) for calls in (1, 2, 3)]
+        gevent.joinall(greenlets)
+        self.assertEqual([greenlet.value for greenlet in greenlets], [1, 2, 3])
@@ -0,0 +1,127 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from django.test import SimpleTestCase
+
+import requests
+
+from ..rpc import JsonRpcBatchError, JsonRpcBatchTransport, JsonRpcError
+
+
+class StubResponse:
+    def __init__(self, content: Any, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError('%d error' % self.status_code, response=self)
+
+    def json(self):
+        return json.loads(json.dumps(self.content))  # Make sure content is JSON serializable
+
+
+class StubNode:
+    """
+    Local JSON-RPC node to plug into `JsonRpcBatchTransport(session=StubNode(...))`. Handlers receive the params
+    of the call and return the result or raise `JsonRpcError`
+    """
+    def __init__(self, handlers: Optional[Dict[str, Callable[..., Any]]] = None):
+        self.handlers = dict(handlers or {})
+        self.payloads = []  # Every batch received
+        self.status_codes = []  # Returned for the next batches instead of handling them
+        self.dropped_ids = set()  # Calls not answered
+
+    def _handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        handler = self.handlers.get(request.get('method'))
+        try:
+            if not handler:
+                raise JsonRpcError(-32601, 'Method not found')
+            response['result'] = handler(*request.get('params', []))
+        except JsonRpcError as e:
+            response['error'] = {'code': e.code, 'message': e.message}
+        return response
+
+    def post(self, url: str, json: Any = None, timeout: Optional[int] = None) -> StubResponse:
+        self.payloads.append(json)
+        if self.status_codes:
+            return StubResponse({}, self.status_codes.pop(0))
+        if isinstance(json, list):
+            return StubResponse([self._handle(request) for request in json
+                                 if request['id'] not in self.dropped_ids])
+        return StubResponse(self._handle(json))
+
+
+class TestJsonRpcBatchTransport(SimpleTestCase):
+    def setUp(self):
+        self.failures = {}  # Times every param fails
+        self.stub_node = StubNode({'eth_getBalance': self.get_balance})
+        self.transport = JsonRpcBatchTransport('http://localhost:8545', 3, max_retries=2, retry_backoff=0,
+                                               session=self.stub_node)
+
+    def get_balance(self, value: int) -> str:
+        if self.failures.get(value):
+            self.failures[value] -= 1
+            raise JsonRpcError(-32000, 'Header not found')
+        return hex(value)
+
+    def get_payload_params(self) -> List[List[int]]:
+        return [[request['params'][0] for request in payload] for payload in self.stub_node.payloads]
+
+    def test_batch(self):
+        calls = [('eth_getBalance', [i]) for i in range(7)]
+        self.assertEqual(self.transport.batch(calls), [hex(i) for i in range(7)])
+        self.assertEqual(self.get_payload_params(), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(self.transport.call('eth_getBalance', [8]), hex(8))
+
+    def test_retry_failed_calls(self):
+        # Only the calls that failed are retried, batched again
+        self.failures = {1: 1, 4: 2, 5: 1}
+        calls = [('eth_getBalance', [i]) for i in range(6)]
+        self.assertEqual(self.transport.batch(calls), [hex(i) for i in range(6)])
+        self.assertEqual(self.get_payload_params(), [[0, 1, 2], [3, 4, 5], [1, 4, 5], [4]])
+
+    def test_retries_exhausted(self):
+        self.failures = {1: 3}
+        calls = [('eth_getBalance', [i]) for i in range(3)]
+        with self.assertRaises(JsonRpcBatchError) as context:
+            self.transport.batch(calls)
+        self.assertEqual(list(context.exception.errors), [1])
+        self.assertEqual(context.exception.results, ['0x0', None, '0x2'])
+        self.assertEqual(len(self.stub_node.payloads), 3)
+
+        self.failures = {1: 3}
+        results = self.transport.batch(calls, raise_on_error=False)
+        self.assertIsInstance(results[1], JsonRpcError)
+        self.assertEqual(results[1].code, -32000)
+
+    def test_not_retryable(self):
+        calls = [('eth_getBalance', [0]), ('eth_unknown', [])]
+        with self.assertRaises(JsonRpcBatchError) as context:
+            self.transport.batch(calls)
+        self.assertEqual(context.exception.errors[1].code, -32601)
+        self.assertEqual(len(self.stub_node.payloads), 1)
+        with self.assertRaises(JsonRpcError):
+            self.transport.call('eth_unknown', [])
+
+    def test_http_error(self):
+        self.stub_node.status_codes = [502]
+        calls = [('eth_getBalance', [i]) for i in range(2)]
+        self.assertEqual(self.transport.batch(calls), ['0x0', '0x1'])
+        self.assertEqual(self.get_payload_params(), [[0, 1], [0, 1]])
+
+    def test_invalid_batch(self):
+        # Node answers the whole batch with one error
+        self.stub_node.post = lambda url, json=None, timeout=None: StubResponse(
+            {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'Invalid request'}}
+        )
+        with self.assertRaises(JsonRpcBatchError) as context:
+            self.transport.batch([('eth_getBalance', [0])])
+        self.assertEqual(context.exception.errors[0].code, -32600)
+
+    def test_call_not_answered(self):
+        self.stub_node.dropped_ids = {2}
+        calls = [('eth_getBalance', [i]) for i in range(3)]
+        self.assertEqual(self.transport.batch(calls), ['0x0', '0x1', '0x2'])
+        self.assertEqual(self.get_payload_params(), [[0, 1, 2], [1]])
@@ -0,0 +1,111 @@
+import os
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+import numpy as np
+from eth_abi import encode_abi, encode_single
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+from rest_framework.test import APIClient
+
+from ..models import ComplianceStatus, ComplianceStatusType
+from ..services import SafeCreationServiceProvider
+from ..services.safe_creation_service import NULL_ADDRESS, SafeCreationService
+from ..status_cache import ComplianceStatusCacheProvider
+
+
+def calculate_create2_address(deployer: str, salt: bytes, init_code: bytes) -> str:
+    return to_checksum_address(keccak(b'\xff' + HexBytes(deployer) + salt + keccak(init_code))[12:])
+
+
+class TestSafeCreationService(TestCase):
+    def setUp(self):
+        self.proxy_creation_code = os.urandom(100)
+        self.safe_creation_service = SafeCreationService(mock.MagicMock(), Account.create().address,
+                                                         Account.create().address, Account.create().address,
+                                                         batch_size=3, proxy_creation_code=self.proxy_creation_code)
+
+    def derive_address(self, owner: str, salt_nonce: int) -> str:
+        """
+        Address of the Safe calculated for every step of `ProxyFactory.createProxyWithNonce`
+        """
+        service = self.safe_creation_service
+        initializer = service.SETUP_SELECTOR + encode_abi(service.SETUP_TYPES, [
+            [owner], 1, NULL_ADDRESS, b'', service.fallback_handler_address, NULL_ADDRESS, 0, NULL_ADDRESS
+        ])
+        salt = keccak(keccak(initializer) + encode_single('uint256', salt_nonce))
+        init_code = self.proxy_creation_code + encode_single('address', service.master_copy_address)
+        return calculate_create2_address(service.proxy_factory_address, salt, init_code)
+
+    def test_calculate_create2_addresses(self):
+        # Examples of EIP1014
+        salts = np.zeros((2, 32), dtype=np.uint8)
+        salts[1, 12:14] = [0xfe, 0xed]
+        addresses = SafeCreationService.calculate_create2_addresses('0xdeadbeef00000000000000000000000000000000',
+                                                                    salts, keccak(b'\0'))
+        self.assertEqual([to_checksum_address(address.tobytes()) for address in addresses],
+                         ['0xB928f69Bb1D91Cd65274e3c79d8986362984fDA3', '0xD04116cDd17beBE565EB2422F2497E06cC1C9833'])
+
+    def test_derive_addresses(self):
+        owners = [Account.create().address for _ in range(5)] + ['0x' + 'f' * 40]
+        salt_nonces = [0, 1, 2 ** 256 - 1, 7, 0, 123456789]
+        self.assertEqual(self.safe_creation_service.derive_addresses(owners, salt_nonces),
+                         [self.derive_address(owner, salt_nonce) for owner, salt_nonce in zip(owners, salt_nonces)])
+        # Owners can be not checksummed
+        self.assertEqual(self.safe_creation_service.derive_addresses([owners[0].lower()], [0]),
+                         [self.derive_address(owners[0], 0)])
+        self.assertEqual(self.safe_creation_service.derive_addresses([], []), [])
+        with self.assertRaises(ValueError):
+            self.safe_creation_service.derive_addresses(owners, salt_nonces[:1])
+
+    def test_proxy_creation_code_from_factory(self):
+        ethereum_client = mock.MagicMock()
+        ethereum_client.w3.eth.call.return_value = encode_single('bytes', self.proxy_creation_code)
+        service = SafeCreationService(ethereum_client, self.safe_creation_service.proxy_factory_address,
+                                      self.safe_creation_service.master_copy_address,
+                                      self.safe_creation_service.fallback_handler_address, batch_size=3)
+        owner = Account.create().address
+        self.assertEqual(service.derive_addresses([owner], [1]), [self.derive_address(owner, 1)])
+
+    def test_get_owners(self):
+        owners = [Account.create().address for _ in range(4)]
+        self.assertEqual(self.safe_creation_service.store_addresses(owners, list(range(4))), 4)
+        self.assertEqual(self.safe_creation_service.store_addresses(owners[:1], [0]), 1)  # Already stored
+        safes = [self.derive_address(owner, salt_nonce) for salt_nonce, owner in enumerate(owners)]
+        unknown_safe = Account.create().address
+        self.assertEqual(self.safe_creation_service.get_owners([safes[3].lower(), unknown_safe] + safes[:3]),
+                         [owners[3], None] + owners[:3])
+
+
+class TestSafesOwnersView(TestCase):
+    def setUp(self):
+        SafeCreationServiceProvider.del_singleton()
+        ComplianceStatusCacheProvider.del_singleton()
+
+    def tearDown(self):
+        SafeCreationServiceProvider.del_singleton()
+        ComplianceStatusCacheProvider.del_singleton()
+
+    def test_safes_owners(self):
+        safe_creation_service = SafeCreationService(mock.MagicMock(), Account.create().address,
+                                                    Account.create().address, Account.create().address,
+                                                    batch_size=10, proxy_creation_code=os.urandom(100))
+        SafeCreationServiceProvider.instance = safe_creation_service
+        verified_owner, owner = Account.create().address, Account.create().address
+        ComplianceStatus.objects.create(address=verified_owner, status=ComplianceStatusType.VERIFIED.value)
+        safe_creation_service.store_addresses([verified_owner, owner], [0, 0])
+        safes = safe_creation_service.derive_addresses([verified_owner, owner], [0, 0])
+        unknown_safe = Account.create().address
+
+        response = APIClient().post(reverse('v1:safes-owners'), data={'safes': safes + [unknown_safe]},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'safe': safes[0], 'owner': verified_owner, 'status': ComplianceStatusType.VERIFIED.name,
+             'verified': True},
+            {'safe': safes[1], 'owner': owner, 'status': None, 'verified': False},
+            {'safe': unknown_safe, 'owner': None, 'status': None, 'verified': False},
+        ])
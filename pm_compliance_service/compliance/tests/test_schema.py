@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..schema import SchemaFileView, accepts_gzip, build_schema_files
+
+
+class TestSchema(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.schema_dir = tempfile.TemporaryDirectory()
+        cls.paths = build_schema_files(cls.schema_dir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.schema_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        # Schema files are read once per process
+        patcher = mock.patch.dict(SchemaFileView.schema_files, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_build_schema_files(self):
+        self.assertEqual([os.path.basename(path) for path in self.paths],
+                         ['swagger.json', 'swagger.json.gz', 'swagger.yaml', 'swagger.yaml.gz'])
+        with open(self.paths[0], 'rb') as f:
+            content = f.read()
+        with open(self.paths[1], 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), content)
+        schema = json.loads(content.decode())
+        self.assertEqual(schema['info']['title'], 'Gnosis PM Compliance API')
+        self.assertIn('/addresses/check/', schema['paths'])
+        self.assertFalse([name for name in os.listdir(self.schema_dir.name) if name.endswith('.tmp')])
+
+    def test_accepts_gzip(self):
+        for accept_encoding in ('gzip', 'gzip, deflate, br', 'deflate;q=1.0, GZIP;q=0.5', '*', 'br, *;q=0.1',
+                                'x-gzip'):
+            self.assertTrue(accepts_gzip(accept_encoding), accept_encoding)
+        for accept_encoding in ('', 'identity', 'deflate, br', 'gzip;q=0', 'gzip; q=0.0, deflate', '*;q=0',
+                                'gzip;q=0, *', 'gzip;q=invalid', 'gzipped'):
+            self.assertFalse(accepts_gzip(accept_encoding), accept_encoding)
+
+    def test_schema_file_view(self):
+        with open(os.path.join(self.schema_dir.name, 'swagger.json'), 'rb') as f:
+            content = f.read()
+        with override_settings(OPENAPI_SCHEMA_DIR=self.schema_dir.name):
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.json'}))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, content)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertIn('max-age=300', response['Cache-Control'])
+            etag = response['ETag']
+
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.json'}), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], etag)
+
+            # ETag of the gzip variant is different
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.json'}),
+                                       HTTP_ACCEPT_ENCODING='gzip, deflate', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(gzip.decompress(response.content), content)
+            self.assertNotEqual(response['ETag'], etag)
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.json'}),
+                                       HTTP_ACCEPT_ENCODING='gzip, deflate', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+            # Client refusing gzip
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.json'}),
+                                       HTTP_ACCEPT_ENCODING='gzip;q=0, deflate')
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response.content, content)
+            self.assertEqual(response['ETag'], etag)
+
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.yaml'}))
+            self.assertEqual(response['Content-Type'], 'application/yaml')
+            self.assertTrue(response.content.startswith(b'swagger:'))
+
+    def test_schema_not_built(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(OPENAPI_SCHEMA_DIR=directory):
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.json'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(response.json()['info']['title'], 'Gnosis PM Compliance API')
+        self.assertIsNone(SchemaFileView.schema_files['.json'])
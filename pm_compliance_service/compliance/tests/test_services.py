@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Run on a new interpreter, as modules imported by other tests are already on `sys.modules`
+LOADED_MODULES_SCRIPT = """
+import json
+import sys
+
+import django
+
+django.setup()
+
+
+def loaded_modules():
+    return sorted(name for name in sys.modules
+                  if name == 'numpy' or name.startswith('pm_compliance_service.compliance.services.'))
+
+
+from pm_compliance_service.compliance import services
+
+after_import = loaded_modules()
+services.SafeCreationServiceProvider
+print(json.dumps({'after_import': after_import, 'after_access': loaded_modules()}))
+"""
+
+
+class TestServicesImport(SimpleTestCase):
+    def test_lazy_import(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run([sys.executable, '-c', LOADED_MODULES_SCRIPT], env=env, stdout=subprocess.PIPE,
+                                check=True, timeout=60).stdout
+        loaded_modules = json.loads(output.decode().splitlines()[-1])
+        # Chain libraries are not loaded until a service is used
+        self.assertEqual(loaded_modules['after_import'], [])
+        self.assertEqual(loaded_modules['after_access'],
+                         ['numpy', 'pm_compliance_service.compliance.services.safe_creation_service'])
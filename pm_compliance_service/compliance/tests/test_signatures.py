@@ -0,0 +1,141 @@
+from typing import List, Tuple
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+import gevent
+from eth_account import Account
+from rest_framework.test import APIClient
+
+from .. import signatures
+from ..signatures import (RecoveryProcessPool, SignatureVerificationService,
+                          SignatureVerificationServiceProvider)
+
+
+class TestSignatureVerificationService(TestCase):
+    def setUp(self):
+        self.signature_service = SignatureVerificationService(2, 100, 4)
+
+    def tearDown(self):
+        self.signature_service.shutdown()
+
+    def sign_messages(self, number: int) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """
+        :return: Messages with their signatures, and the signers
+        """
+        messages_and_signatures = []
+        addresses = []
+        for i in range(number):
+            account = Account.create()
+            message = 'Message %d' % i
+            signature = account.signHash(SignatureVerificationService.hash_message(message)).signature
+            messages_and_signatures.append((message, signature.hex()))
+            addresses.append(account.address)
+        return messages_and_signatures, addresses
+
+    def test_recover(self):
+        (message_and_signature,), (address,) = self.sign_messages(1)
+        self.assertEqual(self.signature_service.recover(*message_and_signature), address)
+        self.assertIsNone(self.signature_service.recover('Other message', '0x' + '00' * 65))
+        self.assertNotEqual(self.signature_service.recover('Other message', message_and_signature[1]), address)
+
+    def test_recover_many_cached(self):
+        messages_and_signatures, addresses = self.sign_messages(3)
+        with mock.patch.object(signatures, 'recover_addresses', wraps=signatures.recover_addresses) as recover:
+            self.assertEqual(self.signature_service.recover_many(messages_and_signatures[:2] * 2), addresses[:2] * 2)
+            self.assertEqual(len(recover.call_args[0][0]), 2)  # Duplicated signatures are recovered once
+            self.assertEqual(self.signature_service.recover_many(messages_and_signatures), addresses)
+            self.assertEqual(len(recover.call_args[0][0]), 1)
+            self.assertEqual(self.signature_service.recover_many(messages_and_signatures), addresses)
+            self.assertEqual(recover.call_count, 2)
+
+    def test_recover_many_on_pool(self):
+        messages_and_signatures, addresses = self.sign_messages(9)
+        self.assertEqual(self.signature_service.recover_many(messages_and_signatures), addresses)
+        self.assertIsInstance(self.signature_service._pool, RecoveryProcessPool)
+        self.assertEqual(len(self.signature_service._pool), 2)
+
+    def test_recover_many_on_gevent(self):
+        # Only the calling greenlet waits while signatures are recovered
+        messages_and_signatures, addresses = self.sign_messages(9)
+        ticks = []
+
+        def tick():
+            while True:
+                ticks.append(None)
+                gevent.sleep(0)
+
+        ticker = gevent.spawn(tick)
+        try:
+            with mock.patch.object(signatures.monkey, 'is_module_patched', return_value=True):
+                recovered = gevent.spawn(self.signature_service.recover_many, messages_and_signatures).get()
+        finally:
+            ticker.kill()
+        self.assertEqual(recovered, addresses)
+        self.assertTrue(ticks)
+
+    def test_pool_per_process(self):
+        pool = self.signature_service.pool
+        self.assertIs(self.signature_service.pool, pool)
+        with mock.patch.object(signatures.os, 'getpid', return_value=-1):
+            forked_pool = self.signature_service.pool
+            self.signature_service.shutdown()  # Processes can only be joined by the process starting them
+        self.assertIsNot(forked_pool, pool)
+        pool.shutdown()
+
+
+class TestRecoveryProcessPool(TestCase):
+    def setUp(self):
+        self.pool = RecoveryProcessPool(2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def sign_hashes(self, number: int) -> Tuple[List[Tuple[bytes, bytes]], List[str]]:
+        keys, addresses = [], []
+        for i in range(number):
+            account = Account.create()
+            message_hash = SignatureVerificationService.hash_message('Message %d' % i)
+            keys.append((message_hash, bytes(account.signHash(message_hash).signature)))
+            addresses.append(account.address)
+        return keys, addresses
+
+    def test_recover(self):
+        keys, addresses = self.sign_hashes(5)
+        self.assertEqual(self.pool.recover(keys), addresses)
+        self.assertEqual(self.pool.recover(keys[:1] + [(keys[0][0], b'\0' * 65)]), [addresses[0], None])
+        self.assertEqual(self.pool._idle.qsize(), 2)
+
+    def test_interrupted(self):
+        # Processes with results not read are replaced, so next batches don't get them
+        keys, addresses = self.sign_hashes(4)
+        processes = set(self.pool._processes.values())
+        with mock.patch.object(RecoveryProcessPool, '_receive', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.pool.recover(keys)
+        self.assertEqual(len(self.pool), 2)
+        self.assertFalse(processes & set(self.pool._processes.values()))
+        self.assertFalse(any(process.is_alive() for process in processes))
+        self.assertEqual(self.pool.recover(keys[2:]), addresses[2:])
+
+
+class TestSignaturesVerifyView(TestCase):
+    def tearDown(self):
+        SignatureVerificationServiceProvider.del_singleton()
+
+    def test_signatures_verify(self):
+        account = Account.create()
+        signature = account.signHash(SignatureVerificationService.hash_message('Message')).signature.hex()
+        data = {'signatures': [
+            {'message': 'Message', 'signature': signature},
+            {'message': 'Message', 'signature': signature, 'address': account.address},
+            {'message': 'Message', 'signature': signature, 'address': Account.create().address},
+        ]}
+        response = APIClient().post(reverse('v1:signatures-verify'), data=data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['valid'] for result in response.json()['results']], [True, True, False])
+        self.assertEqual(response.json()['results'][0]['recoveredAddress'], account.address)
+
+        response = APIClient().post(reverse('v1:signatures-verify'), data={'signatures': []}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,124 @@
+import asyncio
+import os
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from eth_account import Account
+
+from ..models import ComplianceStatus, ComplianceStatusType
+from ..repositories.async_redis_repository import AsyncRedisRepository
+from ..status_cache import ComplianceStatusCache
+
+REDIS_CACHES = {'default': {
+    'BACKEND': 'django_redis.cache.RedisCache',
+    'LOCATION': settings.REDIS_URL,
+    'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+}}
+
+
+class TestComplianceStatusCache(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get_status_cache(self) -> ComplianceStatusCache:
+        status_cache = ComplianceStatusCache(100, 60, 60)
+        status_cache._listener_pid = os.getpid()  # Invalidations are not received from Redis
+        return status_cache
+
+    def get_status_async(self, status_cache: ComplianceStatusCache, address: str):
+        async def run():
+            try:
+                return await status_cache.get_status_async(address)
+            finally:
+                await AsyncRedisRepository.del_singleton()  # Pool is bound to the event loop
+
+        return asyncio.run(run())
+
+    def test_get_statuses(self):
+        status_cache = self.get_status_cache()
+        address = Account.create().address
+        ComplianceStatus.objects.create(address=address, status=ComplianceStatusType.VERIFIED.value)
+        unknown_address = Account.create().address
+        expected = [ComplianceStatusType.VERIFIED, None, ComplianceStatusType.VERIFIED]
+        self.assertEqual(status_cache.get_statuses([address, unknown_address, address.lower()]), expected)
+        self.assertEqual(status_cache.get_statuses([address, unknown_address, address.lower()]), expected)
+        stats = status_cache.get_stats()
+        self.assertEqual((stats['local_hits'], stats['local_misses']), (2, 2))
+        self.assertEqual((stats['shared_hits'], stats['shared_misses']), (0, 2))
+
+        # Other processes read the shared cache
+        other_status_cache = self.get_status_cache()
+        with self.assertNumQueries(0):
+            self.assertEqual(other_status_cache.get_statuses([address, unknown_address]), expected[:2])
+        self.assertEqual(other_status_cache.get_stats()['shared_hits'], 2)
+
+    def test_invalidate(self):
+        status_cache = self.get_status_cache()
+        address = Account.create().address
+        status = ComplianceStatus.objects.create(address=address, status=ComplianceStatusType.VERIFIED.value)
+        self.assertEqual(status_cache.get_status(address), ComplianceStatusType.VERIFIED)
+        status.status = ComplianceStatusType.REJECTED.value
+        status.save(update_fields=['status'])
+        status_cache.invalidate(address)
+        self.assertEqual(status_cache.get_stats()['invalidations'], 1)
+        self.assertEqual(status_cache.get_status(address), ComplianceStatusType.REJECTED)
+        self.assertEqual(self.get_status_cache().get_status(address), ComplianceStatusType.REJECTED)
+
+    def test_invalidation_while_loading(self):
+        # Status is loaded, then changed and invalidated before the loaded status is written back to the caches
+        address = Account.create().address
+        ComplianceStatus.objects.create(address=address, status=ComplianceStatusType.VERIFIED.value)
+
+        def get_status(status_cache: ComplianceStatusCache, address: str):
+            return status_cache.get_status(address)
+
+        for name, caches, get_status in (('sync', settings.CACHES, get_status),
+                                         ('sync redis', REDIS_CACHES, get_status),
+                                         ('async redis', REDIS_CACHES, self.get_status_async)):
+            with self.subTest(name), override_settings(CACHES=caches):
+                ComplianceStatus.objects.filter(address=address).update(status=ComplianceStatusType.VERIFIED.value)
+                cache.clear()
+                status_cache = self.get_status_cache()
+                load = status_cache._load
+
+                def load_and_change(keys):
+                    values = load(keys)
+                    ComplianceStatus.objects.filter(address=address).update(
+                        status=ComplianceStatusType.REJECTED.value
+                    )
+                    status_cache.invalidate(address)
+                    return values
+
+                with mock.patch.object(status_cache, '_load', side_effect=load_and_change):
+                    self.assertEqual(get_status(status_cache, address), ComplianceStatusType.VERIFIED)
+
+                self.assertEqual(get_status(status_cache, address), ComplianceStatusType.REJECTED)
+                self.assertEqual(get_status(self.get_status_cache(), address), ComplianceStatusType.REJECTED)
+                cache.clear()
+
+    def test_invalidation_received_while_loading(self):
+        # Other process invalidates the status while this one is loading it
+        status_cache = self.get_status_cache()
+        address = Account.create().address
+        ComplianceStatus.objects.create(address=address, status=ComplianceStatusType.VERIFIED.value)
+        get_shared = status_cache._get_shared
+
+        def get_shared_and_evict(keys):
+            values = get_shared(keys)
+            status_cache._handle_message(' '.join(keys).encode())
+            return values
+
+        with mock.patch.object(status_cache, '_get_shared', side_effect=get_shared_and_evict):
+            self.assertEqual(status_cache.get_status(address), ComplianceStatusType.VERIFIED)
+        self.assertEqual(len(status_cache.local_cache), 0)
+
+    def test_previous_shared_values(self):
+        # Values stored without generation are reloaded
+        status_cache = self.get_status_cache()
+        address = Account.create().address
+        ComplianceStatus.objects.create(address=address, status=ComplianceStatusType.REJECTED.value)
+        cache.set(status_cache._get_key(address), ComplianceStatusType.VERIFIED.value)
+        self.assertEqual(status_cache.get_status(address), ComplianceStatusType.REJECTED)
@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from eth_account import Account
+
+from .. import tasks
+from ..blocklist import BlocklistIndexProvider
+from ..models import BlockedAddress, ComplianceStatus, ComplianceStatusType
+from ..services import RescreeningServiceProvider
+from ..tasks import rescreen_addresses_task
+
+
+class TestRescreeningTasks(TestCase):
+    def setUp(self):
+        BlocklistIndexProvider.del_singleton()
+        RescreeningServiceProvider.del_singleton()
+
+    def tearDown(self):
+        BlocklistIndexProvider.del_singleton()
+        RescreeningServiceProvider.del_singleton()
+
+    def test_rescreen_addresses_task(self):
+        blocked_address = Account.create().address
+        BlockedAddress.objects.create(address=blocked_address, source='test')
+        ComplianceStatus.objects.create(address=blocked_address, status=ComplianceStatusType.VERIFIED.value)
+        for _ in range(3):
+            ComplianceStatus.objects.create(address=Account.create().address,
+                                            status=ComplianceStatusType.VERIFIED.value)
+        rescreening_service = RescreeningServiceProvider()
+        rescreening_service.chunk_size = 2
+
+        job_id = rescreen_addresses_task.delay().get()
+        progress = rescreening_service.get_progress(job_id)
+        self.assertTrue(progress['finished'])
+        self.assertEqual((progress['chunks_completed'], progress['screened'], progress['rejected']), (2, 4, 1))
+        self.assertEqual(ComplianceStatus.objects.get(address=blocked_address).status,
+                         ComplianceStatusType.REJECTED.value)
+
+    def test_restart_completed_job(self):
+        # Every chunk was completed, job is finished without dispatching chunks
+        rescreening_service = RescreeningServiceProvider()
+        ComplianceStatus.objects.create(address=Account.create().address, status=ComplianceStatusType.VERIFIED.value)
+        job_id = rescreening_service.create_job()
+        rescreening_service.screen_chunk(job_id, *rescreening_service.get_pending_chunks(job_id)[0])
+        with mock.patch.object(tasks, 'chord') as chord:
+            self.assertEqual(rescreen_addresses_task.delay(job_id).get(), job_id)
+        chord.assert_not_called()
+        self.assertTrue(rescreening_service.get_progress(job_id)['finished'])
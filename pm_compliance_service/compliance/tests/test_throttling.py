@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from eth_account import Account
+from redis.exceptions import ConnectionError
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ..repositories.redis_repository import RedisRepository
+from ..throttling import get_quota_key, get_token_usage, get_usage_key
+
+
+@override_settings(TOKEN_QUOTA_REQUESTS=2, TOKEN_QUOTA_WINDOW=3600, TOKEN_QUOTAS={})
+class TestTokenQuotaThrottle(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(Account.create().address)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.redis = RedisRepository().redis
+        self.clear_usage()
+
+    def tearDown(self):
+        self.clear_usage()
+
+    def clear_usage(self):
+        # Ids of the users are reused by every test database
+        quota_keys = list(self.redis.scan_iter(match=get_quota_key(self.user.pk) + ':*'))
+        if quota_keys:
+            self.redis.delete(*quota_keys)
+        self.redis.hdel(get_usage_key(datetime.now(timezone.utc)), str(self.user.pk), '%s:rejected' % self.user.pk)
+
+    def test_quota(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('v1:about')).status_code, 200)
+        response = self.client.get(reverse('v1:about'))
+        self.assertEqual(response.status_code, 429)
+        self.assertLessEqual(0, int(response['Retry-After']))
+        self.assertLessEqual(int(response['Retry-After']), 3600)
+
+        # Usage is available when the quota is exceeded
+        response = self.client.get(reverse('v1:token-usage'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['quota'], 2)
+        usage = get_token_usage(self.user.pk)
+        self.assertEqual(len(usage), 7)
+        self.assertEqual(usage[0], {'date': datetime.now(timezone.utc).date(), 'requests': 2, 'rejected': 1})
+        self.assertEqual(usage[1]['requests'], 0)
+
+    def test_token_quotas(self):
+        with override_settings(TOKEN_QUOTAS={self.user.get_username(): 3}):
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('v1:about')).status_code, 200)
+            self.assertEqual(self.client.get(reverse('v1:about')).status_code, 429)
+
+    def test_not_token(self):
+        # Requests without token are not limited
+        client = APIClient()
+        client.force_login(self.user)
+        for _ in range(3):
+            self.assertEqual(client.get(reverse('v1:about')).status_code, 200)
+        self.assertEqual(get_token_usage(self.user.pk, days=1)[0]['requests'], 0)
+
+    def test_redis_not_available(self):
+        with mock.patch.object(RedisRepository, 'incr_sliding_window', side_effect=ConnectionError):
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('v1:about')).status_code, 200)
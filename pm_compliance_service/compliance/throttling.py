@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from redis.exceptions import RedisError
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.throttling import BaseThrottle
+
+from .repositories.redis_repository import RedisRepository
+
+logger = getLogger(__name__)
+
+USAGE_TTL = 31 * 24 * 3600  # Daily usage of the tokens is kept for a month
+
+
+def get_quota_key(user_id: Any) -> str:
+    return 'quota:%s' % user_id
+
+
+def get_usage_key(day: datetime) -> str:
+    return 'quota:usage:%s' % day.strftime('%Y-%m-%d')
+
+
+def get_token_usage(user_id: Any, days: int = 7) -> List[Dict[str, Any]]:
+    """
+    :param user_id: Owner of the token
+    :param days: Number of days, today included
+    :return: Requests allowed and rejected by the quota on every UTC day, newest first
+    """
+    today = datetime.now(timezone.utc)
+    dates = [today - timedelta(days=day) for day in range(days)]
+    pipe = RedisRepository().redis.pipeline(transaction=False)
+    for date in dates:
+        pipe.hmget(get_usage_key(date), [str(user_id), '%s:rejected' % user_id])
+    return [{'date': date.date(), 'requests': int(requests or 0), 'rejected': int(rejected or 0)}
+            for date, (requests, rejected) in zip(dates, pipe.execute())]
+
+
+class TokenQuotaThrottle(BaseThrottle):
+    """
+    Sliding window quota for every API token: `TOKEN_QUOTA_REQUESTS` every `TOKEN_QUOTA_WINDOW` seconds, or
+    `TOKEN_QUOTAS[username]`. Checking the quota and counting the request (and its daily usage) is one Lua call,
+    shared by every process. Requests without token are not limited, and if Redis is not available requests are
+    allowed
+    """
+    def __init__(self):
+        self.retry_after = None  # type: Optional[float]
+
+    def allow_request(self, request, view) -> bool:
+        if not isinstance(request.successful_authenticator, TokenAuthentication):
+            return True
+
+        user = request.user
+        window = settings.TOKEN_QUOTA_WINDOW
+        now = time.time()
+        try:
+            allowed, _ = RedisRepository().incr_sliding_window(
+                get_quota_key(user.pk),
+                settings.TOKEN_QUOTAS.get(user.get_username(), settings.TOKEN_QUOTA_REQUESTS),
+                window, get_usage_key(datetime.fromtimestamp(now, timezone.utc)), str(user.pk), USAGE_TTL, now=now
+            )
+        except RedisError:
+            logger.warning('Cannot check quota of user %s, request is allowed', user.pk, exc_info=True)
+            return True
+
+        if not allowed:
+            self.retry_after = window - now % window  # Previous window stops counting
+        return allowed
+
+    def wait(self) -> Optional[float]:
+        return self.retry_after
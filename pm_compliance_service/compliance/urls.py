@@ -11,4 +11,13 @@ timestamp_regex = '\\d{4}[-]?\\d{1,2}[-]?\\d{1,2} \\d{1,2}:\\d{1,2}:\\d{1,2}'
 
 urlpatterns = [
     path('about/', views.AboutView.as_view(), name='about'),
+    path('addresses/check/', views.AddressesCheckView.as_view(), name='addresses-check'),
+    path('addresses/<str:address>/', views.AddressStatusView.as_view(), name='address-status'),
+    path('status-cache/stats/', views.StatusCacheStatsView.as_view(), name='status-cache-stats'),
+    path('exports/<slug:name>.<slug:file_format>', views.ExportView.as_view(), name='export'),
+    path('statuses/', views.StatusesListView.as_view(), name='statuses'),
+    path('imports/statuses/', views.StatusesImportView.as_view(), name='statuses-import'),
+    path('safes/owners/', views.SafesOwnersView.as_view(), name='safes-owners'),
+    path('tokens/usage/', views.TokenUsageView.as_view(), name='token-usage'),
+    path('signatures/verify/', views.SignaturesVerifyView.as_view(), name='signatures-verify'),
 ]
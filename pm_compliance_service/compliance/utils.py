@@ -1,22 +1,10 @@
-import logging
-from typing import List
+import asyncio
+import contextvars
+from typing import Any, Callable, List, Sequence
 
-from gunicorn import glogging
+from django.db import close_old_connections
 
-
-class IgnoreCheckUrl(logging.Filter):
-    def filter(self, record):
-        message = record.getMessage()
-        return not ('GET /check/' in message and '200' in message)
-
-
-class CustomGunicornLogger(glogging.Logger):
-    def setup(self, cfg):
-        super().setup(cfg)
-
-        # Add filters to Gunicorn logger
-        logger = logging.getLogger("gunicorn.access")
-        logger.addFilter(IgnoreCheckUrl())
+from eth_hash.auto import keccak
 
 
 def chunks(l: List[any], n: int):
@@ -27,3 +15,42 @@ def chunks(l: List[any], n: int):
     """
     for i in range(0, len(l), n):
         yield l[i:i + n]
+
+
+def checksum_encode_many(addresses: Sequence[bytes]) -> List[str]:
+    """
+    EIP55 checksum of a batch of addresses without the validations of `to_checksum_address`. Characters to
+    uppercase are selected with numpy for the whole batch, so only the keccak is calculated for every address
+    :param addresses: 20 bytes addresses
+    :return: Checksummed addresses in the same order
+    """
+    if not addresses:
+        return []
+    import numpy as np  # Most importers of this module don't need numpy
+
+    hex_addresses = [address.hex() for address in addresses]
+    hashes = np.frombuffer(b''.join([keccak(hex_address.encode()) for hex_address in hex_addresses]),
+                           dtype=np.uint8).reshape(len(addresses), 32)[:, :20]
+    nibbles = np.empty((len(addresses), 40), dtype=np.uint8)
+    nibbles[:, 0::2] = hashes >> 4
+    nibbles[:, 1::2] = hashes & 0x0f
+    characters = np.frombuffer(''.join(hex_addresses).encode(), dtype=np.uint8).reshape(len(addresses), 40)
+    characters = np.where((nibbles >= 8) & (characters >= ord('a')), characters - 32, characters)
+    checksummed = characters.tobytes().decode()
+    return ['0x' + checksummed[start:start + 40] for start in range(0, len(checksummed), 40)]
+
+
+async def run_in_thread(function: Callable, *args) -> Any:
+    """
+    Run a blocking function (e.g. database queries) on the default executor of the event loop. Database
+    connections of the thread that cannot be reused are closed before and after, as Django does for every request.
+    Function runs on a copy of the context of the caller, so it accounts on the Redis stats of the request
+    """
+    def run():
+        close_old_connections()
+        try:
+            return function(*args)
+        finally:
+            close_old_connections()
+
+    return await asyncio.get_event_loop().run_in_executor(None, contextvars.copy_context().run, run)
@@ -1,23 +1,56 @@
+import codecs
+import csv
 import logging
+import os
+import re
 
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
 
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
-from eth_account.account import Account
 from rest_framework import filters, status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.generics import CreateAPIView, ListAPIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView, exception_handler
 
 from pm_compliance_service.version import __version__
 
+from . import services
+from .blocklist import BlocklistIndexProvider
+from .exports import EXPORTS, FORMATS, iter_export
+from .imports import StatusesImporter
+from .metrics import MetricsProvider
+from .models import ComplianceStatus, ComplianceStatusType
+from .readiness import ReadinessCheckerProvider
+from .serializers import (ADDRESS_REGEX, AddressesCheckResponseSerializer,
+                          AddressesCheckSerializer,
+                          AddressStatusResponseSerializer,
+                          ComplianceStatusSerializer,
+                          SafesOwnersResponseSerializer, SafesOwnersSerializer,
+                          SignaturesVerifyResponseSerializer,
+                          SignaturesVerifySerializer,
+                          StatusCacheStatsResponseSerializer,
+                          StatusesImportResponseSerializer,
+                          StatusesImportSerializer,
+                          TokenUsageResponseSerializer)
+from .signatures import SignatureVerificationServiceProvider
+from .status_cache import ComplianceStatusCacheProvider
+from .throttling import get_token_usage
+
 logger = logging.getLogger(__name__)
 
+# Views not writing to the database opt out of `ATOMIC_REQUESTS`, so no transaction is opened (and no connection taken
+# from the pool) for them
+non_atomic_view = method_decorator(transaction.non_atomic_requests, name='dispatch')
+
 
 def custom_exception_handler(exc, context):
     # Call REST framework's default exception handler first,
@@ -43,6 +76,7 @@ def custom_exception_handler(exc, context):
     return response
 
 
+@non_atomic_view
 class AboutView(APIView):
     renderer_classes = (JSONRenderer,)
 
@@ -55,3 +89,212 @@ class AboutView(APIView):
             'settings': {}
         }
         return Response(content)
+
+
+@transaction.non_atomic_requests
+def metrics_view(request):
+    """
+    Request metrics of every process in Prometheus text format
+    """
+    return HttpResponse(MetricsProvider().export(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@transaction.non_atomic_requests
+def readiness_view(request):
+    """
+    Readiness of the service to serve requests: database, Redis, celery broker and Ethereum node must be
+    available. Result is cached for `READINESS_CACHE_TTL` seconds
+    """
+    result = ReadinessCheckerProvider().check()
+    response = JsonResponse(result, status=200 if result['ready'] else 503)
+    response['Cache-Control'] = 'no-store'
+    response._has_been_logged = True  # Checker logs failures once per check, not `django.request` on every call
+    return response
+
+
+@non_atomic_view
+class ExportView(APIView):
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    @swagger_auto_schema(responses={200: 'Records as NDJSON or CSV', 404: 'Unknown export or format'})
+    def get(self, request, name, file_format, format=None):
+        """
+        Stream every record of an export (`statuses` or `blocked-addresses`) as NDJSON or CSV. Records are read
+        from the database in chunks, so it can be used for full dumps
+        """
+        if name not in EXPORTS or file_format not in FORMATS:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(iter_export(name, file_format, settings.EXPORT_CHUNK_SIZE),
+                                         content_type=FORMATS[file_format])
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(name, file_format)
+        return response
+
+
+@non_atomic_view
+class StatusesListView(ListAPIView):
+    """
+    Compliance statuses, newest first. Results are paginated with a cursor, use `next` and `previous` links to
+    navigate. No count is returned, an estimation of the total can be requested with `?count=estimate`
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_fields = ('status',)
+    queryset = ComplianceStatus.objects.all()
+    serializer_class = ComplianceStatusSerializer
+
+
+class StatusesImportView(APIView):
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+    parser_classes = (MultiPartParser,)
+    serializer_class = StatusesImportSerializer
+
+    @swagger_auto_schema(request_body=StatusesImportSerializer,
+                         responses={200: StatusesImportResponseSerializer(),
+                                    400: 'Invalid data'})
+    def post(self, request, format=None):
+        """
+        Bulk import of statuses from a CSV file. Every valid address gets the status provided (`VERIFIED` by
+        default), invalid rows are skipped. Import is done in one transaction
+        """
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=serializer.errors)
+
+        importer = StatusesImporter(ComplianceStatusType[serializer.validated_data['status']])
+        # Uploaded file is read line by line, it's never fully loaded in memory
+        result = importer.run(csv.reader(codecs.iterdecode(serializer.validated_data['file'], 'utf-8')))
+        return Response(dict(result._asdict(), rows_per_second=result.rows_per_second))
+
+
+@non_atomic_view
+class AddressesCheckView(APIView):
+    serializer_class = AddressesCheckSerializer
+
+    @swagger_auto_schema(responses={200: AddressesCheckResponseSerializer(),
+                                    400: 'Invalid data'})
+    def post(self, request, format=None):
+        """
+        Check a batch of addresses against the sanctions lists and blocklists
+        """
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=serializer.errors)
+
+        addresses = serializer.validated_data['addresses']
+        blocked = BlocklistIndexProvider().contains_many(addresses)
+        return Response({'results': [{'address': address, 'blocked': is_blocked}
+                                     for address, is_blocked in zip(addresses, blocked)]})
+
+
+@non_atomic_view
+class AddressStatusView(APIView):
+    @swagger_auto_schema(responses={200: AddressStatusResponseSerializer(),
+                                    422: 'Invalid address'})
+    def get(self, request, address, format=None):
+        """
+        Check if an address is allowed: it must be verified and not present on any blocklist
+        """
+        if not re.match(ADDRESS_REGEX, address):
+            return Response(status=status.HTTP_422_UNPROCESSABLE_ENTITY, data='Invalid address')
+
+        compliance_status = ComplianceStatusCacheProvider().get_status(address)
+        blocked = BlocklistIndexProvider().contains(address)
+        return Response({
+            'address': address,
+            'status': compliance_status.name if compliance_status else None,
+            'blocked': blocked,
+            'allowed': compliance_status == ComplianceStatusType.VERIFIED and not blocked,
+        })
+
+
+@non_atomic_view
+class StatusCacheStatsView(APIView):
+    @swagger_auto_schema(responses={200: StatusCacheStatsResponseSerializer()})
+    def get(self, request, format=None):
+        """
+        Counters of the compliance status cache of the process serving the request
+        """
+        stats = ComplianceStatusCacheProvider().get_stats()
+        stats['pid'] = os.getpid()
+        return Response(stats)
+
+
+@non_atomic_view
+class TokenUsageView(APIView):
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = ()  # Available when quota is exceeded, requests are not counted
+
+    @swagger_auto_schema(responses={200: TokenUsageResponseSerializer()})
+    def get(self, request, format=None):
+        """
+        Quota of the token and requests allowed and rejected by it on every day of the last week (UTC)
+        """
+        user = request.user
+        return Response(TokenUsageResponseSerializer({
+            'quota': settings.TOKEN_QUOTAS.get(user.get_username(), settings.TOKEN_QUOTA_REQUESTS),
+            'window': settings.TOKEN_QUOTA_WINDOW,
+            'usage': get_token_usage(user.pk),
+        }).data)
+
+
+@non_atomic_view
+class SignaturesVerifyView(APIView):
+    serializer_class = SignaturesVerifySerializer
+
+    @swagger_auto_schema(responses={200: SignaturesVerifyResponseSerializer(),
+                                    400: 'Invalid data'})
+    def post(self, request, format=None):
+        """
+        Recover the signers of a batch of `personal_sign` messages. If `address` is provided for a signature,
+        it's valid only if it matches the signer
+        """
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=serializer.errors)
+
+        signatures = serializer.validated_data['signatures']
+        recovered_addresses = SignatureVerificationServiceProvider().recover_many(
+            [(signature['message'], signature['signature']) for signature in signatures]
+        )
+        results = []
+        for signature, recovered_address in zip(signatures, recovered_addresses):
+            expected_address = signature.get('address')
+            if recovered_address and expected_address:
+                valid = recovered_address.lower() == expected_address.lower()
+            else:
+                valid = recovered_address is not None
+            results.append({'recovered_address': recovered_address, 'valid': valid})
+        return Response({'results': results})
+
+
+@non_atomic_view
+class SafesOwnersView(APIView):
+    serializer_class = SafesOwnersSerializer
+
+    @swagger_auto_schema(responses={200: SafesOwnersResponseSerializer(),
+                                    400: 'Invalid data'})
+    def post(self, request, format=None):
+        """
+        Get the owner of a batch of Safes (deployed or not) and if the owner is a verified user
+        """
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=serializer.errors)
+
+        safes = serializer.validated_data['safes']
+        owners = services.SafeCreationServiceProvider().get_owners(safes)
+        known_owners = [owner for owner in owners if owner]
+        statuses = dict(zip(known_owners, ComplianceStatusCacheProvider().get_statuses(known_owners)))
+        results = []
+        for safe, owner in zip(safes, owners):
+            compliance_status = statuses.get(owner)
+            results.append({'safe': safe,
+                            'owner': owner,
+                            'status': compliance_status.name if compliance_status else None,
+                            'verified': compliance_status == ComplianceStatusType.VERIFIED})
+        return Response({'results': results})